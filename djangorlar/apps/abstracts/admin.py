@@ -1,3 +1,65 @@
-from django.contrib import admin
+# Python modules
+from typing import Any, Optional
 
-# Register your models here.
+# Django modules
+from django.contrib.admin import ModelAdmin
+from django.core.exceptions import ValidationError
+from django.core.handlers.wsgi import WSGIRequest
+from django.forms import HiddenInput, ModelForm
+from django.utils.html import format_html
+from django.utils.safestring import SafeString
+
+
+class VersionInput(HiddenInput):
+    """
+    Hidden version input that still shows the version it carries.
+    """
+
+    def render(
+        self,
+        name: str,
+        value: Any,
+        attrs: Optional[dict[str, Any]] = None,
+        renderer: Any = None,
+    ) -> SafeString:
+        """The hidden input followed by the version number."""
+        return format_html("{}{}", super().render(name, value, attrs, renderer), value)
+
+
+class VersionedChangelistForm(ModelForm):
+    """
+    Changelist row form of an ``AbstractVersionedModel``.
+
+    The row carries the version it was rendered with, and the edit is
+    refused if the object moved on since, instead of overwriting whatever
+    the other writer changed.
+    """
+
+    def clean(self) -> dict[str, Any]:
+        """Compare the submitted version with the stored one."""
+        cleaned_data = super().clean()
+        version = cleaned_data.get("version")
+        if self.instance.pk is not None and version != self.instance.version:
+            raise ValidationError(
+                "%(object)s was changed by someone else since this page was "
+                "loaded; reload it and apply the change again.",
+                code="version_conflict",
+                params={"object": self.instance},
+            )
+        return cleaned_data
+
+
+class VersionedModelAdmin(ModelAdmin):
+    """
+    Model admin protecting ``list_editable`` edits of versioned models.
+
+    Add ``version`` to both ``list_display`` and ``list_editable``; it is
+    rendered as a hidden field and checked by ``VersionedChangelistForm``,
+    while ``AbstractVersionedModel`` guards the UPDATE itself.
+    """
+
+    def get_changelist_form(self, request: WSGIRequest, **kwargs: Any) -> type[ModelForm]:
+        """Row form with the version check and hidden version input."""
+        kwargs.setdefault("form", VersionedChangelistForm)
+        kwargs.setdefault("widgets", {"version": VersionInput})
+        return super().get_changelist_form(request, **kwargs)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AbstractsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.abstracts'
+
+    def ready(self):
+        from .caching import check_shared_caches
+
+        check_shared_caches()
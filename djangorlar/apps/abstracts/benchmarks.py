@@ -0,0 +1,351 @@
+# Python modules
+import json
+import math
+import platform
+import subprocess
+from io import StringIO
+from random import Random
+from statistics import mean, median
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+# Django modules
+import django
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# Project modules
+from apps.news import documents, lookup_cache
+from apps.news.models import Article, Category, Comment, Tag
+from apps.taski.models import Project, Task, UserTask
+
+
+DEFAULT_SIZES = {
+    "users": 100,
+    "categories": 10,
+    "tags": 50,
+    "articles": 1000,
+    "tags_per_article": 5,
+    "comments_per_article": 3,
+    "projects": 20,
+    "tasks": 5000,
+    "assignees_per_task": 3,
+}
+WORDS = (
+    "lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing",
+    "elit", "sed", "do", "eiusmod", "tempor", "incididunt", "labore",
+)
+
+
+class Scenario:
+    """
+    One measured operation.
+
+    ``prepare`` runs once before timing and returns the callable that is
+    timed on every repetition.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prepare: Callable[["BenchmarkContext"], Callable[[], Any]],
+    ) -> None:
+        self.name = name
+        self.prepare = prepare
+
+
+class BenchmarkContext:
+    """
+    Seeded dataset plus the clients used by the scenarios.
+    """
+
+    def __init__(self, sizes: dict[str, int], seed: int = 0) -> None:
+        self.sizes = sizes
+        self.random = Random(seed)
+        self.anonymous = Client()
+        self.staff = Client()
+        self.admin: Optional[User] = None
+        self.counter = 0
+
+    def text(self, words: int) -> str:
+        """Random lorem ipsum."""
+        return " ".join(self.random.choice(WORDS) for _ in range(words))
+
+    def unique(self, prefix: str) -> str:
+        """Unique name for objects created while timing."""
+        self.counter += 1
+        return f"{prefix}-{self.counter}"
+
+    def seed(self) -> None:
+        """Create the dataset all scenarios run against."""
+
+        sizes = self.sizes
+        User.objects.bulk_create(
+            User(username=f"bench-{i}", password="!")
+            for i in range(sizes["users"])
+        )
+        self.admin = User.objects.create_superuser(
+            username="bench-admin",
+            password="bench",
+        )
+        self.staff.force_login(self.admin)
+        user_ids = list(User.objects.values_list("id", flat=True))
+
+        Category.objects.bulk_create(
+            Category(name=f"category {i}", slug=f"category-{i}")
+            for i in range(sizes["categories"])
+        )
+        Tag.objects.bulk_create(
+            Tag(name=f"tag {i}", slug=f"tag-{i}")
+            for i in range(sizes["tags"])
+        )
+        category_ids = list(Category.objects.values_list("id", flat=True))
+        tag_ids = list(Tag.objects.values_list("id", flat=True))
+
+        now = timezone.now()
+        Article.objects.bulk_create(
+            (
+                Article(
+                    title=f"article {i} {self.text(4)}",
+                    slug=f"article-{i}",
+                    summary=self.text(30),
+                    content=self.text(300),
+                    author_id=self.random.choice(user_ids),
+                    category_id=self.random.choice(category_ids),
+                    published=True,
+                    publish_at=now,
+                    is_featured=i % 20 == 0,
+                )
+                for i in range(sizes["articles"])
+            ),
+            batch_size=1000,
+        )
+        article_ids = list(Article.objects.values_list("id", flat=True))
+        Article.tags.through.objects.bulk_create(
+            (
+                Article.tags.through(article_id=article_id, tag_id=tag_id)
+                for article_id in article_ids
+                for tag_id in self.random.sample(
+                    tag_ids,
+                    min(sizes["tags_per_article"], len(tag_ids)),
+                )
+            ),
+            batch_size=5000,
+        )
+        # bulk_create sends no signals: load the taxonomy, then render the
+        # read model the public article list is served from
+        lookup_cache.invalidate()
+        documents.rebuild_all()
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    article_id=article_id,
+                    name="reader",
+                    body=self.text(20),
+                    approved=True,
+                )
+                for article_id in article_ids
+                for _ in range(sizes["comments_per_article"])
+            ),
+            batch_size=5000,
+        )
+
+        Project.objects.bulk_create(
+            Project(name=f"project {i}", author_id=self.random.choice(user_ids))
+            for i in range(sizes["projects"])
+        )
+        project_ids = list(Project.objects.values_list("id", flat=True))
+        tasks = Task.objects.bulk_create(
+            (
+                Task(
+                    name=f"task {i}",
+                    status=self.random.choice(
+                        (Task.STATUS_TODO, Task.STATUS_IN_PROGRESS, Task.STATUS_DONE)
+                    ),
+                    project_id=self.random.choice(project_ids),
+                )
+                for i in range(sizes["tasks"])
+            ),
+            batch_size=1000,
+        )
+        UserTask.objects.bulk_create(
+            (
+                UserTask(task_id=task.id, user_id=user_id)
+                for task in tasks
+                for user_id in self.random.sample(
+                    user_ids,
+                    min(sizes["assignees_per_task"], len(user_ids)),
+                )
+            ),
+            batch_size=5000,
+        )
+        UserTask.objects.get_or_create(task_id=tasks[0].id, user=self.admin)
+
+
+def _get(client_name: str, url: str) -> Callable[[BenchmarkContext], Callable[[], Any]]:
+    """Scenario preparing a plain GET request."""
+
+    def prepare(context: BenchmarkContext) -> Callable[[], Any]:
+        client = getattr(context, client_name)
+        resolved = url.format(
+            article=Article.objects.order_by("id").values_list("slug", flat=True).first(),
+        )
+        return lambda: client.get(resolved)
+
+    return prepare
+
+
+def _post_comment(context: BenchmarkContext) -> Callable[[], Any]:
+    article_id = Article.objects.order_by("id").values_list("id", flat=True).first()
+    return lambda: context.anonymous.post(
+        "/api/news/comments/",
+        {"article": article_id, "name": "bench", "body": context.text(20)},
+    )
+
+
+def _create_tagged_article(context: BenchmarkContext) -> Callable[[], Any]:
+    def run() -> Any:
+        return context.staff.post(
+            "/api/news/articles/",
+            {
+                "title": context.unique("tagged article"),
+                "content": context.text(100),
+                "tag_names": [context.unique("bench tag") for _ in range(10)]
+                + [f"tag {i}" for i in range(10)],
+            },
+            content_type="application/json",
+        )
+
+    return run
+
+
+def _generatetestdata(context: BenchmarkContext) -> Callable[[], Any]:
+    return lambda: call_command(
+        "generatetestdata",
+        users=20,
+        projects=20,
+        tasks=200,
+        stdout=StringIO(),
+    )
+
+
+def _inbox(context: BenchmarkContext) -> Callable[[], Any]:
+    return lambda: context.staff.get("/api/taski/inbox/")
+
+
+SCENARIOS = (
+    Scenario("article_list", _get("anonymous", "/api/news/articles/")),
+    Scenario("article_detail", _get("anonymous", "/api/news/articles/{article}/")),
+    Scenario("article_search", _get("anonymous", "/api/news/articles/?search=tempor")),
+    Scenario("article_featured", _get("anonymous", "/api/news/articles/featured/")),
+    Scenario("comment_post", _post_comment),
+    Scenario("article_create_tagged", _create_tagged_article),
+    Scenario("task_inbox", _inbox),
+    Scenario("admin_project_changelist", _get("staff", "/admin/taski/project/")),
+    Scenario("admin_task_changelist", _get("staff", "/admin/taski/task/")),
+    Scenario("admin_usertask_changelist", _get("staff", "/admin/taski/usertask/")),
+    Scenario("generatetestdata", _generatetestdata),
+)
+
+
+def percentile(timings: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted ``timings``, e.g. ``0.95`` for p95."""
+
+    return timings[min(len(timings) - 1, max(math.ceil(fraction * len(timings)) - 1, 0))]
+
+
+def run_scenario(
+    scenario: Scenario,
+    context: BenchmarkContext,
+    repeat: int,
+    warmup: int,
+) -> dict[str, Any]:
+    """Time one scenario and count the queries of its last run."""
+
+    run = scenario.prepare(context)
+    for _ in range(warmup):
+        run()
+    timings: list[float] = []
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = perf_counter()
+            result = run()
+            timings.append((perf_counter() - started) * 1000)
+        queries = len(captured)
+        status = getattr(result, "status_code", None)
+        if status is not None and status >= 400:
+            raise RuntimeError(f"{scenario.name} answered with HTTP {status}")
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(median(timings), 3),
+        "mean_ms": round(mean(timings), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "max_ms": round(timings[-1], 3),
+        "queries": queries,
+    }
+
+
+def environment() -> dict[str, Any]:
+    """Metadata identifying where and on what the results were taken."""
+
+    try:
+        commit = subprocess.run(
+            ("git", "rev-parse", "HEAD"),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+    }
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+) -> list[str]:
+    """
+    Regressions of ``results`` against ``baseline``.
+
+    A scenario regresses when its median grows by more than ``threshold``
+    (a fraction) or when it issues more queries than before.
+    """
+
+    regressions: list[str] = []
+    name: str
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        ratio = current["median_ms"] / max(previous["median_ms"], 1e-6)
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{name}: median {previous['median_ms']}ms -> "
+                f"{current['median_ms']}ms (x{ratio:.2f})"
+            )
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: queries {previous['queries']} -> {current['queries']}"
+            )
+    return regressions
+
+
+def load_results(path: str) -> dict[str, Any]:
+    """Read a results file written by ``runbenchmarks``."""
+
+    with open(path) as source:
+        return json.load(source)
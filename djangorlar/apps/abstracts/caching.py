@@ -0,0 +1,135 @@
+# Python modules
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Django modules
+from django.conf import settings
+from django.core.cache import BaseCache, cache as default_cache
+from django.core.exceptions import ImproperlyConfigured
+
+
+DEFAULT_SINGLE_FLIGHT = {
+    # seconds another process may hold the lock of a key before it is
+    # considered dead and the key is computed again
+    "LOCK_TIMEOUT": 30,
+    # seconds between two looks at the cache while another process computes
+    "POLL_INTERVAL": 0.05,
+}
+_MISSING = object()
+# backends whose entries only the current process sees
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_process_local(alias: str = "default") -> bool:
+    """Whether the entries of cache ``alias`` are invisible to other processes."""
+
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    return backend in PROCESS_LOCAL_BACKENDS
+
+
+def check_shared_caches() -> None:
+    """
+    Refuse to start on a process-local default or throttle cache.
+
+    Invalidation versions, cached pages and throttle buckets written by one
+    worker have to be seen by the others. Skipped when
+    ``REQUIRE_SHARED_CACHE`` is off, as for a single development process.
+    """
+
+    if not getattr(settings, "REQUIRE_SHARED_CACHE", False):
+        return
+    aliases = {"default", getattr(settings, "THROTTLE_CACHE", "default")}
+    local = sorted(alias for alias in aliases if is_process_local(alias))
+    if local:
+        raise ImproperlyConfigured(
+            f"Cache {', '.join(map(repr, local))} is local to each process; "
+            "configure a shared backend (e.g. Redis) in CACHES or set "
+            "REQUIRE_SHARED_CACHE = False."
+        )
+
+
+class _Flight:
+    """A computation of one key the other threads of the process wait for."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def single_flight(
+    key: str,
+    compute: Callable[[], Any],
+    timeout: Optional[float],
+    cache: Optional[BaseCache] = None,
+) -> Any:
+    """
+    The cached value of ``key``, computed with ``compute()`` and stored for
+    ``timeout`` seconds on a miss.
+
+    Concurrent misses on the same key compute it once. Threads of this
+    process wait for the thread computing it and share its result, or its
+    exception; other processes wait on a lock key in the cache and poll
+    until the value shows up. Errors are never cached.
+    """
+
+    cache = cache or default_cache
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    try:
+        flight.value = _compute_locked(cache, key, compute, timeout)
+    except BaseException as error:
+        flight.error = error
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+    return flight.value
+
+
+def _compute_locked(
+    cache: BaseCache,
+    key: str,
+    compute: Callable[[], Any],
+    timeout: Optional[float],
+) -> Any:
+    """Compute and store ``key`` unless another process does it first."""
+
+    config = {**DEFAULT_SINGLE_FLIGHT, **getattr(settings, "CACHE_SINGLE_FLIGHT", {})}
+    lock_key = f"{key}:lock"
+    # the lock expires, so a crashed holder only delays the others
+    while not cache.add(lock_key, 1, config["LOCK_TIMEOUT"]):
+        time.sleep(config["POLL_INTERVAL"])
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    try:
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            cache.set(key, value, timeout)
+        return value
+    finally:
+        cache.delete(lock_key)
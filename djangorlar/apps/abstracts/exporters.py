@@ -0,0 +1,274 @@
+# Python modules
+import csv
+import json
+import zlib
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# Django modules
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model, QuerySet
+from django.utils.module_loading import import_string
+
+
+EXPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_CHUNK_SIZE = 2000
+
+# Dataset name -> dotted path of its ExportSpec.
+EXPORT_DATASETS = {
+    "tasks": "apps.taski.exports.TASK_EXPORT",
+    "articles": "apps.news.exports.ARTICLE_EXPORT",
+}
+
+
+class ExportError(ValueError):
+    """Raised for unknown datasets, formats or columns."""
+
+
+class RelatedColumn:
+    """
+    Column resolved through a foreign key, one query per chunk.
+    """
+
+    def __init__(self, fk_field: str, model: type[Model], attr: str) -> None:
+        self.fk_field = fk_field
+        self.model = model
+        self.attr = attr
+
+    def resolve(self, ids: Iterable[Any]) -> dict[Any, Any]:
+        """Map of related id to the exported attribute."""
+        return dict(
+            self.model._default_manager.filter(
+                pk__in={i for i in ids if i is not None},
+            ).values_list("pk", self.attr)
+        )
+
+
+class ManyColumn:
+    """
+    Column resolved through a many-to-many relation, one query per chunk.
+
+    ``filters`` restrict the through rows, e.g. to the ones not soft
+    deleted.
+    """
+
+    def __init__(
+        self,
+        through: type[Model],
+        source: str,
+        target: str,
+        filters: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self.through = through
+        self.source = source
+        self.target = target
+        self.filters = filters or {}
+
+    def resolve(self, ids: Iterable[Any]) -> dict[Any, list[Any]]:
+        """Map of source id to the list of exported related values."""
+        resolved: dict[Any, list[Any]] = {}
+        rows = (
+            self.through._default_manager.filter(
+                **{f"{self.source}__in": list(ids)},
+                **self.filters,
+            )
+            .order_by(self.source, self.target)
+            .values_list(self.source, self.target)
+        )
+        for source_id, value in rows:
+            resolved.setdefault(source_id, []).append(value)
+        return resolved
+
+
+class ExportSpec:
+    """
+    Describes how one table is exported.
+
+    ``columns`` maps column names to either a concrete field name, a
+    ``RelatedColumn`` or a ``ManyColumn``.
+    """
+
+    def __init__(
+        self,
+        queryset: Callable[[], QuerySet],
+        columns: dict[str, Any],
+    ) -> None:
+        self.queryset = queryset
+        self.columns = columns
+
+    def select(self, names: Optional[list[str]] = None) -> list[str]:
+        """Validated list of requested columns."""
+
+        if not names:
+            return list(self.columns)
+        unknown = [name for name in names if name not in self.columns]
+        if unknown:
+            raise ExportError(f"Unknown columns: {', '.join(unknown)}")
+        return names
+
+    def iter_rows(
+        self,
+        names: list[str],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[list[Any]]:
+        """
+        Yield rows in primary key order.
+
+        Every chunk is a fresh keyset query, so neither the database cursor
+        nor the process holds more than ``chunk_size`` rows at a time.
+        """
+
+        plain: list[str] = []
+        related: dict[str, Any] = {}
+        name: str
+        for name in names:
+            column = self.columns[name]
+            if isinstance(column, RelatedColumn):
+                plain.append(column.fk_field)
+            elif isinstance(column, str):
+                plain.append(column)
+            else:
+                related[name] = column
+        values = ["pk"] + plain
+
+        last_pk: Any = None
+        while True:
+            queryset = self.queryset().order_by("pk")
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            chunk = list(queryset.values_list(*values)[:chunk_size])
+            if not chunk:
+                return
+            last_pk = chunk[-1][0]
+            yield from self.__materialize(chunk, names, plain, related)
+            if len(chunk) < chunk_size:
+                return
+
+    def __materialize(
+        self,
+        chunk: list[tuple[Any, ...]],
+        names: list[str],
+        plain: list[str],
+        related: dict[str, Any],
+    ) -> Iterator[list[Any]]:
+        """Resolve relations of one chunk and yield the final rows."""
+
+        lookups: dict[str, dict[Any, Any]] = {}
+        name: str
+        for name in names:
+            column = self.columns[name]
+            if isinstance(column, RelatedColumn):
+                index = plain.index(column.fk_field) + 1
+                lookups[name] = column.resolve(row[index] for row in chunk)
+        ids = [row[0] for row in chunk]
+        for name, column in related.items():
+            lookups[name] = column.resolve(ids)
+
+        for row in chunk:
+            values: list[Any] = []
+            for name in names:
+                column = self.columns[name]
+                if isinstance(column, ManyColumn):
+                    values.append(lookups[name].get(row[0], []))
+                elif isinstance(column, RelatedColumn):
+                    fk_id = row[plain.index(column.fk_field) + 1]
+                    values.append(lookups[name].get(fk_id))
+                else:
+                    values.append(row[plain.index(column) + 1])
+            yield values
+
+
+class _Echo:
+    """File-like object that returns what is written to it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_export_spec(dataset: str) -> ExportSpec:
+    """Look up a registered dataset."""
+
+    try:
+        return import_string(EXPORT_DATASETS[dataset])
+    except KeyError:
+        raise ExportError(
+            f"Unknown dataset {dataset!r}. "
+            f"Possible options: {tuple(EXPORT_DATASETS)}"
+        )
+
+
+def _csv_value(value: Any) -> Any:
+    """Flatten many-to-many lists into a single CSV cell."""
+
+    if isinstance(value, list):
+        return "|".join(str(item) for item in value)
+    return value
+
+
+def _encode(
+    rows: Iterator[list[Any]],
+    names: list[str],
+    export_format: str,
+) -> Iterator[str]:
+    """Render rows as CSV or NDJSON lines."""
+
+    if export_format == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+        return
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + "\n"
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Incrementally gzip a byte stream."""
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(
+    dataset: str,
+    export_format: str = "csv",
+    columns: Optional[list[str]] = None,
+    compress: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Stream a dataset as encoded bytes.
+
+    Lines are grouped per database chunk so the consumer sees a few large
+    writes instead of one per row.
+    """
+
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(
+            f"Unknown format {export_format!r}. "
+            f"Possible options: {EXPORT_FORMATS}"
+        )
+    spec = get_export_spec(dataset)
+    names = spec.select(columns)
+
+    def batches() -> Iterator[bytes]:
+        buffer: list[str] = []
+        for line in _encode(
+            spec.iter_rows(names, chunk_size),
+            names,
+            export_format,
+        ):
+            buffer.append(line)
+            if len(buffer) >= chunk_size:
+                yield "".join(buffer).encode()
+                buffer = []
+        if buffer:
+            yield "".join(buffer).encode()
+
+    if compress:
+        return _gzip(batches())
+    return batches()
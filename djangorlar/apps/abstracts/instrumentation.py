@@ -0,0 +1,87 @@
+# Python modules
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional
+
+
+class RequestMetrics:
+    """
+    Per-request counters filled by the DB wrapper and the serializers.
+    """
+
+    def __init__(self) -> None:
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def duplicates(self, threshold: int) -> list[tuple[str, int]]:
+        """SQL statements executed at least ``threshold`` times."""
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+_current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "current_request_metrics",
+    default=None,
+)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being served, if instrumentation is on."""
+    return _current_metrics.get()
+
+
+@contextmanager
+def collect_metrics() -> Iterator[RequestMetrics]:
+    """Make a fresh metrics object current for the enclosed block."""
+
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+def query_timer(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    """``connection.execute_wrapper`` hook counting and timing queries."""
+
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += perf_counter() - started
+        metrics.query_count += 1
+        # Parameters are kept out of the key so N+1 loops, which repeat
+        # the same statement with different ids, are grouped together.
+        metrics.statements[sql] += 1
+
+
+@contextmanager
+def serializer_timer() -> Iterator[None]:
+    """Add the time spent in the enclosed block to serializer time."""
+
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += perf_counter() - started
@@ -0,0 +1,82 @@
+# Python modules
+import sys
+from typing import Any
+
+# Django modules
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+# Project modules
+from apps.abstracts.exporters import (
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_DATASETS,
+    EXPORT_FORMATS,
+    ExportError,
+    stream_export,
+)
+
+
+class Command(BaseCommand):
+    help = "Streams tasks or articles to CSV/NDJSON with flat memory usage."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Command line arguments."""
+
+        parser.add_argument("dataset", choices=tuple(EXPORT_DATASETS))
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=EXPORT_FORMATS,
+            default="csv",
+        )
+        parser.add_argument(
+            "--fields",
+            default="",
+            help="Comma separated list of columns, all by default.",
+        )
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            default="-",
+            help="Target file, stdout by default.",
+        )
+
+    def handle(self, *args: tuple[Any, ...], **options: dict[str, Any]) -> None:
+        """Command entry point."""
+
+        columns = [
+            name.strip()
+            for name in options["fields"].split(",")
+            if name.strip()
+        ]
+        try:
+            chunks = stream_export(
+                options["dataset"],
+                export_format=options["export_format"],
+                columns=columns,
+                compress=options["gzip"],
+                chunk_size=options["chunk_size"],
+            )
+        except ExportError as error:
+            raise CommandError(str(error))
+
+        if options["output"] == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(options["output"], "wb") as target:
+            for chunk in chunks:
+                target.write(chunk)
+        self.stderr.write(
+            self.style.SUCCESS(f"Exported {options['dataset']} to {options['output']}.")
+        )
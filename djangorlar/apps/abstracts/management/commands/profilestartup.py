@@ -0,0 +1,78 @@
+# Python modules
+from typing import Any
+
+# Django modules
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+# Project modules
+from apps.abstracts.startup import by_package, profile_boot, slowest
+
+
+class Command(BaseCommand):
+    help = (
+        "Boots Django in fresh interpreters and reports cold-start time, "
+        "time to first request and an import-time breakdown per package. "
+        "With --slim the slim boot mode is measured next to the full one."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Command line arguments."""
+
+        parser.add_argument(
+            "--url",
+            default="/api/news/",
+            help="Path of the first request, empty to only time django.setup().",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--slim",
+            action="store_true",
+            help="Also measure DJANGORLAR_SLIM_BOOT=1 (setup only).",
+        )
+
+    def handle(self, *args: tuple[Any, ...], **options: dict[str, Any]) -> None:
+        """Command entry point."""
+
+        modes = [("full", False, options["url"])]
+        if options["slim"]:
+            # slim boots serve no HTTP, only time the setup
+            modes.append(("slim", True, ""))
+        results: dict[str, dict[str, Any]] = {}
+        for name, slim, url in modes:
+            try:
+                results[name] = profile_boot(slim=slim, url=url, repeat=options["repeat"])
+            except RuntimeError as error:
+                raise CommandError(f"{name} boot failed: {error}")
+
+        for name, result in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name} boot"))
+            self.stdout.write(
+                f"  process={result['process_ms']:.1f}ms "
+                f"setup={result['setup_ms']:.1f}ms "
+                + (
+                    f"first_request={result['first_request_ms']:.1f}ms ({result['status']}) "
+                    if "first_request_ms" in result
+                    else ""
+                )
+                + f"modules={result['modules']}"
+            )
+            self.stdout.write("  self time per package:")
+            for package, micros in by_package(result["imports"])[: options["top"]]:
+                self.stdout.write(f"    {micros / 1000:8.1f}ms  {package}")
+            self.stdout.write("  slowest modules (cumulative):")
+            for timing in slowest(result["imports"], options["top"], "cumulative_us"):
+                self.stdout.write(f"    {timing.cumulative_us / 1000:8.1f}ms  {timing.module}")
+
+        if "slim" in results:
+            full, slim = results["full"], results["slim"]
+            saved = full["setup_ms"] - slim["setup_ms"]
+            message = f"slim boot saves {saved:.1f}ms of django.setup() ({saved / full['setup_ms']:.0%})"
+            if not options["url"]:
+                # module counts are only comparable when neither served a request
+                message += f" and {full['modules'] - slim['modules']} module imports"
+            self.stdout.write(self.style.SUCCESS(message + "."))
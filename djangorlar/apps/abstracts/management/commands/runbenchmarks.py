@@ -0,0 +1,143 @@
+# Python modules
+import json
+from typing import Any
+
+# Django modules
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+# Project modules
+from apps.abstracts.benchmarks import (
+    DEFAULT_SIZES,
+    SCENARIOS,
+    BenchmarkContext,
+    compare,
+    environment,
+    load_results,
+    run_scenario,
+)
+from apps.news import view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throw-away test database and times the news and taski "
+        "hot paths. Results are written as JSON and can be compared "
+        "against a previous run."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Command line arguments."""
+
+        size: str
+        for size, default in DEFAULT_SIZES.items():
+            parser.add_argument(
+                f"--{size.replace('_', '-')}",
+                type=int,
+                default=default,
+            )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--only",
+            default="",
+            help="Comma separated scenario names, all by default.",
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            default="",
+            help="Write results to this JSON file.",
+        )
+        parser.add_argument(
+            "--compare",
+            default="",
+            help="Results file of a previous run to compare against.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed median slowdown as a fraction, 0.2 means 20%%.",
+        )
+
+    def handle(self, *args: tuple[Any, ...], **options: dict[str, Any]) -> None:
+        """Command entry point."""
+
+        only = {name for name in options["only"].split(",") if name}
+        unknown = only - {scenario.name for scenario in SCENARIOS}
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        baseline = load_results(options["compare"]) if options["compare"] else None
+        sizes = {size: options[size] for size in DEFAULT_SIZES}
+
+        setup_test_environment()
+        # Scenarios replay the same request many times from one client, the
+        # page cache would answer all but the first from memory, and
+        # background writers would only add noise to the timings.
+        no_throttling = override_settings(
+            THROTTLE_ENABLED=False,
+            NEWS_PAGE_CACHE_TIMEOUT=0,
+            NEWS_RELATED_INCREMENTAL=False,
+            NEWS_FEEDS_INCREMENTAL=False,
+            VIEW_COUNTER={"START_WORKER": False},
+        )
+        no_throttling.enable()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            context = BenchmarkContext(sizes, seed=options["seed"])
+            context.seed()
+            scenarios: dict[str, Any] = {}
+            for scenario in SCENARIOS:
+                if only and scenario.name not in only:
+                    continue
+                scenarios[scenario.name] = run_scenario(
+                    scenario,
+                    context,
+                    repeat=options["repeat"],
+                    warmup=options["warmup"],
+                )
+                result = scenarios[scenario.name]
+                self.stdout.write(
+                    f"{scenario.name:<28} "
+                    f"median={result['median_ms']:>9.2f}ms "
+                    f"p95={result['p95_ms']:>9.2f}ms "
+                    f"queries={result['queries']}"
+                )
+        finally:
+            # views counted against the throw-away database must not be
+            # written to the real one at exit
+            view_counter.get_buffer().drain()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            no_throttling.disable()
+            teardown_test_environment()
+
+        results = {
+            "environment": environment(),
+            "sizes": sizes,
+            "scenarios": scenarios,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as target:
+                json.dump(results, target, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
+
+        if baseline is None:
+            return
+        regressions = compare(results, baseline, options["threshold"])
+        if regressions:
+            raise CommandError(
+                "Performance regressions:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
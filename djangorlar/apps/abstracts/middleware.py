@@ -0,0 +1,245 @@
+# Python modules
+import json
+import logging
+import random
+import sys
+import threading
+from contextlib import ExitStack
+from time import perf_counter
+from typing import Callable, Optional
+
+# Django modules
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+# Project modules
+from .instrumentation import collect_metrics, query_timer
+from .profiling import ProfiledRequest, check_token, profile_store, profiler_config, sampler
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+logger = logging.getLogger("djangorlar.instrumentation")
+
+DEFAULT_THRESHOLDS = {
+    "QUERY_COUNT": 50,
+    "DB_TIME_MS": 200,
+    "TOTAL_TIME_MS": 500,
+    "RESPONSE_BYTES": 1_000_000,
+    "DUPLICATE_QUERIES": 5,
+}
+DEFAULT_COMPRESSION = {
+    "MIN_SIZE": 1024,
+    "BROTLI_QUALITY": 5,
+}
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/msgpack",
+    "application/javascript",
+    "application/xml",
+    "application/rss+xml",
+    "application/atom+xml",
+)
+# API payloads, which carry no CSRF token and may be brotli compressed
+BROTLI_TYPES = (
+    "application/json",
+    "application/msgpack",
+)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records DB query count and time, serializer time and response size for
+    every request.
+
+    Results are sent back as a ``Server-Timing`` header and logged as one
+    JSON line. Requests over any of the ``QUERY_INSTRUMENTATION_THRESHOLDS``
+    are logged as warnings together with the repeated SQL statements.
+    """
+
+    def __init__(self, get_response: Callable[[WSGIRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+        self.thresholds = {
+            **DEFAULT_THRESHOLDS,
+            **getattr(settings, "QUERY_INSTRUMENTATION_THRESHOLDS", {}),
+        }
+
+    def __call__(self, request: WSGIRequest) -> HttpResponse:
+        started = perf_counter()
+        with collect_metrics() as metrics, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_timer))
+            response = self.get_response(request)
+        total_ms = (perf_counter() - started) * 1000
+        db_ms = metrics.db_time * 1000
+        serializer_ms = metrics.serializer_time * 1000
+        size = None if response.streaming else len(response.content)
+
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={db_ms:.1f};desc="{metrics.query_count} queries"',
+                f"serializer;dur={serializer_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            )
+        )
+
+        duplicates = metrics.duplicates(self.thresholds["DUPLICATE_QUERIES"])
+        flags = []
+        if metrics.query_count > self.thresholds["QUERY_COUNT"]:
+            flags.append("query_count")
+        if db_ms > self.thresholds["DB_TIME_MS"]:
+            flags.append("db_time")
+        if total_ms > self.thresholds["TOTAL_TIME_MS"]:
+            flags.append("total_time")
+        if size is not None and size > self.thresholds["RESPONSE_BYTES"]:
+            flags.append("response_size")
+        if duplicates:
+            flags.append("duplicate_queries")
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": metrics.query_count,
+            "db_ms": round(db_ms, 2),
+            "serializer_ms": round(serializer_ms, 2),
+            "total_ms": round(total_ms, 2),
+            "response_bytes": size,
+            "flags": flags,
+        }
+        if duplicates:
+            record["duplicates"] = [
+                {"sql": sql, "count": count} for sql, count in duplicates
+            ]
+        logger.log(
+            logging.WARNING if flags else logging.INFO,
+            json.dumps(record),
+            extra={"instrumentation": record},
+        )
+        return response
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Content codings of an ``Accept-Encoding`` header with a non-zero q."""
+    encodings = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            encodings.add(coding)
+    return encodings
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses responses with brotli (when installed) or gzip.
+
+    Only non-streaming responses of a text-like or JSON/msgpack type and at
+    least ``RESPONSE_COMPRESSION["MIN_SIZE"]`` bytes are compressed; below
+    that the headers and CPU cost more than the bytes saved.
+
+    Pages mixing a secret, like a CSRF token, with reflected input leak it
+    through the compressed size (BREACH). gzip therefore goes through
+    Django's ``GZipMiddleware``, which pads its output with random bytes,
+    and brotli, which has no such padding, is kept to the API types in
+    ``BROTLI_TYPES``. Assets are pre-compressed and served by the static
+    handler as they are.
+    """
+
+    def __init__(self, get_response: Callable[[WSGIRequest], HttpResponse]) -> None:
+        super().__init__(get_response)
+        self.config = {
+            **DEFAULT_COMPRESSION,
+            **getattr(settings, "RESPONSE_COMPRESSION", {}),
+        }
+
+    def process_response(self, request: WSGIRequest, response: HttpResponse) -> HttpResponse:
+        content_type = response.get("Content-Type", "")
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < self.config["MIN_SIZE"]
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encodings = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if brotli is not None and "br" in encodings and content_type.startswith(BROTLI_TYPES):
+            content = brotli.compress(response.content, quality=self.config["BROTLI_QUALITY"])
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response["Content-Length"] = str(len(content))
+            response["Content-Encoding"] = "br"
+            # the bytes differ from the identity response the ETag was made for
+            etag = response.get("ETag")
+            if etag and etag.startswith('"'):
+                response["ETag"] = "W/" + etag
+            return response
+        if "gzip" not in encodings:
+            return response
+        return super().process_response(request, response)
+
+
+class SamplingProfilerMiddleware:
+    """
+    Samples the stack of one request in ``SAMPLE_RATE``, and of every
+    request sending a valid ``X-Profile`` token, into the profile store.
+
+    Staff read the aggregated flame graph and get tokens on the profiler
+    admin page. Requests that are not picked only pay a random draw.
+    """
+
+    def __init__(self, get_response: Callable[[WSGIRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+        self.config = profiler_config()
+
+    def reason(self, request: WSGIRequest) -> Optional[str]:
+        """Why the request gets profiled, ``None`` when it does not."""
+        token = request.META.get("HTTP_X_PROFILE")
+        if token and check_token(token, self.config["TOKEN_MAX_AGE"]):
+            return "header"
+        rate = self.config["SAMPLE_RATE"]
+        if rate and random.randrange(rate) == 0:
+            return "sampled"
+        return None
+
+    def __call__(self, request: WSGIRequest) -> HttpResponse:
+        reason = self.reason(request)
+        if reason is None:
+            return self.get_response(request)
+
+        thread_id = threading.get_ident()
+        samples = sampler.start(
+            thread_id,
+            sys._getframe(),
+            self.config["INTERVAL"],
+            self.config["MAX_DEPTH"],
+        )
+        profiled = ProfiledRequest(request.method, request.path, reason, samples)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop(thread_id)
+            profiled.duration_ms = (perf_counter() - started) * 1000
+            profile_store().add(profiled)
+        profiled.status = response.status_code
+        response["X-Profile-Id"] = str(profiled.id)
+        return response
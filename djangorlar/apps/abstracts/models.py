@@ -2,7 +2,8 @@
 from typing import Any
 
 # Django modules
-from django.db.models import Model, DateTimeField
+from django.db import DatabaseError
+from django.db.models import Model, DateTimeField, PositiveIntegerField
 from django.utils import timezone as django_timezone
 
 
@@ -25,3 +26,61 @@ class AbstractBaseModel(Model):
 
         self.deleted_at = django_timezone.now()
         self.save(update_fields=["deleted_at"])
+
+
+class VersionConflict(DatabaseError):
+    """Raised when a versioned row was changed since it was read."""
+
+
+class AbstractVersionedModel(AbstractBaseModel):
+    """
+    Abstract base model with optimistic concurrency control.
+
+    Every update runs as ``UPDATE ... SET version = version + 1 WHERE id = ?
+    AND version = ?`` with the version the instance was read (or told, see
+    ``expect_version``) with, and raises ``VersionConflict`` when another
+    writer got there first. ``QuerySet.update()`` is not guarded and has to
+    bump ``version`` itself.
+    """
+
+    version = PositiveIntegerField(default=1)
+
+    class Meta:
+        """Meta class for abstract model."""
+
+        abstract = True
+
+    def expect_version(self, version: int) -> None:
+        """Only save if the row is still at ``version``, e.g. from If-Match."""
+        self.version = version
+
+    def _do_update(
+        self,
+        base_qs: Any,
+        using: str,
+        pk_val: Any,
+        values: list[tuple[Any, Any, Any]],
+        update_fields: Any,
+        forced_update: bool,
+    ) -> bool:
+        """Conditional update on the version column."""
+
+        field = self._meta.get_field("version")
+        expected = self.version
+        values = [value for value in values if value[0] is not field]
+        values.append((field, None, expected + 1))
+        updated = super()._do_update(
+            base_qs.filter(version=expected),
+            using,
+            pk_val,
+            values,
+            update_fields,
+            forced_update,
+        )
+        if updated:
+            self.version = expected + 1
+        elif base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(
+                f"{self.__class__.__name__} {pk_val} is no longer at version {expected}."
+            )
+        return updated
@@ -0,0 +1,60 @@
+# Python modules
+from typing import Any
+
+# Third party modules
+from rest_framework.serializers import ListSerializer
+
+# Project modules
+from .instrumentation import serializer_timer
+
+
+class TimedSerializerMixin:
+    """
+    Report the time spent building ``serializer.data`` to the
+    instrumentation middleware.
+
+    Nested serializers go through ``to_representation`` only, so the time
+    is counted once, on the outermost serializer.
+    """
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    """List serializer counterpart of ``TimedSerializerMixin``."""
+
+
+COMPACT_PARAM = "compact"
+
+
+def is_compact(request: Any) -> bool:
+    """
+    Whether the request asked for ``?compact=1`` output.
+
+    Anything that is not a DRF request (e.g. the stand-in used to render
+    stored payloads) gets the full representation.
+    """
+    params = getattr(request, "query_params", None)
+    return params is not None and params.get(COMPACT_PARAM) in ("1", "true")
+
+
+class CompactFieldsMixin:
+    """
+    Leave out ``compact_exclude`` fields in compact mode.
+
+    Meant for hyperlinks clients can build from ids and slugs: they are a
+    large share of list payloads and each costs a ``reverse()``.
+    """
+
+    compact_exclude: tuple[str, ...] = ("url",)
+
+    def get_fields(self) -> dict[str, Any]:
+        """Declared fields minus the derivable ones when compact."""
+        fields = super().get_fields()
+        if is_compact(self.context.get("request")):
+            for name in self.compact_exclude:
+                fields.pop(name, None)
+        return fields
@@ -0,0 +1,167 @@
+# Python modules
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from statistics import median
+from time import perf_counter
+from typing import Any, Optional
+
+# Django modules
+from django.conf import settings
+
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+# Packages reported one level deeper, the top level alone says little.
+SPLIT_PACKAGES = ("apps", "django", "django.contrib")
+
+# Runs in a fresh interpreter: boots Django, optionally builds the WSGI
+# handler and serves one request, then prints the timings as JSON.
+BOOT_SCRIPT = """
+import json, sys
+from time import perf_counter
+started = perf_counter()
+import django
+django.setup()
+result = {"setup_ms": (perf_counter() - started) * 1000}
+url = sys.argv[1]
+if url:
+    from wsgiref.util import setup_testing_defaults
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()
+    path, _, query = url.partition("?")
+    environ = {"PATH_INFO": path, "QUERY_STRING": query, "HTTP_HOST": "localhost"}
+    setup_testing_defaults(environ)
+    statuses = []
+    application(environ, lambda status, headers, *args: statuses.append(status))
+    result["first_request_ms"] = (perf_counter() - started) * 1000
+    result["status"] = statuses[0]
+print(json.dumps(result))
+"""
+
+
+class ImportTiming:
+    """
+    One line of ``python -X importtime``, times in microseconds.
+    """
+
+    def __init__(self, module: str, self_us: int, cumulative_us: int, depth: int) -> None:
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """Parse the ``-X importtime`` report written to stderr."""
+
+    timings: list[ImportTiming] = []
+    for line in output.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        timings.append(
+            ImportTiming(module, int(self_us), int(cumulative_us), len(indent) // 2)
+        )
+    return timings
+
+
+def package_of(module: str) -> str:
+    """``django.contrib.admin.options`` -> ``django.contrib.admin``."""
+
+    parts = module.split(".")
+    depth = 1
+    while depth < len(parts) and ".".join(parts[:depth]) in SPLIT_PACKAGES:
+        depth += 1
+    return ".".join(parts[:depth])
+
+
+def by_package(timings: list[ImportTiming]) -> list[tuple[str, int]]:
+    """Self time summed per package, slowest first."""
+
+    totals: dict[str, int] = defaultdict(int)
+    for timing in timings:
+        totals[package_of(timing.module)] += timing.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def boot_environment(slim: bool) -> dict[str, str]:
+    """Environment of the child interpreter, in slim boot mode or not."""
+
+    env = dict(os.environ)
+    env["DJANGORLAR_SLIM_BOOT"] = "1" if slim else "0"
+    # compiled bytecode is what a warm pod image has as well
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def measure_boot(
+    slim: bool = False,
+    url: str = "",
+    importtime: bool = False,
+) -> dict[str, Any]:
+    """
+    Boot Django in a fresh interpreter and time it.
+
+    ``process_ms`` includes the interpreter itself; ``setup_ms`` is
+    ``django.setup()`` and ``first_request_ms`` adds building the WSGI
+    handler and answering ``url``.
+    """
+
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", BOOT_SCRIPT, url]
+    started = perf_counter()
+    completed = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        env=boot_environment(slim),
+        check=False,
+    )
+    process_ms = (perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        # a child killed by a signal may have written nothing
+        errors = completed.stderr.strip().splitlines()
+        raise RuntimeError(
+            errors[-1] if errors else f"exited with status {completed.returncode}"
+        )
+    output = completed.stdout.strip().splitlines()
+    if not output:
+        raise RuntimeError("printed no timings")
+    result: dict[str, Any] = json.loads(output[-1])
+    result["process_ms"] = process_ms
+    if importtime:
+        result["imports"] = parse_importtime(completed.stderr)
+    return result
+
+
+def profile_boot(
+    slim: bool = False,
+    url: str = "",
+    repeat: int = 5,
+) -> dict[str, Any]:
+    """Median timings of ``repeat`` boots plus one import breakdown."""
+
+    runs = [measure_boot(slim=slim, url=url) for _ in range(repeat)]
+    summary: dict[str, Any] = {
+        key: median(run[key] for run in runs)
+        for key in ("process_ms", "setup_ms", "first_request_ms")
+        if key in runs[0]
+    }
+    summary["status"] = runs[0].get("status")
+    imports: list[ImportTiming] = measure_boot(slim=slim, url=url, importtime=True)["imports"]
+    summary["imports"] = imports
+    summary["modules"] = len(imports)
+    return summary
+
+
+def slowest(timings: list[ImportTiming], top: int, key: Optional[str] = None) -> list[ImportTiming]:
+    """Modules with the highest self (default) or cumulative time."""
+
+    return sorted(timings, key=lambda timing: getattr(timing, key or "self_us"), reverse=True)[:top]
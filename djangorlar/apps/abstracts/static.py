@@ -0,0 +1,384 @@
+# Python modules
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# Django modules
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+
+# Third party modules
+from asgiref.sync import sync_to_async
+
+# Project modules
+from .middleware import accepted_encodings
+
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticResponse:
+    """
+    Status, headers and file slice of a static response.
+    """
+
+    def __init__(
+        self,
+        status: int,
+        headers: list[tuple[str, str]],
+        path: Optional[str] = None,
+        offset: int = 0,
+        length: int = 0,
+    ) -> None:
+        self.status = status
+        self.headers = headers
+        self.path = path
+        self.offset = offset
+        self.length = length
+
+    def iter_file(self) -> Iterator[bytes]:
+        """Read the selected slice of the file in chunks."""
+
+        if self.path is None:
+            return
+        remaining = self.length
+        with open(self.path, "rb") as source:
+            source.seek(self.offset)
+            while remaining > 0:
+                chunk = source.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+class StaticResolver:
+    """
+    Maps URL prefixes to directories and builds the response for a path.
+
+    Pre-compressed ``.br``/``.gz`` siblings are preferred when the client
+    accepts them. Plain files answer single byte ranges. ETag and
+    Last-Modified validators are honoured. Only URL paths matching one of
+    the ``immutable`` patterns are cached for a year.
+    """
+
+    REASONS = {
+        200: "OK",
+        206: "Partial Content",
+        304: "Not Modified",
+        405: "Method Not Allowed",
+        416: "Range Not Satisfiable",
+    }
+
+    def __init__(
+        self,
+        mounts: Iterable[tuple[str, str]],
+        immutable: Iterable[str] = (),
+    ) -> None:
+        self.mounts = [
+            (prefix, root)
+            for prefix, root in mounts
+            if prefix and root and prefix.startswith("/")
+        ]
+        self.immutable = [re.compile(pattern) for pattern in immutable]
+
+    @classmethod
+    def from_settings(cls) -> "StaticResolver":
+        """Serve STATIC_ROOT, MEDIA_ROOT and ``SERVE_STATIC_MOUNTS``."""
+        return cls(
+            (
+                (settings.STATIC_URL, settings.STATIC_ROOT),
+                (settings.MEDIA_URL, settings.MEDIA_ROOT),
+                *getattr(settings, "SERVE_STATIC_MOUNTS", ()),
+            ),
+            getattr(settings, "SERVE_STATIC_IMMUTABLE", ()),
+        )
+
+    def is_immutable(self, path: str) -> bool:
+        """Whether the file at a URL path never changes once written."""
+        return any(pattern.search(path) for pattern in self.immutable)
+
+    def match(self, path: str) -> Optional[str]:
+        """Absolute file path for a URL path, if it is served here."""
+
+        for prefix, root in self.mounts:
+            if not path.startswith(prefix):
+                continue
+            try:
+                filename = safe_join(root, path[len(prefix):])
+            except Exception:
+                return None
+            if os.path.isfile(filename):
+                return filename
+            return None
+        return None
+
+    def respond(
+        self,
+        method: str,
+        filename: str,
+        headers: dict[str, str],
+        immutable: bool = False,
+    ) -> StaticResponse:
+        """Build the response for an existing file."""
+
+        if method not in ("GET", "HEAD"):
+            return StaticResponse(405, [("Allow", "GET, HEAD")])
+
+        content_type, _ = mimetypes.guess_type(filename)
+        response_headers = [
+            ("Content-Type", content_type or "application/octet-stream"),
+            ("Vary", "Accept-Encoding"),
+            (
+                "Cache-Control",
+                IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL,
+            ),
+        ]
+
+        served, encoding = filename, None
+        accepted = accepted_encodings(headers.get("accept-encoding", ""))
+        name: str
+        for name, suffix in ENCODINGS:
+            if name in accepted and os.path.isfile(filename + suffix):
+                served, encoding = filename + suffix, name
+                break
+        stat = os.stat(served)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        response_headers += [
+            ("ETag", etag),
+            ("Last-Modified", formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        if encoding:
+            response_headers.append(("Content-Encoding", encoding))
+
+        if self.__not_modified(headers, etag, stat.st_mtime):
+            return StaticResponse(304, response_headers)
+
+        size = stat.st_size
+        byte_range = headers.get("range")
+        if byte_range and encoding is None:
+            response_headers.append(("Accept-Ranges", "bytes"))
+            parsed = self.__parse_range(byte_range, size)
+            if parsed is None:
+                response_headers.append(("Content-Range", f"bytes */{size}"))
+                return StaticResponse(416, response_headers)
+            start, end = parsed
+            response_headers += [
+                ("Content-Range", f"bytes {start}-{end}/{size}"),
+                ("Content-Length", str(end - start + 1)),
+            ]
+            return StaticResponse(
+                206,
+                response_headers,
+                served if method == "GET" else None,
+                start,
+                end - start + 1,
+            )
+
+        if encoding is None:
+            response_headers.append(("Accept-Ranges", "bytes"))
+        response_headers.append(("Content-Length", str(size)))
+        return StaticResponse(
+            200,
+            response_headers,
+            served if method == "GET" else None,
+            0,
+            size,
+        )
+
+    @staticmethod
+    def __not_modified(headers: dict[str, str], etag: str, mtime: float) -> bool:
+        """Evaluate If-None-Match, then If-Modified-Since."""
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    @staticmethod
+    def __parse_range(value: str, size: int) -> Optional[tuple[int, int]]:
+        """First and last byte of a single ``bytes=`` range."""
+
+        match = RANGE_RE.match(value.strip())
+        if match is None or size == 0:
+            return None
+        first, last = match.groups()
+        if not first:
+            if not last:
+                return None
+            start = max(size - int(last), 0)
+            return start, size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start > end:
+            return None
+        return start, end
+
+
+class StaticWSGIHandler:
+    """
+    WSGI wrapper serving static and media files ahead of Django.
+    """
+
+    def __init__(
+        self,
+        application: Callable[..., Any],
+        resolver: Optional[StaticResolver] = None,
+    ) -> None:
+        self.application = application
+        self.resolver = resolver or StaticResolver.from_settings()
+
+    def __call__(
+        self,
+        environ: dict[str, Any],
+        start_response: Callable[..., Any],
+    ) -> Iterable[bytes]:
+        path = environ.get("PATH_INFO", "")
+        filename = self.resolver.match(path)
+        if filename is None:
+            return self.application(environ, start_response)
+
+        headers = {
+            key[5:].replace("_", "-").lower(): value
+            for key, value in environ.items()
+            if key.startswith("HTTP_")
+        }
+        response = self.resolver.respond(
+            environ["REQUEST_METHOD"],
+            filename,
+            headers,
+            self.resolver.is_immutable(path),
+        )
+        start_response(
+            f"{response.status} {StaticResolver.REASONS[response.status]}",
+            response.headers,
+        )
+        if response.path is None:
+            return []
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if file_wrapper is not None and response.status == 200:
+            return file_wrapper(open(response.path, "rb"), CHUNK_SIZE)
+        return response.iter_file()
+
+
+class StaticASGIHandler:
+    """
+    ASGI wrapper serving static and media files ahead of Django.
+
+    Every filesystem call (the lookup, ``stat`` and each chunk read) runs in
+    a worker thread so a slow disk never stalls the event loop.
+    """
+
+    def __init__(
+        self,
+        application: Callable[..., Any],
+        resolver: Optional[StaticResolver] = None,
+    ) -> None:
+        self.application = application
+        self.resolver = resolver or StaticResolver.from_settings()
+
+    async def __call__(
+        self,
+        scope: dict[str, Any],
+        receive: Callable[..., Any],
+        send: Callable[..., Any],
+    ) -> None:
+        filename = None
+        if scope["type"] == "http":
+            filename = await sync_to_async(
+                self.resolver.match,
+                thread_sensitive=False,
+            )(scope["path"])
+        if filename is None:
+            await self.application(scope, receive, send)
+            return
+
+        headers = {
+            key.decode("latin-1").lower(): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        response = await sync_to_async(
+            self.resolver.respond,
+            thread_sensitive=False,
+        )(
+            scope["method"],
+            filename,
+            headers,
+            self.resolver.is_immutable(scope["path"]),
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status,
+                "headers": [
+                    (key.lower().encode("latin-1"), value.encode("latin-1"))
+                    for key, value in response.headers
+                ],
+            }
+        )
+        chunks = response.iter_file()
+        read = sync_to_async(next, thread_sensitive=False)
+        try:
+            while (chunk := await read(chunks, None)) is not None:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        finally:
+            await sync_to_async(chunks.close, thread_sensitive=False)()
+        await send({"type": "http.response.body", "body": b""})
+
+
+def serve(request: HttpRequest, resolver: StaticResolver) -> HttpResponse:
+    """Answer a Django request from ``resolver``, 404 when nothing matches."""
+
+    filename = resolver.match(request.path_info)
+    if filename is None:
+        raise Http404
+    headers = {key.lower(): value for key, value in request.headers.items()}
+    response = resolver.respond(
+        request.method,
+        filename,
+        headers,
+        resolver.is_immutable(request.path_info),
+    )
+    if response.path is None:
+        django_response = HttpResponse(status=response.status)
+    else:
+        django_response = StreamingHttpResponse(
+            response.iter_file(),
+            status=response.status,
+        )
+    for key, value in response.headers:
+        django_response[key] = value
+    return django_response
+
+
+def wrap_wsgi(application: Callable[..., Any]) -> Callable[..., Any]:
+    """Add the static handler when ``SERVE_STATIC`` is enabled."""
+
+    if getattr(settings, "SERVE_STATIC", False):
+        return StaticWSGIHandler(application)
+    return application
+
+
+def wrap_asgi(application: Callable[..., Any]) -> Callable[..., Any]:
+    """Add the static handler when ``SERVE_STATIC`` is enabled."""
+
+    if getattr(settings, "SERVE_STATIC", False):
+        return StaticASGIHandler(application)
+    return application
@@ -0,0 +1,81 @@
+# Python modules
+import gzip
+from typing import Any, Iterator, Optional
+
+# Django modules
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".css",
+    ".js",
+    ".mjs",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".html",
+    ".ico",
+    ".ttf",
+    ".otf",
+    ".eot",
+)
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage which also writes ``.gz`` and, when brotli is
+    installed, ``.br`` siblings of every hashed text asset at
+    ``collectstatic`` time, so the static handler never compresses on the
+    fly.
+    """
+
+    def post_process(
+        self,
+        paths: dict[str, Any],
+        dry_run: bool = False,
+        **options: Any,
+    ) -> Iterator[tuple[str, Optional[str], Any]]:
+        """Compress the hashed files produced by the manifest storage."""
+
+        hashed_names: list[str] = []
+        for name, hashed_name, processed in super().post_process(
+            paths,
+            dry_run,
+            **options,
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        name: str
+        for name in hashed_names:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name: str) -> None:
+        """Write the pre-compressed variants of one file."""
+
+        with self.open(name) as source:
+            content = source.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(content)
+        suffix: str
+        for suffix, compressed in variants.items():
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
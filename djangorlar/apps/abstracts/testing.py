@@ -0,0 +1,116 @@
+# Python modules
+import json
+import os
+import re
+from typing import Any, Callable, Iterable
+
+# Django modules
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+UPDATE_SNAPSHOTS_ENV = "DJANGORLAR_UPDATE_QUERY_SNAPSHOTS"
+DEFAULT_SIZES = (1, 10, 100)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w\"])")
+_IN_LIST_RE = re.compile(r"\bIN \((?:\?, )*\?\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so runs with different data compare equal.
+
+    Literals become ``?`` and ``IN`` lists of any length collapse to
+    ``IN (...)``.
+    """
+
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+class QueryCountAssertionMixin:
+    """
+    TestCase mixin that guards endpoints against N+1 regressions.
+
+    ``assertConstantQueries`` runs the request against datasets of each
+    size, fails when the number of queries changes with the size and
+    compares the normalized statements with a JSON snapshot stored next to
+    the tests. Set ``DJANGORLAR_UPDATE_QUERY_SNAPSHOTS=1`` to (re)write the
+    snapshots after an intended change.
+    """
+
+    query_snapshot_dir: str = ""
+
+    def assertConstantQueries(
+        self,
+        name: str,
+        seed: Callable[[int], Any],
+        request: Callable[[Any], Any],
+        sizes: Iterable[int] = DEFAULT_SIZES,
+    ) -> None:
+        """
+        ``seed(size)`` builds the dataset and returns whatever ``request``
+        needs; ``request`` performs the call being measured.
+        """
+
+        counts: dict[int, int] = {}
+        fingerprints: set[str] = set()
+        size: int
+        for size in sizes:
+            with transaction.atomic():
+                fixture = seed(size)
+                with CaptureQueriesContext(connection) as captured:
+                    response = request(fixture)
+                transaction.set_rollback(True)
+            status = getattr(response, "status_code", 200)
+            self.assertLess(status, 400, f"{name} answered with HTTP {status}")
+            counts[size] = len(captured)
+            fingerprints.update(
+                fingerprint(query["sql"]) for query in captured.captured_queries
+            )
+
+        self.assertEqual(
+            len(set(counts.values())),
+            1,
+            f"{name}: query count depends on the dataset size {counts}",
+        )
+        self.__check_snapshot(name, max(counts.values()), sorted(fingerprints))
+
+    def __check_snapshot(
+        self,
+        name: str,
+        count: int,
+        fingerprints: list[str],
+    ) -> None:
+        """Compare against, or write, the stored snapshot."""
+
+        path = os.path.join(self.query_snapshot_dir, f"{name}.json")
+        current = {"queries": count, "fingerprints": fingerprints}
+        if os.environ.get(UPDATE_SNAPSHOTS_ENV):
+            os.makedirs(self.query_snapshot_dir, exist_ok=True)
+            with open(path, "w") as target:
+                json.dump(current, target, indent=2)
+                target.write("\n")
+            return
+
+        if not os.path.exists(path):
+            self.fail(
+                f"{name}: no query snapshot at {path}. "
+                f"Run the tests with {UPDATE_SNAPSHOTS_ENV}=1 to create it."
+            )
+        with open(path) as source:
+            stored = json.load(source)
+        new = sorted(set(fingerprints) - set(stored["fingerprints"]))
+        self.assertFalse(
+            new,
+            f"{name}: new queries not in the snapshot:\n" + "\n".join(new),
+        )
+        self.assertLessEqual(
+            count,
+            stored["queries"],
+            f"{name}: query count grew from {stored['queries']} to {count}",
+        )
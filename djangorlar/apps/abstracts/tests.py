@@ -1,3 +1,557 @@
-from django.test import TestCase
+# Python modules
+import csv
+import gzip
+import io
+import json
+import os
+import subprocess
+import tempfile
+from typing import Any
+from unittest import mock
 
-# Create your tests here.
+# Django modules
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+# Third party modules
+from asgiref.sync import async_to_sync
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+# Project modules
+from apps.taski.models import Project, Task, UserTask
+from . import middleware, startup, throttling
+from .benchmarks import compare, percentile
+from .caching import check_shared_caches
+from .exporters import stream_export
+from .renderers import AvailableRenderersNegotiation, MessagePackRenderer, ORJSONRenderer
+from .static import IMMUTABLE_CACHE_CONTROL, StaticASGIHandler, StaticResolver
+
+
+class ExportTests(TestCase):
+    """
+    Streaming exports through ``exportdata`` and ``/export/<dataset>/``.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Tasks with live and soft deleted assignments."""
+        cls.staff = User.objects.create_user(username="staff", is_staff=True)
+        alice, bob = (
+            User.objects.create_user(username=name) for name in ("alice", "bob")
+        )
+        project = Project.objects.create(name="export", author=cls.staff)
+        cls.tasks = [
+            Task.objects.create(name=f"task {i}", project=project)
+            for i in range(5)
+        ]
+        cls.tasks[0].assignees.add(alice, bob)
+        UserTask.objects.get(task=cls.tasks[0], user=bob).delete()
+
+    def rows(self, chunks: list[bytes]) -> list[list[str]]:
+        """Parsed CSV lines of an export."""
+        return list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+
+    def test_chunks_cover_every_row(self) -> None:
+        """Keyset chunks smaller than the table still export each row once."""
+        rows = self.rows(
+            list(stream_export("tasks", columns=["id", "name"], chunk_size=2))
+        )
+        self.assertEqual(rows[0], ["id", "name"])
+        self.assertEqual(
+            [int(row[0]) for row in rows[1:]],
+            [task.pk for task in self.tasks],
+        )
+
+    def test_soft_deleted_assignees_are_left_out(self) -> None:
+        """Only live assignments make it into the assignees column."""
+        rows = self.rows(
+            list(stream_export("tasks", columns=["id", "project", "assignees"]))
+        )
+        self.assertEqual(rows[1], [str(self.tasks[0].pk), "export", "alice"])
+        self.assertEqual(rows[2][2], "")
+
+    def test_view_is_staff_only(self) -> None:
+        """Anonymous users are sent to the login, staff get the stream."""
+        self.assertEqual(self.client.get("/export/tasks/").status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            "/export/tasks/",
+            {"format": "ndjson", "fields": "id,assignees", "gzip": "1"},
+        )
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn('filename="tasks.ndjson.gz"', response["Content-Disposition"])
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        self.assertEqual(
+            json.loads(lines[0]),
+            {"id": self.tasks[0].pk, "assignees": ["alice"]},
+        )
+        self.assertEqual(len(lines), len(self.tasks))
+        self.assertEqual(
+            self.client.get("/export/tasks/", {"fields": "secret"}).status_code,
+            400,
+        )
+        self.assertEqual(self.client.get("/export/users/").status_code, 400)
+
+    def test_command_writes_file(self) -> None:
+        """``exportdata -o`` writes the same CSV as the stream."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tasks.csv")
+            call_command(
+                "exportdata",
+                "tasks",
+                fields="id,name",
+                output=path,
+                chunk_size=2,
+                stderr=io.StringIO(),
+            )
+            with open(path, "rb") as source:
+                exported = source.read()
+        self.assertEqual(
+            exported,
+            b"".join(stream_export("tasks", columns=["id", "name"])),
+        )
+
+
+@override_settings(
+    MIDDLEWARE=[
+        "apps.abstracts.middleware.QueryInstrumentationMiddleware",
+        *settings.MIDDLEWARE,
+    ],
+)
+class QueryInstrumentationTests(TestCase):
+    """
+    Server-Timing header and the per request log line.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """A user whose inbox is read."""
+        cls.user = User.objects.create_user(username="reader")
+        project = Project.objects.create(name="timed", author=cls.user)
+        Task.objects.create(name="timed", project=project).assignees.add(cls.user)
+
+    def setUp(self) -> None:
+        """Log the user in."""
+        self.client.force_login(self.user)
+
+    def request(self) -> tuple[object, dict]:
+        """Inbox request and the record it logged."""
+        with self.assertLogs("djangorlar.instrumentation", "INFO") as logs:
+            response = self.client.get("/api/taski/inbox/")
+        [record] = logs.records
+        return response, record
+
+    def test_under_thresholds(self) -> None:
+        """Timings go to the header, the record is logged at INFO."""
+        response, record = self.request()
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertEqual(record.levelname, "INFO")
+        logged = json.loads(record.getMessage())
+        self.assertEqual(logged, record.instrumentation)
+        self.assertEqual(
+            (logged["path"], logged["status"], logged["flags"]),
+            ("/api/taski/inbox/", 200, []),
+        )
+        self.assertGreater(logged["queries"], 0)
+        self.assertEqual(logged["response_bytes"], len(response.content))
+
+    @override_settings(
+        QUERY_INSTRUMENTATION_THRESHOLDS={"QUERY_COUNT": 0, "DUPLICATE_QUERIES": 1},
+    )
+    def test_over_thresholds(self) -> None:
+        """Exceeded thresholds are flagged and logged as a warning."""
+        _, record = self.request()
+        logged = json.loads(record.getMessage())
+        self.assertEqual(record.levelname, "WARNING")
+        self.assertEqual(logged["flags"], ["query_count", "duplicate_queries"])
+        self.assertTrue(all(item["count"] >= 1 for item in logged["duplicates"]))
+
+
+class RendererTests(SimpleTestCase):
+    """
+    Opt-in orjson and msgpack renderers.
+    """
+
+    renderers = [ORJSONRenderer(), JSONRenderer(), MessagePackRenderer()]
+
+    def select(self, accept: str) -> Any:
+        """Renderer negotiated for an ``Accept`` header."""
+        request = Request(RequestFactory().get("/", HTTP_ACCEPT=accept))
+        renderer, _ = AvailableRenderersNegotiation().select_renderer(
+            request, self.renderers
+        )
+        return renderer
+
+    def test_plain_json_keeps_drf_renderer(self) -> None:
+        """Only clients naming the encoder get orjson."""
+        self.assertIsInstance(self.select("application/json"), JSONRenderer)
+        self.assertIsInstance(self.select("*/*"), JSONRenderer)
+
+    def test_missing_library_is_not_negotiated(self) -> None:
+        """A renderer without its library answers 406 instead of failing."""
+        with mock.patch.object(MessagePackRenderer, "available", True):
+            self.assertIsInstance(
+                self.select("application/msgpack"), MessagePackRenderer
+            )
+        with mock.patch.object(MessagePackRenderer, "available", False):
+            with self.assertRaises(NotAcceptable):
+                self.select("application/msgpack")
+        with mock.patch.object(ORJSONRenderer, "available", False):
+            self.assertIsInstance(
+                self.select("application/json; encoder=orjson"), JSONRenderer
+            )
+
+    def test_orjson_matches_json(self) -> None:
+        """Both encoders produce the same document."""
+        if not ORJSONRenderer.available:
+            self.skipTest("orjson is not installed")
+        data = {"id": 1, "title": "Comet", "tags": [{"slug": "space"}], "score": None}
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+@override_settings(RESPONSE_COMPRESSION={"MIN_SIZE": 1024})
+class CompressionTests(SimpleTestCase):
+    """
+    On-the-fly gzip and brotli of responses.
+    """
+
+    body = b"Ice and dust " * 200
+
+    def respond(
+        self,
+        content_type: str = "application/json",
+        body: bytes = body,
+        accept: str = "gzip",
+    ) -> HttpResponse:
+        """A response of ``content_type`` through the middleware."""
+        response = HttpResponse(body, content_type=content_type)
+        response["ETag"] = '"v1"'
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept)
+        return middleware.CompressionMiddleware(lambda request: response)(request)
+
+    def test_threshold_and_types(self) -> None:
+        """Small, binary and unaccepted responses are left alone."""
+        response = self.respond()
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["ETag"], 'W/"v1"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertFalse(self.respond(body=b"{}").has_header("Content-Encoding"))
+        self.assertFalse(self.respond("image/png").has_header("Content-Encoding"))
+        self.assertFalse(self.respond(accept="identity").has_header("Content-Encoding"))
+        self.assertFalse(self.respond(accept="gzip;q=0").has_header("Content-Encoding"))
+
+    def test_gzip_is_padded(self) -> None:
+        """gzip output carries the random padding against BREACH."""
+        response = self.respond("text/html; charset=utf-8")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response.content[3] & gzip.FNAME)
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_brotli_is_kept_to_api_types(self) -> None:
+        """HTML never gets brotli, API payloads do when it is accepted."""
+        fake = mock.Mock()
+        fake.compress.return_value = b"brotli"
+        with mock.patch.object(middleware, "brotli", fake):
+            response = self.respond(accept="br, gzip")
+            self.assertEqual(
+                (response["Content-Encoding"], response.content), ("br", b"brotli")
+            )
+            html = self.respond("text/html; charset=utf-8", accept="br, gzip")
+            self.assertEqual(html["Content-Encoding"], "gzip")
+            html = self.respond("text/html; charset=utf-8", accept="br")
+            self.assertFalse(html.has_header("Content-Encoding"))
+
+
+class StaticTests(SimpleTestCase):
+    """
+    Static and media files served by ``StaticResolver`` and the ASGI wrapper.
+    """
+
+    def setUp(self) -> None:
+        """A mount with a plain, a pre-compressed and a hashed file."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        files = {
+            "app.js": b"x" * 100,
+            "app.js.br": b"brotli",
+            "app.0123456789ab.css": b"body {}",
+            "cafebabe0123456789ab.txt": b"upload",
+        }
+        for name, content in files.items():
+            with open(os.path.join(self.root, name), "wb") as target:
+                target.write(content)
+        self.resolver = StaticResolver(
+            [("/static/", self.root)],
+            [r"^/static/.+\.[0-9a-f]{12}\.\w+$"],
+        )
+
+    def respond(self, path: str, **headers: str) -> Any:
+        """Resolver response for a GET of ``path``."""
+        return self.resolver.respond(
+            "GET",
+            self.resolver.match(path),
+            headers,
+            self.resolver.is_immutable(path),
+        )
+
+    def test_accept_encoding_quality(self) -> None:
+        """A coding refused with ``q=0`` is not served."""
+        response = self.respond("/static/app.js", **{"accept-encoding": "gzip, br"})
+        self.assertIn(("Content-Encoding", "br"), response.headers)
+        response = self.respond(
+            "/static/app.js",
+            **{"accept-encoding": "gzip, br;q=0"},
+        )
+        self.assertNotIn("Content-Encoding", dict(response.headers))
+        self.assertEqual(response.length, 100)
+
+    def test_only_hashed_names_are_immutable(self) -> None:
+        """Manifest names are cached for a year, hex-looking uploads are not."""
+        cache_control = {
+            path: dict(self.respond(path).headers)["Cache-Control"]
+            for path in (
+                "/static/app.0123456789ab.css",
+                "/static/cafebabe0123456789ab.txt",
+                "/static/app.js",
+            )
+        }
+        self.assertEqual(
+            list(cache_control.values()).count(IMMUTABLE_CACHE_CONTROL),
+            1,
+        )
+        self.assertEqual(
+            cache_control["/static/app.0123456789ab.css"],
+            IMMUTABLE_CACHE_CONTROL,
+        )
+
+    def test_range_and_validators(self) -> None:
+        """Single byte ranges and ETag revalidation."""
+        response = self.respond("/static/app.js", range="bytes=10-19")
+        self.assertEqual(response.status, 206)
+        self.assertEqual((response.offset, response.length), (10, 10))
+        etag = dict(response.headers)["ETag"]
+        self.assertEqual(
+            self.respond("/static/app.js", **{"if-none-match": etag}).status,
+            304,
+        )
+        self.assertEqual(
+            self.respond("/static/app.js", range="bytes=500-").status,
+            416,
+        )
+
+    def test_asgi_handler(self) -> None:
+        """Files are streamed, other paths go to the application."""
+        forwarded = []
+
+        async def application(scope: dict, receive: Any, send: Any) -> None:
+            forwarded.append(scope["path"])
+
+        handler = StaticASGIHandler(application, self.resolver)
+        messages: list[dict] = []
+
+        async def send(message: dict) -> None:
+            messages.append(message)
+
+        def request(path: str) -> None:
+            async_to_sync(handler)(
+                {
+                    "type": "http",
+                    "method": "GET",
+                    "path": path,
+                    "headers": [(b"accept-encoding", b"identity")],
+                },
+                None,
+                send,
+            )
+
+        request("/static/app.js")
+        request("/api/news/articles/")
+        self.assertEqual(forwarded, ["/api/news/articles/"])
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertEqual(
+            b"".join(message.get("body", b"") for message in messages[1:]),
+            b"x" * 100,
+        )
+        self.assertFalse(messages[-1].get("more_body", False))
+
+
+@override_settings(THROTTLE_RATES={"test": ("60/min", 3)}, THROTTLE_ENABLED=True)
+class ThrottleTests(SimpleTestCase):
+    """
+    GCRA token buckets of ``TokenBucketThrottle``.
+    """
+
+    class View:
+        """A view whose only action is throttled under ``test``."""
+
+        action = "create"
+        throttle_scopes = {"create": "test"}
+
+    def setUp(self) -> None:
+        """Empty buckets and a clock under the test's control."""
+        cache.clear()
+        self.now = 1_000_000.0
+        clock = mock.patch.object(throttling.time, "time", lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def allow(self, ip: str = "10.0.0.1", **headers: str) -> tuple[bool, Any]:
+        """Whether one more request from ``ip`` passes, and its wait."""
+        request = RequestFactory().post("/", REMOTE_ADDR=ip, **headers)
+        throttle = throttling.TokenBucketThrottle()
+        return throttle.allow_request(request, self.View()), throttle.wait()
+
+    def test_burst_then_sustained_rate(self) -> None:
+        """Three at once, then one a second; an idle bucket refills."""
+        self.assertEqual([self.allow()[0] for _ in range(3)], [True] * 3)
+        self.assertEqual(self.allow(), (False, 1.0))
+        self.now += 0.5
+        self.assertEqual(self.allow(), (False, 0.5))
+        self.now += 0.5
+        self.assertTrue(self.allow()[0])
+        self.assertFalse(self.allow()[0])
+        self.now += 60
+        self.assertEqual([self.allow()[0] for _ in range(4)], [True] * 3 + [False])
+
+    def test_forwarded_for_is_ignored_without_proxies(self) -> None:
+        """A client can't get fresh buckets by making up X-Forwarded-For."""
+        for index in range(3):
+            self.assertTrue(self.allow(HTTP_X_FORWARDED_FOR=f"192.0.2.{index}")[0])
+        self.assertFalse(self.allow(HTTP_X_FORWARDED_FOR="192.0.2.9")[0])
+        self.assertTrue(self.allow("10.0.0.2")[0])
+
+
+class SharedCacheTests(SimpleTestCase):
+    """
+    Startup refusal of process-local caches.
+    """
+
+    LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    FILES = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": "/tmp"}}
+
+    def test_process_local_cache_is_refused(self) -> None:
+        """LocMem fails the check only when a shared cache is required."""
+        with override_settings(CACHES=self.LOCMEM, REQUIRE_SHARED_CACHE=True):
+            with self.assertRaisesMessage(ImproperlyConfigured, "'default'"):
+                check_shared_caches()
+        with override_settings(CACHES=self.LOCMEM, REQUIRE_SHARED_CACHE=False):
+            check_shared_caches()
+        with override_settings(CACHES=self.FILES, REQUIRE_SHARED_CACHE=True):
+            check_shared_caches()
+
+
+class BenchmarkTests(SimpleTestCase):
+    """
+    Percentiles and the comparison against a baseline run.
+    """
+
+    def results(self, **scenarios: tuple[float, int]) -> dict[str, Any]:
+        """Results with ``(median_ms, queries)`` per scenario."""
+        return {
+            "scenarios": {
+                name: {"median_ms": median_ms, "queries": queries}
+                for name, (median_ms, queries) in scenarios.items()
+            }
+        }
+
+    def test_percentile_is_nearest_rank(self) -> None:
+        """Small runs report their slowest timing, never the fastest."""
+        self.assertEqual(percentile([1.0], 0.95), 1.0)
+        self.assertEqual(percentile([1.0, 2.0, 3.0], 0.95), 3.0)
+        timings = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(timings, 0.95), 95.0)
+        self.assertEqual(percentile(timings, 0.5), 50.0)
+        self.assertEqual(percentile(timings, 0.0), 1.0)
+
+    def test_compare_threshold(self) -> None:
+        """Slowdowns past the threshold and extra queries regress."""
+        baseline = self.results(list=(10.0, 2), detail=(10.0, 3), gone=(1.0, 1))
+        results = self.results(list=(11.9, 2), detail=(10.0, 3), new=(50.0, 9))
+        self.assertEqual(compare(results, baseline, 0.2), [])
+
+        results = self.results(list=(12.5, 2), detail=(9.0, 4))
+        self.assertEqual(
+            compare(results, baseline, 0.2),
+            ["list: median 10.0ms -> 12.5ms (x1.25)", "detail: queries 3 -> 4"],
+        )
+        self.assertEqual(
+            compare(results, baseline, 0.3), ["detail: queries 3 -> 4"]
+        )
+        # a zero baseline median does not divide by zero
+        self.assertEqual(
+            len(compare(self.results(list=(0.5, 2)), self.results(list=(0.0, 2)), 0.2)), 1
+        )
+
+
+class StartupTests(SimpleTestCase):
+    """
+    Boot profiling of ``profilestartup`` and the slim boot mode.
+    """
+
+    IMPORTTIME = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     django.utils\n"
+        "import time:       300 |        420 |   django.contrib.admin.options\n"
+        "import time:        80 |        500 | apps.news.models\n"
+        "not an import line\n"
+    )
+
+    def test_parse_importtime(self) -> None:
+        """Lines are parsed with their depth and summed per package."""
+        timings = startup.parse_importtime(self.IMPORTTIME)
+        self.assertEqual(
+            [(timing.module, timing.self_us, timing.depth) for timing in timings],
+            [
+                ("django.utils", 120, 2),
+                ("django.contrib.admin.options", 300, 1),
+                ("apps.news.models", 80, 0),
+            ],
+        )
+        self.assertEqual(
+            startup.by_package(timings),
+            [("django.contrib.admin", 300), ("django.utils", 120), ("apps.news", 80)],
+        )
+        self.assertEqual(
+            [timing.module for timing in startup.slowest(timings, 1, "cumulative_us")],
+            ["apps.news.models"],
+        )
+
+    def test_failed_boot_without_stderr(self) -> None:
+        """A child killed without a word reports its status."""
+        killed = subprocess.CompletedProcess([], -9, stdout="", stderr="")
+        with mock.patch.object(startup.subprocess, "run", return_value=killed):
+            with self.assertRaisesMessage(RuntimeError, "exited with status -9"):
+                startup.measure_boot()
+            with self.assertRaisesMessage(CommandError, "full boot failed"):
+                call_command("profilestartup", stdout=io.StringIO())
+
+    def test_slim_boot_leaves_out_apps(self) -> None:
+        """The slim child never imports the apps it excludes."""
+        def imports_of(app: str, slim: bool) -> list[str]:
+            return [
+                timing.module
+                for timing in boots[slim]
+                if timing.module == app or timing.module.startswith(app + ".")
+            ]
+
+        boots = {
+            slim: startup.measure_boot(slim=slim, importtime=True)["imports"]
+            for slim in (False, True)
+        }
+        self.assertTrue(imports_of("rest_framework", False))
+        for app in settings.SLIM_BOOT_EXCLUDED_APPS:
+            self.assertEqual(imports_of(app, True), [], app)
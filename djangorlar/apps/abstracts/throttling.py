@@ -0,0 +1,116 @@
+# Python modules
+import math
+import time
+from typing import Any, Optional
+
+# Django modules
+from django.conf import settings
+from django.core.cache import caches
+
+# Third party modules
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {
+    "s": 1,
+    "sec": 1,
+    "m": 60,
+    "min": 60,
+    "h": 3600,
+    "hour": 3600,
+    "d": 86400,
+    "day": 86400,
+}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """``"30/min"`` -> (30, 60)."""
+
+    count, period = rate.split("/")
+    return int(count), PERIODS[period]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per user, or per client IP for anonymous requests, kept in
+    a shared cache.
+
+    Views opt in per action through ``throttle_scopes`` (action name ->
+    scope) or by defining ``get_throttle_scope()``. Each scope maps to
+    ``(rate, burst)`` in ``settings.THROTTLE_RATES``, e.g.
+    ``("5/min", 3)``: sustained five requests a minute, bursts of three.
+
+    The bucket is stored as its theoretical arrival time (GCRA), so every
+    request costs a single atomic ``incr`` on the cache in the common case
+    and no read-modify-write race is possible between workers.
+    """
+
+    cache_key_prefix = "throttle"
+
+    def __init__(self) -> None:
+        self.cache = caches[getattr(settings, "THROTTLE_CACHE", "default")]
+        self.wait_seconds: Optional[float] = None
+
+    def get_scope(self, view: Any) -> Optional[str]:
+        """Scope of the current action, ``None`` when not throttled."""
+
+        if hasattr(view, "get_throttle_scope"):
+            return view.get_throttle_scope()
+        return getattr(view, "throttle_scopes", {}).get(getattr(view, "action", None))
+
+    def get_cache_key(self, request: Any, view: Any, scope: str) -> str:
+        """
+        Bucket key: the user when authenticated, the client IP otherwise.
+
+        The IP is ``REMOTE_ADDR`` unless ``REST_FRAMEWORK["NUM_PROXIES"]``
+        says which ``X-Forwarded-For`` entry our own proxies appended.
+        """
+
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            ident = f"user:{user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return f"{self.cache_key_prefix}:{scope}:{ident}"
+
+    def allow_request(self, request: Any, view: Any) -> bool:
+        """Take one token from the bucket or report the wait time."""
+
+        if not getattr(settings, "THROTTLE_ENABLED", True):
+            return True
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            return True
+        scope = self.get_scope(view)
+        if scope is None:
+            return True
+        rate, burst = settings.THROTTLE_RATES[scope]
+        count, period = parse_rate(rate)
+        interval = period * 1000 // count
+        capacity = burst * interval
+        timeout = math.ceil((capacity + interval) / 1000) + 1
+        key = self.get_cache_key(request, view, scope)
+
+        now = int(time.time() * 1000)
+        self.cache.add(key, now, timeout)
+        try:
+            tat = self.cache.incr(key, interval)
+        except ValueError:
+            # The key expired between add() and incr(): the bucket is full.
+            self.cache.set(key, now + interval, timeout)
+            return True
+        if tat < now + interval:
+            # The bucket was idle long enough to refill completely. Concurrent
+            # requests may both catch up here; that only delays the caller,
+            # it never lets extra requests through.
+            tat = self.cache.incr(key, now + interval - tat)
+        if tat - now > capacity:
+            self.cache.decr(key, interval)
+            self.wait_seconds = (tat - now - capacity) / 1000
+            return False
+        self.cache.touch(key, timeout)
+        return True
+
+    def wait(self) -> Optional[float]:
+        """Seconds until the next token, sent back as ``Retry-After``."""
+        return self.wait_seconds
@@ -0,0 +1,14 @@
+# Django modules
+from django.urls import path
+
+# Project modules
+from .views import export_view, profiler_clear, profiler_download, profiler_view
+
+app_name = "abstracts"
+
+urlpatterns = [
+    path("export/<str:dataset>/", export_view, name="export"),
+    path("profiler/", profiler_view, name="profiler"),
+    path("profiler/collapsed/", profiler_download, name="profiler-download"),
+    path("profiler/clear/", profiler_clear, name="profiler-clear"),
+]
@@ -1,3 +1,145 @@
+# Python modules
+from typing import Optional
+
+# Django modules
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
+
+# Project modules
+from .exporters import ExportError, stream_export
+from .profiling import (
+    ProfiledRequest,
+    ProfileStore,
+    flame_rows,
+    make_token,
+    profile_store,
+    profiler_config,
+    render_collapsed,
+    top_frames,
+)
+
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+
+@require_GET
+@staff_member_required
+def export_view(request: WSGIRequest, dataset: str) -> StreamingHttpResponse:
+    """
+    Stream a dataset export.
+
+    Query parameters: ``format`` (csv or ndjson), ``fields`` (comma
+    separated columns) and ``gzip`` (any non-empty value).
+    """
+
+    export_format = request.GET.get("format", "csv")
+    columns = [
+        name for name in request.GET.get("fields", "").split(",") if name
+    ]
+    compress = bool(request.GET.get("gzip"))
+    try:
+        chunks = stream_export(
+            dataset,
+            export_format=export_format,
+            columns=columns,
+            compress=compress,
+        )
+    except ExportError as error:
+        return HttpResponseBadRequest(str(error))
+
+    filename = f"{dataset}.{export_format}" + (".gz" if compress else "")
+    response = StreamingHttpResponse(
+        chunks,
+        content_type=(
+            "application/gzip"
+            if compress
+            else EXPORT_CONTENT_TYPES[export_format]
+        ),
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def selected_profile(request: WSGIRequest, store: ProfileStore) -> Optional[ProfiledRequest]:
+    """The buffered request named by the ``request`` parameter, if any."""
+
+    if not request.GET.get("request"):
+        return None
+    try:
+        selected = store.get(int(request.GET["request"]))
+    except ValueError:
+        selected = None
+    if selected is None:
+        raise Http404("Profiled request not in the buffer.")
+    return selected
+
+
+@require_GET
+@staff_member_required
+def profiler_view(request: WSGIRequest) -> HttpResponse:
+    """
+    Flame graph of the profiled requests buffered by this process.
+
+    ``request`` narrows it to one buffered request. The page also hands
+    out an ``X-Profile`` token for profiling chosen requests.
+    """
+
+    store = profile_store()
+    selected = selected_profile(request, store)
+    samples = selected.samples if selected else store.aggregate()
+    config = profiler_config()
+    return render(
+        request,
+        "abstracts/profiler.html",
+        {
+            "title": "Sampling profiler",
+            "selected": selected,
+            "requests": store.requests(),
+            "total_samples": sum(samples.values()),
+            "rows": flame_rows(samples),
+            "top_frames": top_frames(samples),
+            "token": make_token(request.user.pk),
+            "config": config,
+            "enabled": "apps.abstracts.middleware.SamplingProfilerMiddleware" in settings.MIDDLEWARE,
+        },
+    )
+
+
+@require_GET
+@staff_member_required
+def profiler_download(request: WSGIRequest) -> HttpResponse:
+    """Collapsed stacks of the buffer, or of the ``request`` given."""
+
+    store = profile_store()
+    selected = selected_profile(request, store)
+    samples = store.aggregate()
+    filename = "profile.collapsed"
+    if selected:
+        samples = selected.samples
+        filename = f"profile-{selected.id}.collapsed"
+    response = HttpResponse(render_collapsed(samples), content_type="text/plain; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_POST
+@staff_member_required
+def profiler_clear(request: WSGIRequest) -> HttpResponseRedirect:
+    """Empty the buffer of this process."""
 
-# Create your views here.
+    profile_store().clear()
+    return HttpResponseRedirect(reverse("abstracts:profiler"))
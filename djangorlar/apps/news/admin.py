@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Comment
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ("id", "article", "user", "name", "approved", "created_at")
+    list_filter = ("approved",)
+    list_select_related = ("article", "user")
+    search_fields = ("body", "name", "email")
+    actions = ("approve",)
+
+    @admin.action(description="Approve selected comments")
+    def approve(self, request, queryset):
+        approved = queryset.filter(approved=False).update(approved=True)
+        self.message_user(request, f"Approved {approved} comments.")
@@ -0,0 +1,372 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # "memory" keeps pending comments in this process, "file" spools them to
+    # PATH so a separate `manage.py runcommentworker` process can flush them.
+    "BACKEND": "memory",
+    "PATH": None,
+    "BATCH_SIZE": 200,
+    "FLUSH_INTERVAL": 1.0,
+    "START_WORKER": True,
+}
+# the database is down or locked: the batch is retried, not dead-lettered
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "COMMENT_QUEUE", {})}
+
+
+class MemoryCommentQueue:
+    """Pending comments in a deque of this process.
+
+    Comments already answered with 202 Accepted are lost if the process
+    exits before they are flushed. Only this process sees them, so pending
+    lookups and the depth differ from worker to worker, and
+    ``runcommentworker`` has nothing to flush. Use the file backend when
+    that matters.
+    """
+
+    def __init__(self, dead_letters=1000):
+        self._items = deque()
+        self._inflight = {}
+        self._dead = deque(maxlen=dead_letters)
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        with self._lock:
+            self._items.append(item)
+
+    def take(self, limit):
+        """Pop a batch; it stays visible as in flight until ``done``, ``requeue`` or ``dead``."""
+        with self._lock:
+            items = [self._items.popleft() for _ in range(min(limit, len(self._items)))]
+            self._inflight.update((item["pending_id"], item) for item in items)
+            return items
+
+    def done(self, items):
+        with self._lock:
+            for item in items:
+                self._inflight.pop(item["pending_id"], None)
+
+    def requeue(self, items):
+        with self._lock:
+            for item in items:
+                self._inflight.pop(item["pending_id"], None)
+            self._items.extendleft(reversed(items))
+
+    def dead(self, items, reason):
+        """Set aside items that can never be written; only the latest are kept."""
+        with self._lock:
+            for item in items:
+                self._inflight.pop(item["pending_id"], None)
+                self._dead.append({**item, "reason": reason})
+
+    def recover(self):
+        self.requeue(list(self._inflight.values()))
+
+    def depth(self):
+        return len(self._items)
+
+    def dead_count(self):
+        return len(self._dead)
+
+    def contains(self, pending_id):
+        with self._lock:
+            return pending_id in self._inflight or any(item["pending_id"] == pending_id for item in self._items)
+
+
+class FileCommentQueue:
+    """NDJSON spool shared by every process on the host, guarded by flock.
+
+    Producers only ever append. The worker reads from a byte offset kept in
+    an ``.offset`` sibling, so taking a batch costs the batch and not the
+    backlog; the spool is truncated once it has been read to the end.
+    Batches taken by a worker are copied to an ``.inflight`` sibling until
+    they are written, so they can be replayed if the worker dies mid-batch,
+    and items that can never be written are appended to a ``.dead`` sibling.
+    Requeued items go back to the end of the spool.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset_path = path + ".offset"
+        self.inflight_path = path + ".inflight"
+        self.dead_path = path + ".dead"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _locked(self):
+        handle = open(self.path, "ab+")
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    @staticmethod
+    def _line(item):
+        return json.dumps(item).encode() + b"\n"
+
+    @staticmethod
+    def _read(handle):
+        handle.seek(0)
+        return [json.loads(line) for line in handle if line.strip()]
+
+    def _offset(self):
+        try:
+            with open(self.offset_path) as handle:
+                return int(handle.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _set_offset(self, offset):
+        with open(self.offset_path, "w") as handle:
+            handle.write(str(offset))
+
+    def _unread(self, handle):
+        handle.seek(self._offset())
+        return [json.loads(line) for line in handle if line.strip()]
+
+    def put(self, item):
+        with self._locked() as handle:
+            handle.write(self._line(item))
+
+    def take(self, limit):
+        with self._locked() as handle:
+            handle.seek(self._offset())
+            items, broken = [], []
+            while len(items) < limit:
+                line = handle.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    broken.append(line)
+            offset = handle.tell()
+            with open(self.inflight_path, "ab") as inflight:
+                inflight.writelines(self._line(item) for item in items)
+            if broken:
+                logger.warning("Moved %d unreadable lines of %s to %s", len(broken), self.path, self.dead_path)
+                with open(self.dead_path, "ab") as dead:
+                    dead.writelines(broken)
+            if offset >= handle.seek(0, os.SEEK_END):
+                # a crash between these two lines replays the read part,
+                # which the unique ingest_id turns into no-ops
+                self._set_offset(0)
+                handle.truncate(0)
+            else:
+                self._set_offset(offset)
+        return items
+
+    def _forget(self, items):
+        """Drop ``items`` from the in-flight file; the caller holds the lock."""
+        ids = {item["pending_id"] for item in items}
+        with open(self.inflight_path, "ab+") as inflight:
+            kept = [item for item in self._read(inflight) if item["pending_id"] not in ids]
+            inflight.truncate(0)
+            inflight.writelines(self._line(item) for item in kept)
+
+    def done(self, items):
+        with self._locked():
+            self._forget(items)
+
+    def requeue(self, items):
+        with self._locked() as handle:
+            self._forget(items)
+            handle.writelines(self._line(item) for item in items)
+
+    def dead(self, items, reason):
+        with self._locked(), open(self.dead_path, "ab") as dead:
+            self._forget(items)
+            dead.writelines(self._line({**item, "reason": reason}) for item in items)
+
+    def recover(self):
+        with self._locked() as handle, open(self.inflight_path, "ab+") as inflight:
+            handle.writelines(self._line(item) for item in self._read(inflight))
+            inflight.truncate(0)
+
+    def depth(self):
+        with self._locked() as handle:
+            handle.seek(self._offset())
+            return sum(1 for line in handle if line.strip())
+
+    def dead_count(self):
+        try:
+            with open(self.dead_path, "rb") as dead:
+                return sum(1 for line in dead if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def contains(self, pending_id):
+        with self._locked() as handle, open(self.inflight_path, "ab+") as inflight:
+            return any(item["pending_id"] == pending_id for item in self._unread(handle) + self._read(inflight))
+
+
+_queue = None
+_worker = None
+_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _lock:
+        if _queue is None:
+            config = get_config()
+            if config["BACKEND"] == "file":
+                path = config["PATH"] or os.path.join(settings.BASE_DIR, "var", "comment-queue.ndjson")
+                _queue = FileCommentQueue(path)
+            else:
+                _queue = MemoryCommentQueue()
+        return _queue
+
+
+def enqueue(validated_data):
+    """Queue an already validated comment and return its pending id."""
+    pending_id = uuid.uuid4().hex
+    user = validated_data.get("user")
+    get_queue().put(
+        {
+            "pending_id": pending_id,
+            "article_id": validated_data["article"].pk,
+            "user_id": user.pk if user else None,
+            "name": validated_data.get("name", ""),
+            "email": validated_data.get("email", ""),
+            "body": validated_data["body"],
+            "queued_at": time.time(),
+        }
+    )
+    if get_config()["START_WORKER"]:
+        ensure_worker()
+    return pending_id
+
+
+def _comment(item):
+    from .models import Comment
+
+    return Comment(
+        ingest_id=uuid.UUID(item["pending_id"]),
+        article_id=item["article_id"],
+        user_id=item["user_id"],
+        name=item["name"],
+        email=item["email"],
+        body=item["body"],
+    )
+
+
+def _insert(items):
+    from .models import Comment
+
+    # ingest_id is unique, so a batch retried after a crash is not duplicated
+    with transaction.atomic():
+        Comment.objects.bulk_create([_comment(item) for item in items], ignore_conflicts=True)
+
+
+def _dead_letter(queue, items, reason):
+    for item in items:
+        logger.warning("Dropped queued comment %s: %s", item.get("pending_id"), reason)
+    queue.dead(items, reason)
+
+
+def _drop_orphans(queue, items):
+    """Dead-letter the comments whose article or user was deleted while queued."""
+    from .models import Article
+
+    def ids(field):
+        return {item.get(field) for item in items if isinstance(item.get(field), int)}
+
+    articles = set(Article.objects.filter(pk__in=ids("article_id")).values_list("pk", flat=True))
+    users = set(get_user_model().objects.filter(pk__in=ids("user_id")).values_list("pk", flat=True))
+    users.add(None)
+    kept, orphans = [], []
+    for item in items:
+        if item.get("article_id") in articles and item.get("user_id") in users:
+            kept.append(item)
+        else:
+            orphans.append(item)
+    if orphans:
+        _dead_letter(queue, orphans, "article or user no longer exists")
+    return kept
+
+
+def flush(limit=None):
+    """Write up to ``limit`` queued comments with a single bulk insert.
+
+    Comments that can never be written, because their article or user is
+    gone or the database rejects them, are moved to the dead letters
+    instead of being retried; a rejected batch is written item by item to
+    find them. Only when the database itself is unavailable does the batch
+    go back to the queue. Returns the number of comments taken.
+    """
+    queue = get_queue()
+    items = queue.take(limit or get_config()["BATCH_SIZE"])
+    if not items:
+        return 0
+    remaining = items
+    try:
+        remaining = _drop_orphans(queue, remaining)
+        try:
+            _insert(remaining)
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception:
+            logger.warning("Comment batch rejected, writing its %d comments one by one", len(remaining))
+            while remaining:
+                try:
+                    _insert(remaining[:1])
+                except TRANSIENT_ERRORS:
+                    raise
+                except Exception as error:
+                    _dead_letter(queue, remaining[:1], f"{type(error).__name__}: {error}")
+                else:
+                    queue.done(remaining[:1])
+                remaining = remaining[1:]
+        else:
+            queue.done(remaining)
+            remaining = []
+    except Exception:
+        queue.requeue(remaining)
+        raise
+    return len(items)
+
+
+def run_worker(stop_event=None):
+    """Flush batches until ``stop_event`` is set; sleeps while the queue is empty."""
+    config = get_config()
+    # batches a previous worker took but never finished
+    get_queue().recover()
+    while stop_event is None or not stop_event.is_set():
+        try:
+            flushed = flush(config["BATCH_SIZE"])
+        except Exception:
+            logger.exception("Database unavailable, comment batch will be retried")
+            flushed = 0
+        finally:
+            close_old_connections()
+        if flushed < config["BATCH_SIZE"]:
+            time.sleep(config["FLUSH_INTERVAL"])
+
+
+def ensure_worker():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, name="comment-queue", daemon=True)
+            _worker.start()
+
+
+def stats():
+    queue = get_queue()
+    return {"backend": get_config()["BACKEND"], "depth": queue.depth(), "dead": queue.dead_count()}
@@ -0,0 +1,166 @@
+import re
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import lookup_cache, page_cache
+from .images import RENDITION_FORMATS
+
+WORD_RE = re.compile(r"\w+")
+BATCH_SIZE = 500
+
+
+class RelativeURLs:
+    """Stands in for the request while rendering, so payloads hold paths.
+
+    ``absolutize`` turns them into absolute URLs for the request being served.
+    """
+
+    versioning_scheme = None
+    GET = {}
+
+    def build_absolute_uri(self, location):
+        return location
+
+
+def tokens(text):
+    return WORD_RE.findall(text.lower())
+
+
+def search_text(article):
+    """Distinct lowercase words of the article, space separated and padded.
+
+    ``" word"`` then matches every word starting with ``word``.
+    """
+    parts = [article.title, article.summary, article.content]
+    category = lookup_cache.category_by_id(article.category_id)
+    if category is not None:
+        parts.append(category.name)
+    parts.extend(tag.name for tag in lookup_cache.tags_by_ids(article.tag_ids))
+    words = sorted(set(tokens(" ".join(parts))))
+    return f" {' '.join(words)} " if words else ""
+
+
+def build(article):
+    """Unsaved document for an article that went through ``attach_tag_ids``."""
+    from .models import ArticleDocument
+    from .serializers import ArticleListSerializer
+
+    category = lookup_cache.category_by_id(article.category_id)
+    tags = lookup_cache.tags_by_ids(article.tag_ids)
+    return ArticleDocument(
+        article_id=article.pk,
+        publish_at=article.publish_at,
+        author_id=article.author_id,
+        created_at=article.created_at,
+        is_featured=article.is_featured,
+        category_slug=category.slug if category else "",
+        tag_slugs=f"|{'|'.join(tag.slug for tag in tags)}|" if tags else "",
+        search_text=search_text(article),
+        payload=ArticleListSerializer(article, context={"request": RelativeURLs()}).data,
+    )
+
+
+def refresh(article_ids):
+    """Re-render the documents of ``article_ids``; unpublished ones are dropped."""
+    from . import feeds
+    from .models import Article, ArticleDocument
+
+    article_ids = list(article_ids)
+    for start in range(0, len(article_ids), BATCH_SIZE):
+        batch = article_ids[start:start + BATCH_SIZE]
+        previous = list(ArticleDocument.objects.filter(article_id__in=batch).values_list("category_slug", "tag_slugs"))
+        articles = lookup_cache.attach_tag_ids(Article.objects.filter(pk__in=batch, published=True).select_related("author"))
+        documents = [build(article) for article in articles]
+        with transaction.atomic():
+            ArticleDocument.objects.filter(article_id__in=batch).exclude(
+                article_id__in=[document.article_id for document in documents]
+            ).delete()
+            ArticleDocument.objects.bulk_create(
+                documents,
+                update_conflicts=True,
+                unique_fields=["article"],
+                update_fields=[
+                    "publish_at",
+                    "author_id",
+                    "created_at",
+                    "is_featured",
+                    "category_slug",
+                    "tag_slugs",
+                    "search_text",
+                    "payload",
+                ],
+            )
+        # feeds listing the articles before or after the change
+        feeds.schedule(
+            categories={category for category, _ in previous} | {document.category_slug for document in documents},
+            tags={
+                slug
+                for tag_slugs in [tag_slugs for _, tag_slugs in previous] + [document.tag_slugs for document in documents]
+                for slug in tag_slugs.split("|")
+                if slug
+            },
+            article_ids=batch,
+        )
+    if article_ids:
+        page_cache.invalidate()
+
+
+def rebuild_all():
+    """Render every published article and drop documents of the rest."""
+    from .models import Article, ArticleDocument
+
+    ArticleDocument.objects.exclude(article__published=True).delete()
+    article_ids = list(Article.objects.filter(published=True).values_list("id", flat=True))
+    refresh(article_ids)
+    return len(article_ids)
+
+
+def visible():
+    from .models import ArticleDocument
+
+    return ArticleDocument.objects.filter(publish_at__lte=timezone.now())
+
+
+def search(queryset, search_terms):
+    """Every word of every term must start a word of the document."""
+    for term in search_terms:
+        for word in tokens(term):
+            queryset = queryset.filter(search_text__contains=f" {word}")
+    return queryset
+
+
+def compact(payload):
+    """A stored payload without the derivable URLs, see CompactFieldsMixin."""
+    payload = {key: value for key, value in payload.items() if key != "url"}
+    if payload.get("category"):
+        payload["category"] = {key: value for key, value in payload["category"].items() if key != "url"}
+    payload["tags"] = [{key: value for key, value in tag.items() if key != "url"} for tag in payload["tags"]]
+    return payload
+
+
+def absolutize(payload, request):
+    """Make the stored paths of a rendered payload absolute for ``request``.
+
+    With ``?compact=1`` the derivable URLs are dropped instead.
+    """
+    # DRF stays out of slim boots, which import this module through the signals
+    from apps.abstracts.serializers import is_compact
+
+    if is_compact(request):
+        payload = compact(payload)
+    else:
+        payload = dict(payload)
+        payload["url"] = request.build_absolute_uri(payload["url"])
+        if payload.get("category"):
+            payload["category"] = {**payload["category"], "url": request.build_absolute_uri(payload["category"]["url"])}
+        payload["tags"] = [{**tag, "url": request.build_absolute_uri(tag["url"])} for tag in payload["tags"]]
+    if payload.get("hero_image"):
+        payload["hero_image"] = {
+            size: {
+                key: request.build_absolute_uri(value) if key in RENDITION_FORMATS else value
+                for key, value in entry.items()
+            }
+            for size, entry in payload["hero_image"].items()
+        }
+    return payload
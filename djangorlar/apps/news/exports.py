@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+
+from apps.abstracts.exporters import ExportSpec, ManyColumn, RelatedColumn
+from .models import Article, Category
+
+User = get_user_model()
+
+
+ARTICLE_EXPORT = ExportSpec(
+    queryset=lambda: Article.objects.all(),
+    columns={
+        "id": "id",
+        "title": "title",
+        "slug": "slug",
+        "summary": "summary",
+        "content": "content",
+        "author": RelatedColumn("author_id", User, "username"),
+        "category": RelatedColumn("category_id", Category, "slug"),
+        "tags": ManyColumn(Article.tags.through, "article_id", "tag__slug"),
+        "published": "published",
+        "publish_at": "publish_at",
+        "is_featured": "is_featured",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    },
+)
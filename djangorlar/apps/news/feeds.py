@@ -0,0 +1,359 @@
+import gzip
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import ExpressionWrapper, F, IntegerField, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+from . import lookup_cache
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+# build date of a feed without items, fixed so that it renders the same bytes
+EMPTY_FEED_DATE = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class StableDateMixin:
+    """Date the feed by its newest item, not by the time it was rendered."""
+
+    def latest_post_date(self):
+        if not self.items:
+            return EMPTY_FEED_DATE
+        return super().latest_post_date()
+
+
+class RssFeed(StableDateMixin, Rss201rev2Feed):
+    pass
+
+
+class AtomFeed(StableDateMixin, Atom1Feed):
+    pass
+
+
+FEED_FORMATS = {"rss": RssFeed, "atom": AtomFeed}
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = {"site": False, "category": set(), "tag": set(), "page": set()}
+
+
+def root():
+    return settings.NEWS_FEEDS_ROOT
+
+
+def sitemaps_root():
+    return settings.NEWS_SITEMAPS_ROOT
+
+
+def site_url(path):
+    return settings.NEWS_SITE_URL.rstrip("/") + path
+
+
+def feed_url(path):
+    return site_url(settings.NEWS_FEEDS_URL + path)
+
+
+def write_file(relative_path, content, directory=None):
+    """Atomically replace a file (and its .gz sibling) if ``content`` changed.
+
+    Paths are relative to ``directory``, the feeds root by default.
+    Unchanged files keep their mtime, and with it the ETag and Last-Modified
+    validators, so crawlers keep getting 304s.
+    """
+    path = os.path.join(directory or root(), relative_path)
+    try:
+        with open(path, "rb") as current:
+            if current.read() == content:
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    for target, data in ((path, content), (path + ".gz", gzip.compress(content, mtime=0))):
+        temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(data)
+        os.replace(temporary, target)
+    return True
+
+
+def remove_file(relative_path, directory=None):
+    for suffix in ("", ".gz"):
+        try:
+            os.remove(os.path.join(directory or root(), relative_path + suffix))
+        except FileNotFoundError:
+            pass
+
+
+# ----------------------------------------------
+# Feeds
+#
+def feed_documents(category=None, tag=None):
+    """Latest published documents for a feed, newest first, one query."""
+    from .documents import visible
+
+    queryset = visible()
+    if category is not None:
+        queryset = queryset.filter(category_slug=category)
+    if tag is not None:
+        queryset = queryset.filter(tag_slugs__contains=f"|{tag}|")
+    return list(queryset.values_list("payload", flat=True)[: settings.NEWS_FEED_ITEMS])
+
+
+def render_feed(feed_class, title, link, path, payloads):
+    feed = feed_class(
+        title=title,
+        link=link,
+        description=title,
+        language=settings.LANGUAGE_CODE,
+        feed_url=feed_url(path),
+    )
+    for payload in payloads:
+        author = payload.get("author") or {}
+        feed.add_item(
+            title=payload["title"],
+            link=site_url(payload["url"]),
+            description=payload["summary"],
+            unique_id=site_url(payload["url"]),
+            pubdate=parse_datetime(payload["publish_at"]),
+            author_name=author.get("get_full_name") or author.get("username"),
+            categories=[tag["name"] for tag in payload["tags"]],
+        )
+    return feed.writeString("utf-8").encode("utf-8")
+
+
+def write_feeds(kind, slug, title, link):
+    """Write the RSS and Atom feed of one category, tag or the whole site."""
+    if kind == "all":
+        payloads = feed_documents()
+    else:
+        payloads = feed_documents(**{kind: slug})
+    for name, feed_class in FEED_FORMATS.items():
+        path = f"{name}/all.xml" if kind == "all" else f"{name}/{kind}/{slug}.xml"
+        write_file(path, render_feed(feed_class, title, link, path, payloads))
+
+
+def write_site_feeds():
+    write_feeds("all", None, settings.NEWS_SITE_TITLE, site_url("/"))
+
+
+def write_category_feeds(slug):
+    category = lookup_cache.category_by_slug(slug)
+    if category is None:
+        for name in FEED_FORMATS:
+            remove_file(f"{name}/category/{slug}.xml")
+        return
+    write_feeds("category", slug, f"{settings.NEWS_SITE_TITLE}: {category.name}", site_url(category.get_absolute_url()))
+
+
+def write_tag_feeds(slug):
+    tag = lookup_cache.tag_by_slug(slug)
+    if tag is None:
+        for name in FEED_FORMATS:
+            remove_file(f"{name}/tag/{slug}.xml")
+        return
+    link = site_url(f"/api/news/articles/?tags__slug={slug}")
+    write_feeds("tag", slug, f"{settings.NEWS_SITE_TITLE}: {tag.name}", link)
+
+
+# ----------------------------------------------
+# Sitemaps
+#
+# Page n lists the articles with n * NEWS_SITEMAP_PAGE_SIZE <= id < (n + 1) *
+# NEWS_SITEMAP_PAGE_SIZE, so changing an article rewrites one page and the
+# index, and pages never shift when articles are deleted.
+#
+# A sitemap may only list URLs at or below its own path, so the index, its
+# pages and the robots.txt pointing at the index live in NEWS_SITEMAPS_ROOT,
+# which is served at the root of the site.
+#
+def sitemap_page(article_id):
+    return article_id // settings.NEWS_SITEMAP_PAGE_SIZE
+
+
+def sitemap_page_path(page):
+    return f"sitemap-articles-{page}.xml"
+
+
+def _lastmod(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def write_sitemap_page(page):
+    from .models import Article
+
+    size = settings.NEWS_SITEMAP_PAGE_SIZE
+    rows = (
+        Article.objects.published()
+        .filter(pk__gte=page * size, pk__lt=(page + 1) * size)
+        .order_by("pk")
+        .values_list("slug", "updated_at")
+    )
+    entries = []
+    for slug, updated_at in rows.iterator(chunk_size=2000):
+        location = site_url(Article(slug=slug).get_absolute_url())
+        entries.append(f"<url><loc>{escape(location)}</loc><lastmod>{_lastmod(updated_at)}</lastmod></url>")
+    path = sitemap_page_path(page)
+    if not entries:
+        remove_file(path, sitemaps_root())
+        return
+    content = (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+        + "\n".join(entries)
+        + "\n</urlset>\n"
+    )
+    write_file(path, content.encode("utf-8"), sitemaps_root())
+
+
+def sitemap_pages():
+    """{page: last modification} of every non-empty page, one aggregate query."""
+    from .models import Article
+
+    page = ExpressionWrapper(F("pk") / settings.NEWS_SITEMAP_PAGE_SIZE, output_field=IntegerField())
+    rows = (
+        Article.objects.published()
+        .annotate(page=page)
+        .order_by()
+        .values("page")
+        .annotate(lastmod=Max("updated_at"))
+        .values_list("page", "lastmod")
+    )
+    return dict(rows)
+
+
+def write_sitemap_index(pages=None):
+    pages = sitemap_pages() if pages is None else pages
+    entries = [
+        f"<sitemap><loc>{escape(site_url('/' + sitemap_page_path(page)))}</loc>"
+        f"<lastmod>{_lastmod(lastmod)}</lastmod></sitemap>"
+        for page, lastmod in sorted(pages.items())
+    ]
+    content = (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+        + "\n".join(entries)
+        + "\n</sitemapindex>\n"
+    )
+    write_file("sitemap.xml", content.encode("utf-8"), sitemaps_root())
+    write_file("robots.txt", f"Sitemap: {site_url('/sitemap.xml')}\n".encode("utf-8"), sitemaps_root())
+
+
+# ----------------------------------------------
+# Regeneration
+#
+def rebuild_all():
+    """Write every feed and sitemap page and remove the ones that are gone."""
+    written = set()
+    write_site_feeds()
+    for category in lookup_cache.categories():
+        write_category_feeds(category.slug)
+        written.update(f"{name}/category/{category.slug}.xml" for name in FEED_FORMATS)
+    for tag in lookup_cache.tags():
+        write_tag_feeds(tag.slug)
+        written.update(f"{name}/tag/{tag.slug}.xml" for name in FEED_FORMATS)
+    pages = sitemap_pages()
+    for page in pages:
+        write_sitemap_page(page)
+    write_sitemap_index(pages)
+
+    for directory in [f"{name}/{kind}" for name in FEED_FORMATS for kind in ("category", "tag")]:
+        path = os.path.join(root(), directory)
+        if not os.path.isdir(path):
+            continue
+        for filename in os.listdir(path):
+            relative = f"{directory}/{filename}"
+            if filename.endswith(".xml") and relative not in written:
+                remove_file(relative)
+    if os.path.isdir(sitemaps_root()):
+        written_pages = {sitemap_page_path(page) for page in pages}
+        for filename in os.listdir(sitemaps_root()):
+            if filename.startswith("sitemap-articles-") and filename.endswith(".xml") and filename not in written_pages:
+                remove_file(filename, sitemaps_root())
+
+
+def regenerate(site=False, categories=(), tags=(), article_ids=()):
+    """Rewrite only the feeds and sitemap pages the given changes touch."""
+    if site:
+        write_site_feeds()
+    for slug in categories:
+        write_category_feeds(slug)
+    for slug in tags:
+        write_tag_feeds(slug)
+    pages = {sitemap_page(article_id) for article_id in article_ids}
+    for page in sorted(pages):
+        write_sitemap_page(page)
+    if pages:
+        write_sitemap_index()
+
+
+def publish_due(minutes):
+    """Rewrite what articles that went live in the last ``minutes`` touch.
+
+    Saving an article scheduled for later regenerates the feeds while it is
+    still hidden; run this periodically, e.g. ``buildfeeds --due 10`` every
+    five minutes, to list it once its ``publish_at`` has passed.
+    """
+    from .models import ArticleDocument
+
+    now = timezone.now()
+    rows = list(
+        ArticleDocument.objects.filter(publish_at__gt=now - timedelta(minutes=minutes), publish_at__lte=now)
+        .values_list("article_id", "category_slug", "tag_slugs")
+    )
+    if rows:
+        regenerate(
+            site=True,
+            categories={category for _, category, _ in rows} - {""},
+            tags={slug for _, _, tag_slugs in rows for slug in tag_slugs.split("|") if slug},
+            article_ids=[article_id for article_id, _, _ in rows],
+        )
+    return len(rows)
+
+
+def _drain():
+    time.sleep(getattr(settings, "NEWS_FEEDS_DEBOUNCE", 1.0))
+    with _executor_lock:
+        work = {
+            "site": _pending["site"],
+            "categories": sorted(_pending["category"]),
+            "tags": sorted(_pending["tag"]),
+            "article_ids": sorted(_pending["page"]),
+        }
+        _pending["site"] = False
+        for key in ("category", "tag", "page"):
+            _pending[key].clear()
+    try:
+        regenerate(**work)
+    except Exception:
+        logger.exception("Could not regenerate feeds")
+    finally:
+        close_old_connections()
+
+
+def _submit(categories, tags, article_ids):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="news-feeds")
+        idle = not (_pending["site"] or _pending["category"] or _pending["tag"] or _pending["page"])
+        _pending["site"] = True
+        _pending["category"].update(categories)
+        _pending["tag"].update(tags)
+        _pending["page"].update(article_ids)
+        if idle:
+            _executor.submit(_drain)
+
+
+def schedule(categories=(), tags=(), article_ids=()):
+    """Regenerate the affected files off the request thread after commit."""
+    if not getattr(settings, "NEWS_FEEDS_INCREMENTAL", True):
+        return
+    categories, tags, article_ids = set(categories) - {""}, set(tags), set(article_ids)
+    transaction.on_commit(lambda: _submit(categories, tags, article_ids))
@@ -0,0 +1,87 @@
+import django_filters
+
+from . import lookup_cache
+from .models import Article, ArticleDocument, ArticleTag
+
+
+class SlugListFilter(django_filters.BaseCSVFilter, django_filters.CharFilter):
+    """Comma separated slugs, ``?tags__slug=python,django``."""
+
+
+def tag_ids(slugs):
+    """Tag ids of ``slugs``, or ``None`` when one of them does not exist."""
+    tags = [lookup_cache.tag_by_slug(slug) for slug in slugs]
+    if None in tags:
+        return None
+    return [tag.pk for tag in tags]
+
+
+class TagFilterMixin:
+    """Tag filters as semi-joins on the (tag, article) index of the through table.
+
+    ``pk IN (SELECT article_id ... WHERE tag_id = ...)`` never duplicates
+    rows and needs no ``DISTINCT``; slugs are resolved to ids from the lookup
+    cache, so the tag table is not joined. See ``manage.py timetagfilters``
+    for why this form rather than correlated ``EXISTS`` or a ``LIKE`` over
+    ``ArticleDocument.tag_slugs``.
+    """
+
+    def filter_all_tags(self, queryset, name, value):
+        ids = tag_ids(value)
+        if ids is None:
+            return queryset.none()
+        for tag_id in ids:
+            queryset = queryset.filter(pk__in=ArticleTag.objects.filter(tag_id=tag_id).values("article_id"))
+        return queryset
+
+    def filter_any_tag(self, queryset, name, value):
+        tags = [lookup_cache.tag_by_slug(slug) for slug in value]
+        ids = [tag.pk for tag in tags if tag is not None]
+        if not ids:
+            return queryset.none()
+        return queryset.filter(pk__in=ArticleTag.objects.filter(tag_id__in=ids).values("article_id"))
+
+
+class ArticleFilter(TagFilterMixin, django_filters.FilterSet):
+    """Filters for the Article table.
+
+    The category slug is resolved from the lookup cache too, so neither the
+    tag nor the category table is joined.
+    """
+
+    category__slug = django_filters.CharFilter(method="filter_category")
+    tags__slug = SlugListFilter(method="filter_all_tags", help_text="Articles having every tag.")
+    tags__any = SlugListFilter(method="filter_any_tag", help_text="Articles having at least one of the tags.")
+    author__id = django_filters.NumberFilter(field_name="author_id")
+    published = django_filters.BooleanFilter()
+
+    class Meta:
+        model = Article
+        fields = ("category__slug", "tags__slug", "tags__any", "author__id", "published")
+
+    def filter_category(self, queryset, name, value):
+        category = lookup_cache.category_by_slug(value)
+        if category is None:
+            return queryset.none()
+        return queryset.filter(category_id=category.pk)
+
+
+class ArticleDocumentFilter(TagFilterMixin, django_filters.FilterSet):
+    """The same parameters against the denormalized ArticleDocument table.
+
+    Its primary key is the article id, so the tag semi-joins apply as they are.
+    """
+
+    category__slug = django_filters.CharFilter(field_name="category_slug")
+    tags__slug = SlugListFilter(method="filter_all_tags")
+    tags__any = SlugListFilter(method="filter_any_tag")
+    author__id = django_filters.NumberFilter(field_name="author_id")
+    published = django_filters.BooleanFilter(method="filter_published")
+
+    class Meta:
+        model = ArticleDocument
+        fields = ("category__slug", "tags__slug", "tags__any", "author__id", "published")
+
+    def filter_published(self, queryset, name, value):
+        # documents only exist for published articles
+        return queryset if value else queryset.none()
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# name -> (max width, max height); images are scaled down, never up.
+RENDITION_SIZES = {
+    "thumb": (320, 180),
+    "card": (640, 360),
+    "hero": (1280, 720),
+}
+RENDITION_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+RENDITION_DIR = "news/renditions"
+
+_executor = None
+_executor_lock = threading.Lock()
+# (article id, source name) of jobs submitted and not finished yet
+_pending = set()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "HERO_IMAGE_WORKERS", 2),
+                thread_name_prefix="hero-image",
+            )
+        return _executor
+
+
+def _store(data, suffix):
+    """Save under a content-hashed name so the file can be cached forever."""
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    name = f"{RENDITION_DIR}/{digest}.{suffix}"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def render_renditions(source):
+    """Encode every size/format pair of an open image file."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        renditions = {}
+        for size_name, box in RENDITION_SIZES.items():
+            image = original.copy()
+            image.thumbnail(box, Image.LANCZOS)
+            entry = {"width": image.width, "height": image.height}
+            for suffix, (image_format, options) in RENDITION_FORMATS.items():
+                converted = image
+                if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+                    converted = image.convert("RGB")
+                buffer = BytesIO()
+                converted.save(buffer, image_format, **options)
+                entry[suffix] = _store(buffer.getvalue(), suffix)
+            renditions[size_name] = entry
+    return renditions
+
+
+def build_renditions(article_id, source_name, force=False):
+    """Generate renditions for an article unless its image changed meanwhile.
+
+    Renditions already built for ``source_name`` are kept unless ``force``
+    is set. Returns whether new renditions were stored.
+    """
+    from .models import Article
+
+    try:
+        current = Article.objects.filter(pk=article_id).values_list("hero_renditions", flat=True).first()
+        if not force and current is not None and current.get("source") == source_name:
+            # built by an earlier job, possibly in another process
+            return False
+        with default_storage.open(source_name, "rb") as source:
+            renditions = render_renditions(source)
+        updated = Article.objects.filter(pk=article_id, hero_image=source_name).update(
+            hero_renditions={"source": source_name, "sizes": renditions}
+        )
+        if updated:
+            from .documents import refresh
+
+            refresh([article_id])
+        return bool(updated)
+    except Exception:
+        logger.exception("Could not build renditions for article %s", article_id)
+        return False
+
+
+def _build_in_worker(article_id, source_name):
+    try:
+        build_renditions(article_id, source_name)
+    finally:
+        with _executor_lock:
+            _pending.discard((article_id, source_name))
+        # worker threads keep their own connections; don't leak them
+        close_old_connections()
+
+
+def _submit(article_id, source_name):
+    with _executor_lock:
+        if (article_id, source_name) in _pending:
+            return
+        _pending.add((article_id, source_name))
+    get_executor().submit(_build_in_worker, article_id, source_name)
+
+
+def schedule_renditions(article):
+    """Queue rendition generation once the current transaction commits.
+
+    Saves of the article while its job is waiting or running don't queue
+    another one for the same image.
+    """
+    article_id, source_name = article.pk, article.hero_image.name
+    transaction.on_commit(lambda: _submit(article_id, source_name))
+
+
+def rendition_urls(article, request=None):
+    """Public URLs of the article renditions, ``None`` until they are built."""
+    renditions = article.hero_renditions or {}
+    if not article.hero_image or renditions.get("source") != article.hero_image.name:
+        return None
+    urls = {}
+    for size_name, entry in renditions["sizes"].items():
+        urls[size_name] = {"width": entry["width"], "height": entry["height"]}
+        for suffix in RENDITION_FORMATS:
+            url = default_storage.url(entry[suffix])
+            urls[size_name][suffix] = request.build_absolute_uri(url) if request else url
+    return urls
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "news:taxonomy-version"
+
+
+class TaxonomySnapshot:
+    """All categories and tags, indexed by id and slug."""
+
+    def __init__(self, version, categories, tags):
+        self.version = version
+        self.categories = categories
+        self.tags = tags
+        self.categories_by_id = {category.pk: category for category in categories}
+        self.categories_by_slug = {category.slug: category for category in categories}
+        self.tags_by_id = {tag.pk: tag for tag in tags}
+        self.tags_by_slug = {tag.slug: tag for tag in tags}
+
+
+class TaxonomyCache:
+    """In-process copy of the Category and Tag tables.
+
+    Every process keeps its own snapshot and compares it, at most once per
+    ``NEWS_TAXONOMY_CACHE_CHECK_INTERVAL`` seconds, with a version number in
+    the default cache. Saving or deleting a category or tag bumps the version,
+    so all workers reload on their next check. This only works when that
+    cache is shared, which startup enforces (``REQUIRE_SHARED_CACHE``).
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        interval = getattr(settings, "NEWS_TAXONOMY_CACHE_CHECK_INTERVAL", 1.0)
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked_at < interval:
+            return snapshot
+        with self._lock:
+            version = cache.get(VERSION_KEY)
+            if version is None:
+                cache.add(VERSION_KEY, time.time_ns(), None)
+                version = cache.get(VERSION_KEY)
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = self._load(version)
+            self._checked_at = now
+            return self._snapshot
+
+    def _load(self, version):
+        from .models import Category, Tag
+
+        return TaxonomySnapshot(version, list(Category.objects.all()), list(Tag.objects.all()))
+
+    def invalidate(self):
+        """Drop this process' snapshot and make every other process reload."""
+        self._snapshot = None
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+taxonomy = TaxonomyCache()
+
+
+def invalidate():
+    # Bump now for this transaction's own reads and again after commit, so a
+    # worker that reloaded in between does not keep the pre-commit rows.
+    taxonomy.invalidate()
+    transaction.on_commit(taxonomy.invalidate)
+
+
+def categories():
+    return taxonomy.snapshot().categories
+
+
+def tags():
+    return taxonomy.snapshot().tags
+
+
+def category_by_id(pk):
+    return taxonomy.snapshot().categories_by_id.get(pk)
+
+
+def category_by_slug(slug):
+    return taxonomy.snapshot().categories_by_slug.get(slug)
+
+
+def tag_by_slug(slug):
+    return taxonomy.snapshot().tags_by_slug.get(slug)
+
+
+def tags_by_ids(ids):
+    tags_by_id = taxonomy.snapshot().tags_by_id
+    found = [tags_by_id[pk] for pk in ids if pk in tags_by_id]
+    return sorted(found, key=lambda tag: tag.name)
+
+
+def attach_tag_ids(articles):
+    """Set ``article.tag_ids`` from one query on the through table."""
+    from .models import Article
+
+    articles = list(articles)
+    tag_ids = {article.pk: [] for article in articles}
+    rows = Article.tags.through.objects.filter(article_id__in=tag_ids).values_list("article_id", "tag_id")
+    for article_id, tag_id in rows:
+        tag_ids[article_id].append(tag_id)
+    for article in articles:
+        article.tag_ids = tag_ids[article.pk]
+    return articles
@@ -0,0 +1,116 @@
+import gzip
+import time
+from datetime import timedelta
+from statistics import median
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.abstracts.renderers import MessagePackRenderer, ORJSONRenderer
+from apps.news import lookup_cache
+from apps.news.models import Article, ArticleTag, Category, Tag
+from apps.news.serializers import ArticleListSerializer
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+RENDERERS = (
+    ("json", JSONRenderer),
+    ("orjson", ORJSONRenderer),
+    ("msgpack", MessagePackRenderer),
+)
+
+
+def timed(function, repeat):
+    """Median seconds of ``repeat`` calls and the last result."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return median(timings), result
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throw-away test database and compares serializer and encode time "
+        "and bytes per article list page for the JSON, orjson and msgpack renderers, "
+        "in full and compact mode, raw and compressed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--tags-per-article", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(NEWS_RELATED_INCREMENTAL=False, NEWS_FEEDS_INCREMENTAL=False):
+                articles = self.seed(options)
+                self.run(articles, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self, options):
+        author = get_user_model().objects.create_user(username="author", first_name="Ada", last_name="Writer")
+        category = Category.objects.create(name="Technology", slug="technology", description="Tech news")
+        tags = Tag.objects.bulk_create(Tag(name=f"tag {i}", slug=f"tag-{i}") for i in range(50))
+        now = timezone.now()
+        articles = Article.objects.bulk_create(
+            Article(
+                title=f"Article number {i} about something",
+                slug=f"article-number-{i}",
+                summary="A short summary of the article that fits in a list. " * 2,
+                content="",
+                author=author,
+                category=category,
+                published=True,
+                publish_at=now - timedelta(minutes=i),
+            )
+            for i in range(options["page_size"])
+        )
+        ArticleTag.objects.bulk_create(
+            ArticleTag(article=article, tag=tags[(index + offset) % len(tags)])
+            for index, article in enumerate(articles)
+            for offset in range(options["tags_per_article"])
+        )
+        lookup_cache.invalidate()
+        return lookup_cache.attach_tag_ids(list(Article.objects.select_related("author").order_by("-publish_at")))
+
+    def run(self, articles, options):
+        factory = APIRequestFactory()
+        self.stdout.write(
+            f"{'mode':<8} {'renderer':<8} {'serialize':>10} {'encode':>9} {'bytes':>8} {'gzip':>7} {'br':>7}"
+        )
+        baseline = None
+        for mode, query in (("full", {}), ("compact", {"compact": "1"})):
+            context = {"request": Request(factory.get("/api/news/articles/", query))}
+            serialize_time, data = timed(
+                lambda: ArticleListSerializer(articles, many=True, context=context).data, options["repeat"]
+            )
+            for name, renderer_class in RENDERERS:
+                if not getattr(renderer_class, "available", True):
+                    self.stdout.write(f"{mode:<8} {name:<8} {'not installed':>10}")
+                    continue
+                renderer = renderer_class()
+                encode_time, content = timed(lambda: renderer.render(data), options["repeat"])
+                gzipped = len(gzip.compress(content, 6))
+                brotlied = len(brotli.compress(content, quality=5)) if brotli is not None else None
+                baseline = baseline or (encode_time, len(content))
+                self.stdout.write(
+                    f"{mode:<8} {name:<8} {serialize_time * 1000:8.2f}ms {encode_time * 1000:7.2f}ms "
+                    f"{len(content):8} {gzipped:7} {brotlied if brotlied is not None else '-':>7}"
+                    f"  ({encode_time / baseline[0]:.2f}x time, {len(content) / baseline[1]:.2f}x bytes)"
+                )
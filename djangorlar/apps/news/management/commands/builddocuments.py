@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.news import documents
+
+
+class Command(BaseCommand):
+    help = "Re-renders the ArticleDocument read model of every published article."
+
+    def handle(self, *args, **options):
+        count = documents.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Rendered {count} article documents."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.news import feeds
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrites every RSS/Atom feed and sitemap page. Run it periodically with --due: articles "
+        "scheduled for later publication are only listed once a run sees them go live, and "
+        "renamed categories or tags are only picked up by a full run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--due",
+            type=int,
+            metavar="MINUTES",
+            help="Only rewrite what articles that went live in the last MINUTES touch, e.g. 10 every 5 minutes.",
+        )
+
+    def handle(self, *args, **options):
+        if options["due"] is not None:
+            published = feeds.publish_due(options["due"])
+            self.stdout.write(self.style.SUCCESS(f"Feeds and sitemaps updated for {published} articles gone live."))
+            return
+        feeds.rebuild_all()
+        self.stdout.write(
+            self.style.SUCCESS(f"Feeds written to {feeds.root()}, sitemaps to {feeds.sitemaps_root()}.")
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.news import related
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the related-articles index (run periodically, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=related.DEFAULT_TOP_K)
+        parser.add_argument("--article", type=int, help="Only rebuild the neighbours of this article id.")
+        parser.add_argument("--summary", action="store_true", help="Also weigh TF-IDF similarity of summaries.")
+
+    def handle(self, *args, **options):
+        if options["article"]:
+            related.rebuild_for(options["article"], top_k=options["top_k"])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt related articles of {options['article']}."))
+            return
+        count = related.rebuild_all(top_k=options["top_k"], use_summary=options["summary"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt related articles of {count} articles."))
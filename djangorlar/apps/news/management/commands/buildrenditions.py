@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.news.images import build_renditions
+from apps.news.models import Article
+
+
+class Command(BaseCommand):
+    help = "Generates hero image renditions for articles that are missing them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild renditions that already exist too.")
+
+    def handle(self, *args, **options):
+        built = 0
+        articles = Article.objects.exclude(hero_image="").exclude(hero_image__isnull=True).only("id", "hero_image", "hero_renditions")
+        for article in articles.iterator(chunk_size=200):
+            if not options["all"] and article.hero_renditions.get("source") == article.hero_image.name:
+                continue
+            built += build_renditions(article.pk, article.hero_image.name, force=options["all"])
+        self.stdout.write(self.style.SUCCESS(f"Built renditions for {built} articles."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.news import view_counter
+
+
+class Command(BaseCommand):
+    help = "Writes buffered article views to the database (cache backend), once or until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Flush once and exit.")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {view_counter.flush()} views."))
+            return
+        self.stdout.write(f"Flushing {view_counter.get_config()['BACKEND']} view counters, Ctrl+C to stop.")
+        try:
+            view_counter.run_worker()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.news import comment_queue
+
+
+class Command(BaseCommand):
+    help = "Flushes queued comments to the database in batches until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            total = 0
+            while flushed := comment_queue.flush():
+                total += flushed
+            self.stdout.write(self.style.SUCCESS(f"Flushed {total} comments."))
+            return
+        self.stdout.write(f"Flushing {comment_queue.get_config()['BACKEND']} comment queue, Ctrl+C to stop.")
+        try:
+            comment_queue.run_worker()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,177 @@
+import random
+import time
+from datetime import timedelta
+from statistics import median
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from apps.news import lookup_cache
+from apps.news.filters import ArticleDocumentFilter
+from apps.news.models import Article, ArticleDocument, ArticleTag, Tag
+
+
+def join_all(queryset, tag_ids):
+    for tag_id in tag_ids:
+        queryset = queryset.filter(tags__id=tag_id)
+    return queryset.distinct()
+
+
+def join_any(queryset, tag_ids):
+    return queryset.filter(tags__id__in=tag_ids).distinct()
+
+
+def exists_all(queryset, tag_ids):
+    for tag_id in tag_ids:
+        queryset = queryset.filter(Exists(ArticleTag.objects.filter(article_id=OuterRef("pk"), tag_id=tag_id)))
+    return queryset
+
+
+def exists_any(queryset, tag_ids):
+    return queryset.filter(Exists(ArticleTag.objects.filter(article_id=OuterRef("pk"), tag_id__in=tag_ids)))
+
+
+def in_all(queryset, tag_ids):
+    for tag_id in tag_ids:
+        queryset = queryset.filter(pk__in=ArticleTag.objects.filter(tag_id=tag_id).values("article_id"))
+    return queryset
+
+
+def in_any(queryset, tag_ids):
+    return queryset.filter(pk__in=ArticleTag.objects.filter(tag_id__in=tag_ids).values("article_id"))
+
+
+def document_like_all(queryset, slugs):
+    for slug in slugs:
+        queryset = queryset.filter(tag_slugs__contains=f"|{slug}|")
+    return queryset
+
+
+def document_filter_all(queryset, slugs):
+    return ArticleDocumentFilter({"tags__slug": ",".join(slugs)}, queryset).qs
+
+
+def document_filter_any(queryset, slugs):
+    return ArticleDocumentFilter({"tags__any": ",".join(slugs)}, queryset).qs
+
+
+STRATEGIES = (
+    ("all / join+distinct", join_all),
+    ("all / exists", exists_all),
+    ("all / in subquery", in_all),
+    ("any / join+distinct", join_any),
+    ("any / exists", exists_any),
+    ("any / in subquery", in_any),
+)
+# the anonymous list path, which reads ArticleDocument
+DOCUMENT_STRATEGIES = (
+    ("docs all / like", document_like_all),
+    ("docs all / filter", document_filter_all),
+    ("docs any / filter", document_filter_any),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throw-away test database with N articles x K tags and times multi-tag "
+        "filters written as JOIN + DISTINCT against EXISTS and IN subqueries, on the "
+        "Article table and on the ArticleDocument table the anonymous list reads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--articles", type=int, default=1_000_000)
+        parser.add_argument("--tags-per-article", type=int, default=10)
+        parser.add_argument("--tags", type=int, default=500)
+        parser.add_argument("--filter-tags", type=int, default=2, help="Tags per filter.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options)
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self, options):
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        Tag.objects.bulk_create(Tag(name=f"tag {i}", slug=f"tag-{i}") for i in range(options["tags"]))
+        slug_by_id = dict(Tag.objects.values_list("id", "slug"))
+        tag_ids = list(slug_by_id)
+        now = timezone.now()
+        batch = 20_000
+        for start in range(0, options["articles"], batch):
+            stop = min(start + batch, options["articles"])
+            articles = Article.objects.bulk_create(
+                Article(
+                    title=f"article {i}",
+                    slug=f"article-{i}",
+                    content="",
+                    published=True,
+                    publish_at=now - timedelta(minutes=i),
+                )
+                for i in range(start, stop)
+            )
+            links = [
+                ArticleTag(article_id=article.pk, tag_id=tag_id)
+                for article in articles
+                # skewed like real tagging: low ids are the popular tags
+                for tag_id in set(rng.choices(tag_ids, weights=range(len(tag_ids), 0, -1), k=options["tags_per_article"]))
+            ]
+            ArticleTag.objects.bulk_create(links, batch_size=50_000)
+            slugs = {article.pk: [] for article in articles}
+            for link in links:
+                slugs[link.article_id].append(slug_by_id[link.tag_id])
+            ArticleDocument.objects.bulk_create(
+                (
+                    ArticleDocument(
+                        article_id=article.pk,
+                        publish_at=article.publish_at,
+                        created_at=now,
+                        tag_slugs=f"|{'|'.join(slugs[article.pk])}|",
+                        payload={},
+                    )
+                    for article in articles
+                ),
+                batch_size=10_000,
+            )
+            self.stdout.write(f"\rseeded {stop} articles", ending="")
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+        self.stdout.write(f"\nseeding took {time.perf_counter() - started:.1f}s")
+        self.tag_ids = tag_ids
+
+    def run(self, options):
+        queryset = Article.objects.filter(published=True, publish_at__lte=timezone.now())
+        # a popular and a mid-range tag
+        filter_tags = self.tag_ids[: options["filter_tags"] * 5 : 5]
+        for name, strategy in STRATEGIES:
+            self.time(name, strategy(queryset, filter_tags), options["repeat"])
+        # the tags were bulk created, without signals
+        lookup_cache.invalidate()
+        filter_slugs = list(Tag.objects.filter(pk__in=filter_tags).values_list("slug", flat=True))
+        for name, strategy in DOCUMENT_STRATEGIES:
+            self.time(name, strategy(ArticleDocument.objects.all(), filter_slugs), options["repeat"])
+
+    def time(self, name, filtered, repeat):
+        timings = {"count": [], "first page": []}
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = filtered.count()
+            timings["count"].append(time.perf_counter() - started)
+            started = time.perf_counter()
+            list(filtered.order_by("-publish_at").values_list("pk", flat=True)[:20])
+            timings["first page"].append(time.perf_counter() - started)
+        self.stdout.write(
+            f"{name:<22} rows={count:<8} "
+            + " ".join(f"{label}={median(values) * 1000:9.2f}ms" for label, values in timings.items())
+        )
@@ -0,0 +1,100 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import Resolver404, resolve
+from rest_framework.test import APIRequestFactory
+
+from apps.abstracts.caching import is_process_local
+from apps.news import documents
+from apps.news.views import StandardResultsSetPagination
+
+ARTICLES_URL = "/api/news/articles/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the page cache after a deploy: renders the featured list, the first pages "
+        "of the article list and the listings of the biggest categories through their "
+        "views, as an anonymous client, on a bounded thread pool. Refuses to run on a "
+        "cache backend the web processes do not share."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=3, help="First pages of the article list to render.")
+        parser.add_argument("--categories", type=int, default=10, help="Categories with the most articles to render.")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--url", action="append", default=[], help="Further path with query to render, e.g. from the access logs."
+        )
+        parser.add_argument(
+            "--site-url",
+            default=settings.NEWS_SITE_URL,
+            help="Scheme and host the pages are rendered for; payload URLs and cache keys depend on it.",
+        )
+
+    def handle(self, *args, **options):
+        if is_process_local("default"):
+            raise CommandError(
+                f"The default cache ({settings.CACHES['default']['BACKEND']}) is local to this process, "
+                "so the pages would be gone when it exits. Configure a shared backend in CACHES."
+            )
+        site = urlsplit(options["site_url"])
+        if site.hostname in ("localhost", "127.0.0.1") and getattr(settings, "REQUIRE_SHARED_CACHE", False):
+            raise CommandError(
+                f"Pages would be cached for {options['site_url']}, which real traffic never asks for. "
+                "Set DJANGORLAR_SITE_URL or pass --site-url."
+            )
+        urls = self.urls(options)
+        factory = APIRequestFactory()
+
+        def warm(url):
+            started = perf_counter()
+            try:
+                try:
+                    match = resolve(urlsplit(url).path)
+                except Resolver404:
+                    return url, 404, 0.0
+                request = factory.get(url, HTTP_HOST=site.netloc, secure=site.scheme == "https")
+                response = match.func(request, *match.args, **match.kwargs)
+                return url, response.status_code, (perf_counter() - started) * 1000
+            finally:
+                connections.close_all()
+
+        started = perf_counter()
+        failed = 0
+        # the requests all come from this process' address
+        with override_settings(THROTTLE_ENABLED=False), ThreadPoolExecutor(
+            max_workers=options["workers"], thread_name_prefix="warmcache"
+        ) as executor:
+            for url, status, elapsed in executor.map(warm, urls):
+                if status >= 400:
+                    failed += 1
+                    self.stderr.write(f"{status} {elapsed:8.1f}ms {url}")
+                else:
+                    self.stdout.write(f"{status} {elapsed:8.1f}ms {url}")
+        summary = f"Warmed {len(urls) - failed} of {len(urls)} pages in {perf_counter() - started:.2f}s."
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
+
+    def urls(self, options):
+        """Featured list, article list pages and category listings, then ``--url``s."""
+        urls = [f"{ARTICLES_URL}featured/", ARTICLES_URL]
+        pages = min(options["pages"], math.ceil(documents.visible().count() / StandardResultsSetPagination.page_size))
+        urls += [f"{ARTICLES_URL}?{urlencode({'page': page})}" for page in range(2, pages + 1)]
+        categories = (
+            documents.visible()
+            .exclude(category_slug="")
+            .values("category_slug")
+            .annotate(articles=Count("pk"))
+            .order_by("-articles", "category_slug")
+            .values_list("category_slug", flat=True)[: options["categories"]]
+        )
+        urls += [f"{ARTICLES_URL}?{urlencode({'category__slug': slug})}" for slug in categories]
+        urls += options["url"]
+        return list(dict.fromkeys(urls))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='hero_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
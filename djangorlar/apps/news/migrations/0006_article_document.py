@@ -0,0 +1,31 @@
+# Generated by Django 4.2.24 on 2026-10-19 12:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_article_view_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleDocument',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='news.article')),
+                ('publish_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('is_featured', models.BooleanField(default=False)),
+                ('category_slug', models.SlugField(blank=True, max_length=140)),
+                ('tag_slugs', models.TextField(blank=True)),
+                ('search_text', models.TextField(blank=True)),
+                ('payload', models.JSONField()),
+            ],
+            options={
+                'ordering': ['-publish_at', '-created_at'],
+                'indexes': [models.Index(fields=['-publish_at', '-created_at'], name='articledoc_publish_idx'), models.Index(fields=['category_slug', '-publish_at'], name='articledoc_category_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """Make the Article.tags through table an explicit model.
+
+    The table already exists as news_article_tags with the same columns and
+    unique (article_id, tag_id) constraint, so only the migration state
+    changes; the database just gains a (tag_id, article_id) index.
+
+    It also adds ArticleDocument.author_id, a denormalized copy of
+    Article.author_id used to filter documents by author without a join,
+    and backfills it from news_article for the documents that already
+    exist. Reversing drops the column, so the backfill has nothing to undo.
+    """
+
+    dependencies = [
+        ('news', '0006_article_document'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ArticleTag',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='news.article')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='news.tag')),
+                    ],
+                    options={
+                        'db_table': 'news_article_tags',
+                        'unique_together': {('article', 'tag')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='article',
+                    name='tags',
+                    field=models.ManyToManyField(blank=True, related_name='articles', through='news.ArticleTag', to='news.tag'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='articletag',
+            index=models.Index(fields=['tag', 'article'], name='article_tags_tag_article_idx'),
+        ),
+        migrations.AddField(
+            model_name='articledocument',
+            name='author_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunSQL(
+            'UPDATE news_articledocument SET author_id = '
+            '(SELECT author_id FROM news_article WHERE news_article.id = news_articledocument.article_id)',
+            migrations.RunSQL.noop,
+        ),
+    ]
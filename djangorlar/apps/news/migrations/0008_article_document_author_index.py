@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-19 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_article_tag_through'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articledocument',
+            index=models.Index(fields=['author_id', '-publish_at'], name='articledoc_author_idx'),
+        ),
+    ]
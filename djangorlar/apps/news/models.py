@@ -1,11 +1,9 @@
+from django.conf import settings
 from django.db import models
-from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.urls import reverse
 from django.utils import timezone
 
-User = get_user_model()
-
 
 class TimeStampedModel(models.Model):
     """Abstract base class that provides created/modified timestamps."""
@@ -64,13 +62,13 @@ class ArticleQuerySet(models.QuerySet):
 
 
 class Article(TimeStampedModel):
-    author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="articles")
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="articles")
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=300, unique=True, blank=True)
     summary = models.TextField(blank=True)
     content = models.TextField()
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name="articles")
-    tags = models.ManyToManyField(Tag, blank=True, related_name="articles")
+    tags = models.ManyToManyField(Tag, blank=True, related_name="articles", through="ArticleTag")
 
     # publication controls
     published = models.BooleanField(default=False)
@@ -79,12 +77,23 @@ class Article(TimeStampedModel):
 
     # optional hero image
     hero_image = models.ImageField(upload_to="news/hero_images/", null=True, blank=True)
+    # resized copies of hero_image, filled in by apps.news.images
+    hero_renditions = models.JSONField(default=dict, blank=True, editable=False)
+
+    # read statistics, written in batches by apps.news.view_counter
+    view_count = models.PositiveBigIntegerField(default=0, editable=False)
+    # exponentially decayed views as of trending_at (unix time)
+    trending_score = models.FloatField(default=0.0, editable=False)
+    trending_at = models.FloatField(default=0.0, editable=False)
 
     objects = ArticleQuerySet.as_manager()
 
     class Meta:
         ordering = ["-publish_at", "-created_at"]
-        indexes = [models.Index(fields=["slug"])]
+        indexes = [
+            models.Index(fields=["slug"]),
+            models.Index(fields=["trending_at"], name="article_trending_at_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -99,22 +108,94 @@ class Article(TimeStampedModel):
                 counter += 1
                 slug = f"{base}-{counter}"
             self.slug = slug
+        if not self.hero_image and self.hero_renditions:
+            self.hero_renditions = {}
         super().save(*args, **kwargs)
+        if self.hero_image and self.hero_renditions.get("source") != self.hero_image.name:
+            from .images import schedule_renditions
+
+            schedule_renditions(self)
 
     def get_absolute_url(self):
         return reverse("news:article-detail", kwargs={"slug": self.slug})
 
 
+class ArticleTag(models.Model):
+    """Explicit Article.tags through table, kept on the auto-created table."""
+
+    article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "news_article_tags"
+        # (article, tag) serves lookups per article, (tag, article) the
+        # article ids of one tag for the list filters
+        unique_together = [("article", "tag")]
+        indexes = [models.Index(fields=["tag", "article"], name="article_tags_tag_article_idx")]
+
+    def __str__(self):
+        return f"{self.article_id}:{self.tag_id}"
+
+
 class Comment(TimeStampedModel):
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="comments")
-    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     name = models.CharField(max_length=120, blank=True)
     email = models.EmailField(blank=True)
     body = models.TextField()
     approved = models.BooleanField(default=False)
+    # pending id handed out by the comment queue; makes batch retries idempotent
+    ingest_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     class Meta:
         ordering = ["created_at"]
 
     def __str__(self):
         return f"Comment by {self.name or self.user or 'Anonymous'} on {self.article}"
+
+
+class ArticleDocument(models.Model):
+    """Read model of a published article, maintained by apps.news.documents.
+
+    Public list, filter and search requests read only this table.
+    """
+
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name="document")
+    publish_at = models.DateTimeField()
+    created_at = models.DateTimeField()
+    author_id = models.IntegerField(null=True, blank=True)
+    is_featured = models.BooleanField(default=False)
+    category_slug = models.SlugField(max_length=140, blank=True)
+    # "|slug-a|slug-b|"
+    tag_slugs = models.TextField(blank=True)
+    # " word-a word-b " of title, summary, content, category and tag names
+    search_text = models.TextField(blank=True)
+    # ArticleListSerializer output with relative URLs
+    payload = models.JSONField()
+
+    class Meta:
+        ordering = ["-publish_at", "-created_at"]
+        indexes = [
+            models.Index(fields=["-publish_at", "-created_at"], name="articledoc_publish_idx"),
+            models.Index(fields=["category_slug", "-publish_at"], name="articledoc_category_idx"),
+            models.Index(fields=["author_id", "-publish_at"], name="articledoc_author_idx"),
+        ]
+
+    def __str__(self):
+        return self.payload.get("title", str(self.article_id))
+
+
+class RelatedArticle(models.Model):
+    """Precomputed top-K neighbours of an article, rebuilt by apps.news.related."""
+
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="related_entries")
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["article", "rank"]
+        constraints = [models.UniqueConstraint(fields=["article", "rank"], name="unique_related_article_rank")]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.3f})"
@@ -0,0 +1,61 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.abstracts.caching import single_flight
+
+VERSION_KEY = "news:pages-version"
+
+
+def version():
+    """Current generation of the cached pages, shared by all processes.
+
+    Only as long as the default cache is shared, which startup enforces
+    (``REQUIRE_SHARED_CACHE``).
+    """
+    value = cache.get(VERSION_KEY)
+    if value is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        value = cache.get(VERSION_KEY)
+    return value
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate():
+    """Retire every cached page, now and again once the transaction commits."""
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def key(request):
+    """Cache key of the page: host, path and sorted query under the current version.
+
+    The host is part of it because payload URLs are absolute.
+    """
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = hashlib.md5(f"{request.get_host()}{request.path}?{query}".encode()).hexdigest()
+    return f"news:page:{version()}:{digest}"
+
+
+def cached(request, compute):
+    """Response data of a public page, computed once per version.
+
+    ``compute`` returns the data to render. Pages change with the articles,
+    which invalidate them through the document refresh; scheduled articles
+    going live are picked up after ``NEWS_PAGE_CACHE_TIMEOUT`` seconds.
+    A timeout of 0 turns the cache off.
+    """
+    timeout = getattr(settings, "NEWS_PAGE_CACHE_TIMEOUT", 0)
+    if not timeout:
+        return compute()
+    return single_flight(key(request), compute, timeout)
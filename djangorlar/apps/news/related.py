@@ -0,0 +1,222 @@
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 10
+# bonus added to the tag similarity of two articles in the same category
+CATEGORY_WEIGHT = 0.2
+# weight of the summary TF-IDF cosine when it is enabled
+SUMMARY_WEIGHT = 0.3
+# tags on more articles than this carry almost no signal and would make the
+# candidate set quadratic, so they are ignored
+MAX_TAG_DOCUMENT_FREQUENCY = 5000
+# ids bound per ``__in`` query, well below SQLite's bound-variable limit
+ID_BATCH_SIZE = 500
+WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def _idf(document_count, frequency):
+    return math.log((1 + document_count) / (1 + frequency)) + 1
+
+
+def _norm(tag_ids, idf):
+    return math.sqrt(sum(idf[tag_id] ** 2 for tag_id in tag_ids)) or 1.0
+
+
+def summary_vectors(summaries):
+    """L2-normalized TF-IDF vectors of article summaries, keyed by article id."""
+    tokens = {article_id: Counter(WORD_RE.findall(summary.lower())) for article_id, summary in summaries.items()}
+    frequency = Counter(word for counts in tokens.values() for word in counts)
+    total = len(tokens)
+    vectors = {}
+    for article_id, counts in tokens.items():
+        vector = {word: count * _idf(total, frequency[word]) for word, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors[article_id] = {word: weight / norm for word, weight in vector.items()}
+    return vectors
+
+
+def _cosine(left, right):
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(weight * right.get(word, 0.0) for word, weight in left.items())
+
+
+def score(article_id, tags, categories, postings, idf, top_k, vectors=None):
+    """Top ``top_k`` (related_id, score) pairs for one article.
+
+    ``tags`` maps article ids to tag id sets, ``postings`` tag ids to article
+    ids. Candidates are the articles sharing at least one informative tag.
+    """
+    own_tags = tags.get(article_id, set())
+    shared = defaultdict(float)
+    for tag_id in own_tags:
+        posting = postings.get(tag_id, ())
+        if len(posting) > MAX_TAG_DOCUMENT_FREQUENCY:
+            continue
+        weight = idf[tag_id] ** 2
+        for other_id in posting:
+            if other_id != article_id:
+                shared[other_id] += weight
+    if not shared:
+        return []
+
+    own_norm = _norm(own_tags, idf)
+    own_category = categories.get(article_id)
+    scored = []
+    for other_id, dot in shared.items():
+        value = dot / (own_norm * _norm(tags[other_id], idf))
+        if own_category is not None and categories.get(other_id) == own_category:
+            value += CATEGORY_WEIGHT
+        if vectors is not None:
+            value += SUMMARY_WEIGHT * _cosine(vectors.get(article_id, {}), vectors.get(other_id, {}))
+        scored.append((value, other_id))
+    return [(other_id, value) for value, other_id in heapq.nlargest(top_k, scored)]
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        yield ids[start:start + ID_BATCH_SIZE]
+
+
+def _published_articles():
+    from .models import Article
+
+    return Article.objects.published()
+
+
+def _write(results):
+    """Replace the stored neighbours of every article in ``results``."""
+    from .models import RelatedArticle
+
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=list(results)).delete()
+        RelatedArticle.objects.bulk_create(
+            RelatedArticle(article_id=article_id, related_id=related_id, score=value, rank=rank)
+            for article_id, neighbours in results.items()
+            for rank, (related_id, value) in enumerate(neighbours, start=1)
+        )
+
+
+def rebuild_all(top_k=DEFAULT_TOP_K, use_summary=False, batch_size=500):
+    """Recompute the whole index from one pass over the tag through table."""
+    from .models import Article, RelatedArticle
+
+    articles = dict(_published_articles().values_list("id", "category_id"))
+    tags = {article_id: set() for article_id in articles}
+    postings = defaultdict(list)
+    rows = Article.tags.through.objects.filter(article_id__in=_published_articles().values("id"))
+    for article_id, tag_id in rows.values_list("article_id", "tag_id").iterator(chunk_size=10000):
+        tags[article_id].add(tag_id)
+        postings[tag_id].append(article_id)
+    idf = {tag_id: _idf(len(articles), len(posting)) for tag_id, posting in postings.items()}
+    vectors = None
+    if use_summary:
+        vectors = summary_vectors(dict(_published_articles().values_list("id", "summary")))
+
+    RelatedArticle.objects.exclude(article_id__in=list(articles)).delete()
+    batch = {}
+    for article_id in articles:
+        batch[article_id] = score(article_id, tags, articles, postings, idf, top_k, vectors)
+        if len(batch) >= batch_size:
+            _write(batch)
+            batch = {}
+    if batch:
+        _write(batch)
+    return len(articles)
+
+
+def rebuild_for(article_id, top_k=DEFAULT_TOP_K):
+    """Recompute the neighbours of one article with a handful of indexed queries.
+
+    Other articles' lists are refreshed by the next ``rebuild_all``.
+    """
+    from .models import Article
+
+    through = Article.tags.through.objects
+    published = _published_articles()
+    if not published.filter(pk=article_id).exists():
+        _write({article_id: []})
+        return
+    own_tags = set(through.filter(article_id=article_id).values_list("tag_id", flat=True))
+    frequency = dict(
+        through.filter(tag_id__in=own_tags, article_id__in=published.values("id"))
+        .values_list("tag_id")
+        .annotate(count=Count("id"))
+    )
+    informative = {tag_id for tag_id in own_tags if frequency.get(tag_id, 0) <= MAX_TAG_DOCUMENT_FREQUENCY}
+    candidate_ids = set(
+        through.filter(tag_id__in=informative, article_id__in=published.values("id")).values_list("article_id", flat=True)
+    ) | {article_id}
+
+    tags = defaultdict(set)
+    postings = defaultdict(list)
+    categories = {}
+    # candidates of a popular tag can outnumber the bound variables one query may hold
+    for chunk in _chunks(candidate_ids):
+        for other_id, tag_id in through.filter(article_id__in=chunk).values_list("article_id", "tag_id"):
+            tags[other_id].add(tag_id)
+            if tag_id in informative:
+                postings[tag_id].append(other_id)
+        categories.update(published.filter(pk__in=chunk).values_list("id", "category_id"))
+    missing = {tag_id for tag_set in tags.values() for tag_id in tag_set} - set(frequency)
+    for chunk in _chunks(missing):
+        frequency.update(
+            through.filter(tag_id__in=chunk, article_id__in=published.values("id"))
+            .values_list("tag_id")
+            .annotate(count=Count("id"))
+        )
+    total = published.count()
+    idf = {tag_id: _idf(total, count) for tag_id, count in frequency.items()}
+    _write({article_id: score(article_id, tags, categories, postings, idf, top_k)})
+
+
+def _drain():
+    # Give the request that scheduled us time to finish its remaining writes;
+    # a save followed by tags.set() then costs one rebuild, not two.
+    time.sleep(getattr(settings, "NEWS_RELATED_DEBOUNCE", 0.5))
+    with _executor_lock:
+        article_ids = sorted(_pending)
+        _pending.clear()
+    try:
+        for article_id in article_ids:
+            try:
+                rebuild_for(article_id)
+            except Exception:
+                logger.exception("Could not rebuild related articles for %s", article_id)
+    finally:
+        close_old_connections()
+
+
+def _submit(article_id):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # one worker: rebuilds are cheap and serializing them avoids write contention
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="related-articles")
+        if not _pending:
+            _executor.submit(_drain)
+        _pending.add(article_id)
+
+
+def schedule_rebuild(article_id):
+    """Refresh one article's neighbours off the request thread after commit."""
+    if not getattr(settings, "NEWS_RELATED_INCREMENTAL", True):
+        return
+    transaction.on_commit(lambda: _submit(article_id))
@@ -1,6 +1,9 @@
 from rest_framework import serializers
-from .models import Article, Category, Tag, Comment
+from .models import Article, Category, Tag, Comment, RelatedArticle
 from django.contrib.auth import get_user_model
+from apps.abstracts.serializers import CompactFieldsMixin, TimedListSerializer, TimedSerializerMixin
+from . import lookup_cache
+from .images import rendition_urls
 
 User = get_user_model()
 
@@ -12,62 +15,100 @@ class UserPreviewSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(CompactFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="news:tag-detail", lookup_field="slug")
 
     class Meta:
         model = Tag
+        list_serializer_class = TimedListSerializer
         fields = ("id", "name", "slug", "url")
         read_only_fields = ("id", "slug")
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(CompactFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="news:category-detail", lookup_field="slug")
 
     class Meta:
         model = Category
+        list_serializer_class = TimedListSerializer
         fields = ("id", "name", "slug", "description", "url")
         read_only_fields = ("id", "slug")
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Comment
+        list_serializer_class = TimedListSerializer
         fields = ("id", "article", "user", "name", "email", "body", "approved", "created_at")
-        read_only_fields = ("id", "approved", "created_at")
+        read_only_fields = ("id", "user", "approved", "created_at")
+        # comments are public, the address is for moderators only
+        extra_kwargs = {"email": {"write_only": True}}
 
-    def create(self, validated_data):
+    def validate(self, attrs):
         request = self.context.get("request")
-        if request and request.user and request.user.is_authenticated:
-            validated_data["user"] = request.user
-            validated_data.pop("email", None)
-            validated_data.pop("name", None)
-        return super().create(validated_data)
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            attrs["user"] = user
+            attrs.pop("email", None)
+            attrs.pop("name", None)
+        return attrs
+
+
+class HeroImageMixin:
+    """Expose pre-generated hero image renditions instead of the uploaded original."""
+
+    def get_hero_image(self, obj):
+        return rendition_urls(obj, self.context.get("request"))
+
+
+class CachedTaxonomyMixin:
+    """Serialize category and tags from the in-process lookup cache.
+
+    Tags are resolved from ``article.tag_ids`` (see ``lookup_cache.attach_tag_ids``)
+    so the list query needs neither the category join nor the tags prefetch.
+    """
+
+    def get_category(self, obj):
+        category = lookup_cache.category_by_id(obj.category_id)
+        if category is None:
+            return None
+        return CategorySerializer(context=self.context).to_representation(category)
 
+    def get_tags(self, obj):
+        tag_ids = getattr(obj, "tag_ids", None)
+        if tag_ids is None:
+            tag_ids = lookup_cache.attach_tag_ids([obj])[0].tag_ids
+        serializer = TagSerializer(context=self.context)
+        return [serializer.to_representation(tag) for tag in lookup_cache.tags_by_ids(tag_ids)]
 
-class ArticleListSerializer(serializers.ModelSerializer):
+
+class ArticleListSerializer(CompactFieldsMixin, CachedTaxonomyMixin, HeroImageMixin, TimedSerializerMixin, serializers.ModelSerializer):
     author = UserPreviewSerializer(read_only=True)
-    category = CategorySerializer(read_only=True)
-    tags = TagSerializer(many=True, read_only=True)
+    category = serializers.SerializerMethodField()
+    tags = serializers.SerializerMethodField()
     url = serializers.HyperlinkedIdentityField(view_name="news:article-detail", lookup_field="slug")
+    hero_image = serializers.SerializerMethodField()
 
     class Meta:
         model = Article
-        fields = ("id", "title", "slug", "summary", "author", "category", "tags", "published", "publish_at", "is_featured", "url")
+        list_serializer_class = TimedListSerializer
+        fields = ("id", "title", "slug", "summary", "author", "category", "tags", "published", "publish_at", "is_featured", "hero_image", "url")
         ead_only_fields = ("id", "slug", "author")
 
 
-class ArticleDetailSerializer(serializers.ModelSerializer):
+class ArticleDetailSerializer(CompactFieldsMixin, CachedTaxonomyMixin, HeroImageMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    compact_exclude = ("absolute_url",)
     author = UserPreviewSerializer(read_only=True)
-    category = CategorySerializer(read_only=True)
-    tags = TagSerializer(many=True, read_only=True)
+    category = serializers.SerializerMethodField()
+    tags = serializers.SerializerMethodField()
     comments = CommentSerializer(many=True, read_only=True)
     absolute_url = serializers.SerializerMethodField()
+    hero_image = serializers.SerializerMethodField()
 
     class Meta:
         model = Article
-        exclude = ()
+        exclude = ("hero_renditions", "trending_score", "trending_at")
         read_only_fields = ("id", "slug", "author", "created_at", "updated_at")
 
     def get_absolute_url(self, obj):
@@ -77,7 +118,7 @@ class ArticleDetailSerializer(serializers.ModelSerializer):
         return obj.get_absolute_url()
 
 
-class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
+class ArticleCreateUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     tag_names = serializers.ListField(child=serializers.CharField(), write_only=True, required=False)
 
     class Meta:
@@ -105,3 +146,22 @@ class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
             tags = [Tag.objects.get_or_create(name=n)[0] for n in tag_names]
             instance.tags.set(tags)
         return instance
+
+
+class RelatedArticleSerializer(CompactFieldsMixin, serializers.ModelSerializer):
+    id = serializers.IntegerField(source="related.id")
+    title = serializers.CharField(source="related.title")
+    slug = serializers.CharField(source="related.slug")
+    summary = serializers.CharField(source="related.summary")
+    publish_at = serializers.DateTimeField(source="related.publish_at")
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RelatedArticle
+        fields = ("id", "title", "slug", "summary", "publish_at", "score", "url")
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        url = obj.related.get_absolute_url()
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
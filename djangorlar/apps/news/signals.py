@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import documents, lookup_cache, page_cache, related
+from .models import Article, Category, Tag
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_taxonomy_cache(sender, **kwargs):
+    lookup_cache.invalidate()
+
+
+@receiver(post_delete, sender=Article)
+def invalidate_pages_on_delete(sender, **kwargs):
+    # the document goes with the article, without a refresh
+    page_cache.invalidate()
+
+
+@receiver(post_save, sender=Article)
+def rebuild_related_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        related.schedule_rebuild(instance.pk)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def rebuild_related_on_tags(sender, instance, action, reverse, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and not reverse:
+        related.schedule_rebuild(instance.pk)
+
+
+# Receivers below run after invalidate_taxonomy_cache, so documents are
+# rendered with the new category and tag names.
+
+
+@receiver(post_save, sender=Article)
+def refresh_document_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        documents.refresh([instance.pk])
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def refresh_document_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        instance._document_article_ids = list(instance.articles.values_list("id", flat=True))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            documents.refresh([instance.pk])
+        elif action == "post_clear":
+            documents.refresh(getattr(instance, "_document_article_ids", ()))
+        else:
+            documents.refresh(pk_set)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def refresh_documents_on_taxonomy_save(sender, instance, created, raw=False, **kwargs):
+    if not (created or raw):
+        documents.refresh(instance.articles.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=get_user_model())
+def remember_documents_on_delete(sender, instance, **kwargs):
+    # the article links are cleared or nulled by post_delete
+    instance._document_article_ids = list(instance.articles.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=get_user_model())
+def refresh_documents_on_delete(sender, instance, **kwargs):
+    documents.refresh(getattr(instance, "_document_article_ids", ()))
+
+
+@receiver(post_save, sender=get_user_model())
+def refresh_documents_on_author_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # logins only touch last_login, which documents don't show
+    if created or raw or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    documents.refresh(instance.articles.values_list("id", flat=True))
@@ -1,3 +1,715 @@
-from django.test import TestCase
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.abstracts import profiling
+from apps.abstracts.caching import single_flight
+from apps.abstracts.testing import QueryCountAssertionMixin
+from . import comment_queue, documents, feeds, images, lookup_cache, page_cache, related, view_counter
+from .models import Article, ArticleDocument, Category, Comment, Tag
+
+User = get_user_model()
+
+
+@override_settings(VIEW_COUNTER={"START_WORKER": False})
+class NewsQueryCountTests(QueryCountAssertionMixin, TestCase):
+    """The public news endpoints must not issue queries per row."""
+
+    query_snapshot_dir = os.path.join(os.path.dirname(__file__), "query_snapshots")
+
+    def refresh_lookup_cache(self):
+        # bulk_create sends no signals, so reload categories and tags by hand
+        lookup_cache.taxonomy.invalidate()
+        lookup_cache.taxonomy.snapshot()
+
+    def seed_articles(self, size):
+        author = User.objects.create(username=f"author-{size}")
+        categories = Category.objects.bulk_create(
+            Category(name=f"category {size}-{i}", slug=f"category-{size}-{i}") for i in range(size)
+        )
+        tags = Tag.objects.bulk_create(Tag(name=f"tag {size}-{i}", slug=f"tag-{size}-{i}") for i in range(3))
+        articles = Article.objects.bulk_create(
+            Article(
+                title=f"article {size}-{i}",
+                slug=f"article-{size}-{i}",
+                content="body",
+                author=author,
+                category=categories[i],
+                published=True,
+                is_featured=True,
+            )
+            for i in range(size)
+        )
+        for article in articles:
+            article.tags.set(tags)
+        self.refresh_lookup_cache()
+        documents.rebuild_all()
+        return articles
+
+    def seed_article_detail(self, size):
+        article = Article.objects.create(title=f"detail {size}", content="body", published=True)
+        tags = Tag.objects.bulk_create(Tag(name=f"detail tag {size}-{i}", slug=f"detail-tag-{size}-{i}") for i in range(size))
+        article.tags.set(tags)
+        Comment.objects.bulk_create(Comment(article=article, body="comment", approved=True) for _ in range(size))
+        self.refresh_lookup_cache()
+        return article
+
+    def seed_categories(self, size):
+        categories = Category.objects.bulk_create(
+            Category(name=f"category {size}-{i}", slug=f"category-{size}-{i}") for i in range(size)
+        )
+        self.refresh_lookup_cache()
+        return categories
+
+    def test_article_list(self):
+        self.assertConstantQueries(
+            "article_list",
+            self.seed_articles,
+            lambda articles: self.client.get("/api/news/articles/", {"page_size": 100}),
+        )
+
+    def test_article_list_filtered(self):
+        self.assertConstantQueries(
+            "article_list_filtered",
+            self.seed_articles,
+            lambda articles: self.client.get(
+                "/api/news/articles/",
+                {"category__slug": articles[0].category.slug, "tags__slug": f"tag-{len(articles)}-0", "search": "article"},
+            ),
+        )
+
+    def test_article_featured(self):
+        self.assertConstantQueries(
+            "article_featured",
+            self.seed_articles,
+            lambda articles: self.client.get("/api/news/articles/featured/"),
+        )
+
+    def test_article_detail(self):
+        self.assertConstantQueries(
+            "article_detail",
+            self.seed_article_detail,
+            lambda article: self.client.get(f"/api/news/articles/{article.slug}/"),
+        )
+
+    def test_article_trending(self):
+        def seed(size):
+            articles = self.seed_articles(size)
+            view_counter.write({article.pk: index + 1 for index, article in enumerate(articles)})
+            return articles
+
+        self.assertConstantQueries(
+            "article_trending",
+            seed,
+            lambda articles: self.client.get("/api/news/articles/trending/", {"limit": 50}),
+        )
+
+    def test_category_list(self):
+        self.assertConstantQueries(
+            "category_list",
+            self.seed_categories,
+            lambda categories: self.client.get("/api/news/categories/", {"page_size": 100}),
+        )
+
+    def test_category_detail(self):
+        self.assertConstantQueries(
+            "category_detail",
+            self.seed_categories,
+            lambda categories: self.client.get(f"/api/news/categories/{categories[0].slug}/"),
+        )
+
+
+class ArticleDocumentTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username="writer")
+        self.category = Category.objects.create(name="Science")
+        self.space = Tag.objects.create(name="Space")
+        self.oceans = Tag.objects.create(name="Oceans")
+        self.article = Article.objects.create(
+            title="Comets", summary="Ice and dust", content="Tails point away", author=self.author,
+            category=self.category, published=True,
+        )
+        self.article.tags.set([self.space, self.oceans])
+        Article.objects.create(title="Draft", content="unpublished", category=self.category)
+
+    def slugs(self, **params):
+        response = self.client.get("/api/news/articles/", params)
+        self.assertEqual(response.status_code, 200)
+        return [item["slug"] for item in response.json()["results"]]
+
+    def test_documents_follow_signals(self):
+        self.assertEqual(self.slugs(), ["comets"])
+        self.assertEqual(self.slugs(**{"tags__slug": ["space", "oceans"]}), ["comets"])
+        self.assertEqual(self.slugs(category__slug="science", search="dus"), ["comets"])
+        self.assertEqual(self.slugs(search="rockets"), [])
+
+        self.space.name = "Astronomy"
+        self.space.save()
+        [tag_names] = [[tag["name"] for tag in item["tags"]] for item in self.client.get("/api/news/articles/").json()["results"]]
+        self.assertEqual(tag_names, ["Astronomy", "Oceans"])
+
+        self.oceans.delete()
+        self.assertEqual(self.slugs(tags__slug="oceans"), [])
+
+        self.article.published = False
+        self.article.save()
+        self.assertEqual(self.slugs(), [])
+
+    def test_payload_urls_are_absolute(self):
+        [item] = self.client.get("/api/news/articles/").json()["results"]
+        self.assertEqual(item["url"], "http://testserver/api/news/articles/comets/")
+        self.assertEqual(item["category"]["url"], "http://testserver/api/news/categories/science/")
+
+
+class CompactModeTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username="editor", is_staff=True)
+        category = Category.objects.create(name="Science")
+        tag = Tag.objects.create(name="Space")
+        for i in range(3):
+            article = Article.objects.create(
+                title=f"Comet {i}", summary="Ice and dust " * 20, content="", category=category, published=True,
+            )
+            article.tags.set([tag])
+
+    def test_compact_mode_drops_derivable_urls(self):
+        full = self.client.get("/api/news/articles/").json()["results"][0]
+        for client_setup in (lambda: None, lambda: self.client.force_login(self.staff)):
+            client_setup()
+            item = self.client.get("/api/news/articles/", {"compact": "1"}).json()["results"][0]
+            self.assertNotIn("url", item)
+            self.assertNotIn("url", item["category"])
+            self.assertNotIn("url", item["tags"][0])
+            self.assertEqual(item["slug"], full["slug"])
+
+
+@override_settings(
+    MIDDLEWARE=["apps.abstracts.middleware.SamplingProfilerMiddleware", *settings.MIDDLEWARE],
+    SAMPLING_PROFILER_SETTINGS={"SAMPLE_RATE": 0, "INTERVAL": 0.001},
+)
+class SamplingProfilerTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username="editor", is_staff=True)
+        Article.objects.create(title="Comet", content="", category=Category.objects.create(name="Science"), published=True)
+        profiling.profile_store().clear()
+
+    def test_only_signed_requests_are_profiled(self):
+        self.assertFalse(self.client.get("/api/news/articles/").has_header("X-Profile-Id"))
+        forged = self.client.get("/api/news/articles/", HTTP_X_PROFILE="1:forged:signature")
+        self.assertFalse(forged.has_header("X-Profile-Id"))
+        response = self.client.get("/api/news/articles/", HTTP_X_PROFILE=profiling.make_token(self.staff.pk))
+        [profiled] = profiling.profile_store().requests()
+        self.assertEqual(response["X-Profile-Id"], str(profiled.id))
+        self.assertEqual((profiled.path, profiled.status, profiled.reason), ("/api/news/articles/", 200, "header"))
+
+    def test_collapse_stops_at_root(self):
+        def inner():
+            return profiling.collapse(sys._getframe(), root=sys._getframe(1))
+
+        stack = inner()
+        self.assertEqual(stack, f"{__name__}:test_collapse_stops_at_root;{__name__}:inner")
+        self.assertTrue(profiling.collapse(sys._getframe(), max_depth=2).endswith(";..."))
+
+    def test_staff_pages(self):
+        profiled = profiling.ProfiledRequest("GET", "/api/news/articles/", "sampled", Counter({"a:view;b:query": 3, "a:view": 1}))
+        profiling.profile_store().add(profiled)
+        self.assertEqual(self.client.get("/profiler/").status_code, 302)
+        self.client.force_login(self.staff)
+        page = self.client.get("/profiler/")
+        self.assertContains(page, "b:query")
+        self.assertContains(page, "X-Profile: ")
+        download = self.client.get("/profiler/collapsed/", {"request": profiled.id})
+        self.assertEqual(download.content, b"a:view 1\na:view;b:query 3\n")
+        self.assertEqual(self.client.get("/profiler/", {"request": "nope"}).status_code, 404)
+        self.client.post("/profiler/clear/")
+        self.assertEqual(profiling.profile_store().requests(), [])
+
+
+@override_settings(NEWS_PAGE_CACHE_TIMEOUT=60)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Science")
+        self.article = Article.objects.create(title="Comet", content="", category=self.category, published=True, is_featured=True)
+
+    def test_public_pages_are_cached_until_articles_change(self):
+        for url in ("/api/news/articles/", "/api/news/articles/featured/"):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).json()["results"][0]["title"], "Comet")
+        self.article.title = "Comet returns"
+        self.article.save()
+        self.assertEqual(self.client.get("/api/news/articles/").json()["results"][0]["title"], "Comet returns")
+        self.assertEqual(self.client.get("/api/news/articles/featured/").json()["results"][0]["title"], "Comet returns")
+        self.article.delete()
+        self.assertEqual(self.client.get("/api/news/articles/").json()["count"], 0)
+
+    def test_single_flight_computes_concurrent_misses_once(self):
+        key = f"test:{uuid.uuid4().hex}"
+        calls = []
+        barrier = threading.Barrier(8)
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        def worker():
+            barrier.wait()
+            results.append(single_flight(key, compute, 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((len(calls), results), (1, ["value"] * 8))
+
+
+@override_settings(NEWS_PAGE_CACHE_TIMEOUT=60, NEWS_RELATED_INCREMENTAL=False, NEWS_FEEDS_INCREMENTAL=False)
+class WarmCacheTests(TransactionTestCase):
+    # the pool threads read the database, so the rows have to be committed
+
+    def test_warmcache_fills_public_pages(self):
+        Article.objects.create(title="Comet", content="", category=Category.objects.create(name="Science"), published=True)
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location}}
+        ):
+            call_command("warmcache", stdout=out, site_url="http://testserver", url=["/missing/"], stderr=StringIO())
+            self.assertIn("Warmed 3 of 4 pages", out.getvalue())
+            request = RequestFactory().get("/api/news/articles/", {"category__slug": "science"})
+            self.assertIsNotNone(cache.get(page_cache.key(request)))
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_warmcache_refuses_a_process_local_cache(self):
+        with self.assertRaisesMessage(CommandError, "local to this process"):
+            call_command("warmcache", stdout=StringIO())
+
+    def test_warmcache_refuses_a_local_site_url(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location}},
+            REQUIRE_SHARED_CACHE=True,
+        ):
+            with self.assertRaisesMessage(CommandError, "DJANGORLAR_SITE_URL"):
+                call_command("warmcache", site_url="http://localhost:8000", stdout=StringIO())
+
+
+class TaxonomyCacheTests(TestCase):
+    def test_other_processes_reload_after_a_change(self):
+        # a second worker process, sharing only the cache with this one
+        worker = lookup_cache.TaxonomyCache()
+        self.assertEqual(worker.snapshot().categories, [])
+        Category.objects.create(name="Science")
+        with override_settings(NEWS_TAXONOMY_CACHE_CHECK_INTERVAL=60):
+            self.assertEqual(worker.snapshot().categories, [])
+        with override_settings(NEWS_TAXONOMY_CACHE_CHECK_INTERVAL=0):
+            self.assertEqual([category.slug for category in worker.snapshot().categories], ["science"])
+        with self.assertNumQueries(0), override_settings(NEWS_TAXONOMY_CACHE_CHECK_INTERVAL=0):
+            worker.snapshot()
+
+
+@override_settings(COMMENT_QUEUE={"BACKEND": "memory", "START_WORKER": False})
+class CommentTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username="editor", is_staff=True)
+        self.article = Article.objects.create(title="Comet", content="", published=True)
+        # throttle buckets
+        cache.clear()
+        while comment_queue.flush():
+            pass
+
+    def post(self, **data):
+        return self.client.post("/api/news/comments/", {"article": self.article.pk, "body": "Nice", **data})
+
+    def test_comment_author_comes_from_the_request(self):
+        self.assertEqual(self.post(user=self.staff.pk, name="Eve", email="eve@example.com").status_code, 202)
+        self.client.force_login(self.staff)
+        self.post(user=0, name="ignored")
+        comment_queue.flush()
+        anonymous, editor = Comment.objects.order_by("pk")
+        self.assertEqual((anonymous.user, anonymous.name, anonymous.email), (None, "Eve", "eve@example.com"))
+        self.assertEqual((editor.user, editor.name), (self.staff, ""))
+
+        Comment.objects.update(approved=True)
+        self.client.logout()
+        listed = self.client.get("/api/news/comments/").json()["results"]
+        self.assertEqual([item["name"] for item in listed], ["Eve", ""])
+        self.assertNotIn("email", listed[0])
+
+    def test_create_pending_and_approve(self):
+        response = self.post(name="Eve")
+        self.assertEqual(response.status_code, 202)
+        pending_id = response.json()["pending_id"]
+        self.assertEqual(self.client.get(f"/api/news/comments/pending/{pending_id}/").json()["status"], "pending")
+        comment_queue.flush()
+        stored = self.client.get(f"/api/news/comments/pending/{pending_id}/").json()
+        self.assertEqual((stored["status"], stored["approved"]), ("stored", False))
+
+        self.assertEqual(self.client.post("/api/news/comments/approve/", {"ids": [stored["id"]]}).status_code, 403)
+        self.client.force_login(self.staff)
+        for body in ([stored["id"]], {"ids": "1"}, {}):
+            response = self.client.post("/api/news/comments/approve/", body, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/news/comments/approve/", {"ids": [stored["id"]]}, content_type="application/json")
+        self.assertEqual(response.json(), {"approved": 1})
+        self.assertTrue(Comment.objects.get(pk=stored["id"]).approved)
+
+    def test_detail_shows_approved_comments_only(self):
+        self.post(body="approved")
+        self.post(body="pending")
+        comment_queue.flush()
+        Comment.objects.filter(body="approved").update(approved=True)
+        for client_setup in (lambda: None, lambda: self.client.force_login(self.staff)):
+            client_setup()
+            detail = self.client.get(f"/api/news/articles/{self.article.slug}/").json()
+            self.assertEqual([comment["body"] for comment in detail["comments"]], ["approved"])
+
+    def test_poison_items_are_dead_lettered(self):
+        queue = comment_queue.get_queue()
+        dead = queue.dead_count()
+        self.post(body="kept")
+        self.post(body="orphan")
+        self.post(body="broken")
+        items = list(queue._items)
+        items[1]["article_id"] = self.article.pk + 1000
+        items[2]["pending_id"] = "not-a-uuid"
+        with self.assertLogs("apps.news.comment_queue", "WARNING"):
+            self.assertEqual(comment_queue.flush(), 3)
+        self.assertEqual(list(Comment.objects.values_list("body", flat=True)), ["kept"])
+        self.assertEqual(queue.dead_count() - dead, 2)
+        self.assertEqual((queue.depth(), queue._inflight), (0, {}))
+
+    def test_unavailable_database_requeues_the_batch(self):
+        self.post()
+        with mock.patch.object(comment_queue, "_insert", side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                comment_queue.flush()
+        self.assertEqual(comment_queue.get_queue().depth(), 1)
+        comment_queue.flush()
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class FileCommentQueueTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.queue = comment_queue.FileCommentQueue(os.path.join(directory.name, "comments.ndjson"))
+        for index in range(5):
+            self.queue.put({"pending_id": f"{index:032x}", "body": str(index)})
+
+    def test_take_reads_from_the_offset(self):
+        first = self.queue.take(2)
+        self.assertEqual([item["body"] for item in first], ["0", "1"])
+        self.assertEqual(self.queue.depth(), 3)
+        self.assertTrue(self.queue.contains(first[0]["pending_id"]))
+        self.queue.done(first)
+        self.assertFalse(self.queue.contains(first[0]["pending_id"]))
+        rest = self.queue.take(10)
+        self.assertEqual([item["body"] for item in rest], ["2", "3", "4"])
+        # read to the end, the spool starts over
+        self.assertEqual(os.path.getsize(self.queue.path), 0)
+        self.queue.put({"pending_id": "f" * 32, "body": "5"})
+        self.assertEqual([item["body"] for item in self.queue.take(10)], ["5"])
+
+    def test_requeue_recover_and_dead(self):
+        items = self.queue.take(3)
+        self.queue.requeue(items[:1])
+        self.queue.dead(items[1:2], "rejected")
+        self.assertEqual((self.queue.depth(), self.queue.dead_count()), (3, 1))
+        # the worker died holding the third item
+        self.queue.recover()
+        self.assertEqual([item["body"] for item in self.queue.take(10)], ["3", "4", "0", "2"])
+
+
+class HeroImageTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new("RGBA", (1600, 900), (200, 30, 30, 255)).save(buffer, "PNG")
+        self.article = Article.objects.create(title="Comet", content="", published=True)
+        with self.captureOnCommitCallbacks():
+            self.article.hero_image.save("comet.png", ContentFile(buffer.getvalue()))
+
+    def test_pending_job_is_queued_once(self):
+        # two saves while the renditions are pending
+        with self.captureOnCommitCallbacks() as callbacks:
+            images.schedule_renditions(self.article)
+            images.schedule_renditions(self.article)
+        with mock.patch.object(images, "get_executor") as executor:
+            for callback in callbacks:
+                callback()
+        executor.return_value.submit.assert_called_once_with(
+            images._build_in_worker, self.article.pk, self.article.hero_image.name
+        )
+        images._pending.clear()
+
+    def test_build_renditions(self):
+        images.build_renditions(self.article.pk, self.article.hero_image.name)
+        self.article.refresh_from_db()
+        urls = images.rendition_urls(self.article)
+        self.assertEqual(set(urls), set(images.RENDITION_SIZES))
+        self.assertEqual((urls["hero"]["width"], urls["hero"]["height"]), (1280, 720))
+        self.assertEqual((urls["thumb"]["width"], urls["thumb"]["height"]), (320, 180))
+        for entry in self.article.hero_renditions["sizes"].values():
+            self.assertTrue(default_storage.exists(entry["webp"]))
+            self.assertTrue(default_storage.exists(entry["jpeg"]))
+        # a job queued twice finds the work done
+        with mock.patch.object(images, "render_renditions") as render:
+            images.build_renditions(self.article.pk, self.article.hero_image.name)
+        render.assert_not_called()
+
+    def test_buildrenditions_command(self):
+        out = StringIO()
+        call_command("buildrenditions", stdout=out)
+        self.assertIn("Built renditions for 1 articles.", out.getvalue())
+        call_command("buildrenditions", stdout=out)
+        self.assertIn("Built renditions for 0 articles.", out.getvalue())
+        with mock.patch.object(images, "render_renditions", wraps=images.render_renditions) as render:
+            call_command("buildrenditions", "--all", stdout=out)
+        render.assert_called_once()
+        self.assertIn("Built renditions for 1 articles.", out.getvalue().splitlines()[-1])
+        with mock.patch.object(images, "render_renditions", side_effect=OSError("broken image")):
+            with self.assertLogs("apps.news.images", "ERROR"):
+                call_command("buildrenditions", "--all", stdout=out)
+        self.assertIn("Built renditions for 0 articles.", out.getvalue().splitlines()[-1])
+        self.article.refresh_from_db()
+        self.assertIsNotNone(images.rendition_urls(self.article))
+
+
+class RelatedArticleTests(TestCase):
+    def test_score(self):
+        tags = {1: {10, 11}, 2: {10, 11}, 3: {10}, 4: {12}}
+        postings = {10: [1, 2, 3], 11: [1, 2], 12: [4]}
+        idf = dict.fromkeys(postings, 1.0)
+        categories = {1: 5, 2: None, 3: 5, 4: 5}
+        [(first, same_tags), (second, same_category)] = related.score(1, tags, categories, postings, idf, top_k=10)
+        self.assertEqual((first, second), (2, 3))
+        self.assertAlmostEqual(same_tags, 1.0)
+        self.assertAlmostEqual(same_category, 1 / 2**0.5 + related.CATEGORY_WEIGHT)
+        self.assertEqual(related.score(1, tags, categories, postings, idf, top_k=1), [(2, same_tags)])
+        self.assertEqual(related.score(4, tags, categories, postings, idf, top_k=10), [])
+
+    @override_settings(NEWS_RELATED_INCREMENTAL=False)
+    def test_buildrelated_and_view(self):
+        space, oceans = Tag.objects.create(name="Space"), Tag.objects.create(name="Oceans")
+        comets, asteroids, tides, draft = (
+            Article.objects.create(title=title, content="", published=published)
+            for title, published in (("Comets", True), ("Asteroids", True), ("Tides", True), ("Draft", False))
+        )
+        comets.tags.set([space, oceans])
+        asteroids.tags.set([space, oceans])
+        tides.tags.set([oceans])
+        draft.tags.set([space, oceans])
+        out = StringIO()
+        call_command("buildrelated", stdout=out)
+        self.assertIn("Rebuilt related articles of 3 articles.", out.getvalue())
+
+        response = self.client.get("/api/news/articles/comets/related/")
+        self.assertEqual([item["slug"] for item in response.json()], ["asteroids", "tides"])
+        self.assertEqual(self.client.get("/api/news/articles/draft/related/").status_code, 404)
+        self.assertEqual(self.client.get("/api/news/articles/missing/related/").status_code, 404)
+
+        tides.tags.clear()
+        call_command("buildrelated", article=comets.pk, stdout=StringIO())
+        response = self.client.get("/api/news/articles/comets/related/")
+        self.assertEqual([item["slug"] for item in response.json()], ["asteroids"])
+
+    @override_settings(NEWS_RELATED_INCREMENTAL=False)
+    def test_rebuild_for_chunks_candidates(self):
+        space = Tag.objects.create(name="Space")
+        articles = [Article.objects.create(title=f"Article {n}", content="", published=True) for n in range(7)]
+        for n, article in enumerate(articles):
+            article.tags.set([space, Tag.objects.get_or_create(name=f"Tag {n % 3}")[0]])
+        related.rebuild_for(articles[0].pk)
+        expected = list(articles[0].related_entries.order_by("rank").values_list("related_id", "score"))
+        self.assertEqual(len(expected), 6)
+
+        with mock.patch.object(related, "ID_BATCH_SIZE", 2), self.assertNumQueries(18):
+            related.rebuild_for(articles[0].pk)
+        self.assertEqual(list(articles[0].related_entries.order_by("rank").values_list("related_id", "score")), expected)
+
+
+class ArticleFilterTests(TestCase):
+    """Anonymous requests filter ArticleDocument, staff requests filter Article."""
+
+    def setUp(self):
+        self.staff = User.objects.create(username="editor", is_staff=True)
+        news = Category.objects.create(name="News")
+        python, django, rust = (Tag.objects.create(name=name) for name in ("Python", "Django", "Rust"))
+        for title, tags in (("both", [python, django]), ("python", [python]), ("rust", [rust])):
+            article = Article.objects.create(title=title, content="body", author=self.staff, category=news, published=True)
+            article.tags.set(tags)
+
+    def slugs(self, **params):
+        response = self.client.get("/api/news/articles/", params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item["slug"] for item in response.json()["results"])
+
+    def assertFiltered(self, params, expected):
+        self.client.logout()
+        self.assertEqual(self.slugs(**params), expected)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.slugs(**params), expected)
+
+    def test_tag_filters(self):
+        self.assertFiltered({"tags__slug": "python"}, ["both", "python"])
+        self.assertFiltered({"tags__slug": "python,django"}, ["both"])
+        self.assertFiltered({"tags__any": "django,rust"}, ["both", "rust"])
+        self.assertFiltered({"tags__slug": "python,missing"}, [])
+
+    def test_other_filters(self):
+        self.assertFiltered({"category__slug": "news", "author__id": self.staff.pk}, ["both", "python", "rust"])
+        self.assertFiltered({"category__slug": "missing"}, [])
+        self.assertFiltered({"author__id": self.staff.pk + 1}, [])
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            NEWS_FEEDS_ROOT=os.path.join(directory.name, "feeds"),
+            NEWS_SITEMAPS_ROOT=os.path.join(directory.name, "sitemaps"),
+            NEWS_SITE_URL="http://example.com",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        science = Category.objects.create(name="Science")
+        space = Tag.objects.create(name="Space")
+        self.article = Article.objects.create(title="Comets", content="body", category=science, published=True)
+        self.article.tags.set([space])
+        Article.objects.create(title="Draft", content="body", category=science)
+
+    def body(self, url):
+        return b"".join(self.client.get(url).streaming_content)
+
+    def test_feeds_and_sitemaps(self):
+        feeds.rebuild_all()
+        rss = self.client.get("/feeds/rss/category/science.xml")
+        self.assertEqual(rss.status_code, 200)
+        body = b"".join(rss.streaming_content)
+        self.assertIn(b"http://example.com/api/news/articles/comets/", body)
+        self.assertNotIn(b"draft", body)
+        self.assertEqual(self.client.get("/feeds/atom/tag/space.xml").status_code, 200)
+
+        # at the root, so that the listed article URLs are below the sitemaps
+        self.assertEqual(self.body("/robots.txt"), b"Sitemap: http://example.com/sitemap.xml\n")
+        page = feeds.sitemap_page(self.article.pk)
+        self.assertIn(f"<loc>http://example.com/sitemap-articles-{page}.xml</loc>".encode(), self.body("/sitemap.xml"))
+        sitemap = self.body(f"/sitemap-articles-{page}.xml")
+        self.assertIn(b"<loc>http://example.com/api/news/articles/comets/</loc>", sitemap)
+
+        etag = self.client.get("/feeds/rss/all.xml")["ETag"]
+        self.assertEqual(self.client.get("/feeds/rss/all.xml", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_unchanged_feeds_keep_their_validators(self):
+        self.article.tags.clear()
+        documents.refresh([self.article.pk])
+        feeds.rebuild_all()
+        # an empty feed is dated by a fixed date, not by the time it was written
+        empty = self.body("/feeds/rss/tag/space.xml")
+        self.assertNotIn(b"<item>", empty)
+        self.assertIn(b"<lastBuildDate>Thu, 01 Jan 1970 00:00:00 +0000</lastBuildDate>", empty)
+        etag = self.client.get("/feeds/rss/all.xml")["ETag"]
+        empty = self.client.get("/feeds/rss/tag/space.xml")["ETag"]
+        feeds.regenerate(site=True, categories=["science"], tags=["space"], article_ids=[self.article.pk])
+        self.assertEqual(self.client.get("/feeds/rss/all.xml")["ETag"], etag)
+        self.assertEqual(self.client.get("/feeds/rss/tag/space.xml")["ETag"], empty)
+        self.assertEqual(self.client.get("/feeds/missing.xml").status_code, 404)
+
+    def test_scheduled_article_is_listed_once_due(self):
+        feeds.rebuild_all()
+        Article.objects.filter(pk=self.article.pk).update(publish_at=timezone.now() + timedelta(days=1))
+        documents.refresh([self.article.pk])
+        feeds.rebuild_all()
+        self.assertNotIn(b"comets", self.body("/feeds/rss/all.xml"))
+
+        out = StringIO()
+        call_command("buildfeeds", due=10, stdout=out)
+        self.assertIn("for 0 articles", out.getvalue())
+        ArticleDocument.objects.filter(article=self.article).update(publish_at=timezone.now() - timedelta(minutes=1))
+        Article.objects.filter(pk=self.article.pk).update(publish_at=timezone.now() - timedelta(minutes=1))
+        call_command("buildfeeds", due=10, stdout=out)
+        self.assertIn("for 1 articles", out.getvalue())
+        self.assertIn(b"comets", self.body("/feeds/rss/all.xml"))
+        self.assertIn(b"comets", self.body("/feeds/rss/tag/space.xml"))
+
+
+@override_settings(VIEW_COUNTER={"START_WORKER": False})
+class ViewCounterTests(TestCase):
+    def test_flush_adds_buffered_views_and_ranks_by_decayed_score(self):
+        old, new = Article.objects.bulk_create(
+            [Article(title="old", slug="old", content="body", published=True),
+             Article(title="new", slug="new", content="body", published=True)]
+        )
+        half_life = view_counter.get_config()["HALF_LIFE"]
+        view_counter.write({old.pk: 8}, now=1000.0)
+        view_counter.write({old.pk: 1, new.pk: 3}, now=1000.0 + 2 * half_life)
+
+        old.refresh_from_db()
+        new.refresh_from_db()
+        self.assertEqual((old.view_count, new.view_count), (9, 3))
+        # 8 views two half-lives ago are worth 2 now
+        self.assertAlmostEqual(old.trending_score, 3.0)
+        self.assertAlmostEqual(new.trending_score, 3.0)
+
+    def test_cache_buffer_drains_closed_windows_once(self):
+        cache.clear()
+        buffer = view_counter.CacheViewBuffer("default", window=5.0)
+        with mock.patch.object(view_counter.time, "time", return_value=1000.0):
+            buffer.add(1)
+            buffer.add(1, 2)
+            buffer.add(2)
+            self.assertEqual(buffer.pending(), 4)
+            # the window is still open
+            self.assertEqual(buffer.drain(), {})
+        with mock.patch.object(view_counter.time, "time", return_value=1010.0):
+            buffer.add(1)
+            # another process is draining
+            cache.add("news:views:drain-lock", 1)
+            self.assertEqual(buffer.drain(), {})
+            cache.delete("news:views:drain-lock")
+            self.assertEqual(buffer.drain(), {1: 3, 2: 1})
+            self.assertEqual(buffer.drain(), {})
+            self.assertEqual(buffer.pending(), 1)
+        # drained windows leave no keys behind
+        self.assertEqual(cache.get_many(["news:views:200:slots", "news:views:200:slots:1", "news:views:200:1"]), {})
+        with mock.patch.object(view_counter.time, "time", return_value=1030.0):
+            self.assertEqual(buffer.drain(), {1: 1})
+
+    def test_record_is_buffered_until_flush(self):
+        article = Article.objects.create(title="read me", content="body", published=True)
+        view_counter.get_buffer().drain()
+        for _ in range(3):
+            view_counter.record(article.pk)
+        article.refresh_from_db()
+        self.assertEqual(article.view_count, 0)
+
+        self.assertEqual(view_counter.flush(), 3)
+        article.refresh_from_db()
+        self.assertEqual(article.view_count, 3)
@@ -0,0 +1,13 @@
+from rest_framework.routers import DefaultRouter
+
+from .views import ArticleViewSet, CategoryViewSet, CommentViewSet, TagViewSet
+
+app_name = "news"
+
+router = DefaultRouter()
+router.register("articles", ArticleViewSet, basename="article")
+router.register("categories", CategoryViewSet, basename="category")
+router.register("tags", TagViewSet, basename="tag")
+router.register("comments", CommentViewSet, basename="comment")
+
+urlpatterns = router.urls
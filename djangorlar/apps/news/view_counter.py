@@ -0,0 +1,245 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.db.models import Case, F, FloatField, PositiveBigIntegerField, Value, When
+from django.db.models.functions import Greatest, Power
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # "memory" buffers increments in this process; "cache" buffers them in a
+    # shared cache so any one process (or `manage.py flushviews`) can write them.
+    "BACKEND": "memory",
+    "CACHE": "default",
+    "FLUSH_INTERVAL": 5.0,
+    "BATCH_SIZE": 500,
+    "START_WORKER": True,
+    # trending scores halve every HALF_LIFE seconds without new views
+    "HALF_LIFE": 6 * 3600,
+}
+# exponent floor of the decay factor, 2 ** -60 is zero for ranking purposes and
+# keeps POWER() clear of floating point underflow errors on some databases
+MIN_DECAY_EXPONENT = -60.0
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "VIEW_COUNTER", {})}
+
+
+class MemoryViewBuffer:
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, article_id, count=1):
+        with self._lock:
+            self._counts[article_id] += count
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return dict(counts)
+
+    def restore(self, counts):
+        with self._lock:
+            self._counts.update(counts)
+
+    def pending(self):
+        with self._lock:
+            return sum(self._counts.values())
+
+
+class CacheViewBuffer:
+    """Counters kept in a shared cache, one atomic ``incr`` per view.
+
+    Views are counted in time windows of ``window`` seconds. The cache has no
+    way to list keys, so the first increment of an article in a window
+    registers its id in a numbered slot of that window. ``drain`` takes the
+    windows before the previous one, which no process increments any more,
+    and deletes their keys, so the cache only holds unflushed views. One
+    process drains at a time, under a lock in the cache; the others find
+    nothing to drain. Windows older than ``BACKLOG`` seconds, and evicted
+    counters, lose their views, which is acceptable for statistics.
+    """
+
+    prefix = "news:views"
+    # seconds a drain may hold the lock before another process may start one
+    LOCK_TIMEOUT = 60
+    BACKLOG = 24 * 3600
+
+    def __init__(self, alias, window=5.0):
+        self.cache = caches[alias]
+        self.window = window
+
+    def _window(self):
+        return int(time.time() // self.window)
+
+    def _key(self, window, article_id):
+        return f"{self.prefix}:{window}:{article_id}"
+
+    def _slots_key(self, window):
+        return f"{self.prefix}:{window}:slots"
+
+    def add(self, article_id, count=1):
+        window = self._window()
+        key = self._key(window, article_id)
+        if self.cache.add(key, 0, None):
+            self.cache.add(self._slots_key(window), 0, None)
+            slot = self.cache.incr(self._slots_key(window))
+            self.cache.set(f"{self._slots_key(window)}:{slot}", article_id, None)
+        try:
+            self.cache.incr(key, count)
+        except ValueError:
+            # evicted between add() and incr()
+            self.cache.set(key, count, None)
+
+    def _read(self, windows):
+        """Views buffered in ``windows`` and every key holding them."""
+        slots_keys = {self._slots_key(window): window for window in windows}
+        slot_keys = {
+            f"{slots_key}:{slot}": slots_keys[slots_key]
+            for slots_key, slots in self.cache.get_many(list(slots_keys)).items()
+            for slot in range(1, slots + 1)
+        }
+        counter_keys = {
+            self._key(slot_keys[slot_key], article_id): article_id
+            for slot_key, article_id in self.cache.get_many(list(slot_keys)).items()
+        }
+        counts = Counter()
+        for key, count in self.cache.get_many(list(counter_keys)).items():
+            if count > 0:
+                counts[counter_keys[key]] += count
+        return dict(counts), [*slots_keys, *slot_keys, *counter_keys]
+
+    def _pending_windows(self, last):
+        drained = self.cache.get(f"{self.prefix}:drained")
+        first = last - int(self.BACKLOG // self.window)
+        if drained is not None:
+            first = max(first, drained)
+        return range(first + 1, last + 1)
+
+    def drain(self):
+        lock = f"{self.prefix}:drain-lock"
+        if not self.cache.add(lock, 1, self.LOCK_TIMEOUT):
+            return {}
+        try:
+            # the current and the previous window may still be incremented
+            # by requests that read the clock a moment ago
+            last = self._window() - 2
+            counts, keys = self._read(self._pending_windows(last))
+            self.cache.set(f"{self.prefix}:drained", last, None)
+            self.cache.delete_many(keys)
+            return counts
+        finally:
+            self.cache.delete(lock)
+
+    def restore(self, counts):
+        for article_id, count in counts.items():
+            self.add(article_id, count)
+
+    def pending(self):
+        counts, _ = self._read(self._pending_windows(self._window()))
+        return sum(counts.values())
+
+
+_buffer = None
+_worker = None
+_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    with _lock:
+        if _buffer is None:
+            config = get_config()
+            if config["BACKEND"] == "cache":
+                _buffer = CacheViewBuffer(config["CACHE"], config["FLUSH_INTERVAL"])
+            else:
+                _buffer = MemoryViewBuffer()
+                # a memory buffer dies with the process, write it out on the way
+                atexit.register(_flush_quietly)
+        return _buffer
+
+
+def record(article_id):
+    """Count one read of ``article_id``; nothing touches the database."""
+    get_buffer().add(article_id)
+    if get_config()["START_WORKER"]:
+        ensure_worker()
+
+
+def decay_factor(now, half_life):
+    """Expression for 2 ** ((trending_at - now) / half_life)."""
+    exponent = (F("trending_at") - Value(now)) / Value(float(half_life))
+    return Power(Value(2.0), Greatest(exponent, Value(MIN_DECAY_EXPONENT), output_field=FloatField()))
+
+
+def write(counts, now=None):
+    """Apply ``{article_id: views}`` with one UPDATE per batch.
+
+    ``view_count`` gets the increment, and ``trending_score`` is decayed from
+    ``trending_at`` to ``now`` before adding it, all inside the statement, so
+    concurrent flushes from several processes never overwrite each other.
+    """
+    from .models import Article
+
+    config = get_config()
+    now = time.time() if now is None else now
+    items = sorted(counts.items())
+    for start in range(0, len(items), config["BATCH_SIZE"]):
+        batch = items[start:start + config["BATCH_SIZE"]]
+        whens = [When(pk=article_id, then=Value(count)) for article_id, count in batch]
+        Article.objects.filter(pk__in=[article_id for article_id, _ in batch]).update(
+            view_count=F("view_count") + Case(*whens, default=Value(0), output_field=PositiveBigIntegerField()),
+            trending_score=F("trending_score") * decay_factor(now, config["HALF_LIFE"])
+            + Case(*whens, default=Value(0), output_field=FloatField()),
+            trending_at=now,
+        )
+
+
+def flush():
+    """Write everything buffered so far; returns the number of views written."""
+    buffer = get_buffer()
+    counts = buffer.drain()
+    if not counts:
+        return 0
+    try:
+        write(counts)
+    except Exception:
+        buffer.restore(counts)
+        raise
+    return sum(counts.values())
+
+
+def _flush_quietly():
+    try:
+        flush()
+    except Exception:
+        logger.exception("Could not write buffered article views")
+    finally:
+        close_old_connections()
+
+
+def run_worker(stop_event=None):
+    config = get_config()
+    while stop_event is None or not stop_event.is_set():
+        time.sleep(config["FLUSH_INTERVAL"])
+        _flush_quietly()
+
+
+def ensure_worker():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, name="view-counter", daemon=True)
+            _worker.start()
+
+
+def stats():
+    return {"backend": get_config()["BACKEND"], "pending": get_buffer().pending()}
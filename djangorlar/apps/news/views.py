@@ -1,8 +1,21 @@
-from rest_framework import viewsets, permissions, filters, status
+import time
+
+from django.conf import settings
+from django.db.models import F, Prefetch
+from django.http import Http404
+from django.utils import timezone
+from apps.abstracts import static
+from apps.abstracts.static import StaticResolver
+from apps.abstracts.throttling import TokenBucketThrottle
+from rest_framework import viewsets, mixins, permissions, filters, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
-from .models import Article, Category, Tag, Comment
+from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
+from . import comment_queue, documents, lookup_cache, page_cache, view_counter
+from .filters import ArticleDocumentFilter, ArticleFilter
+from .models import Article, Category, Tag, Comment, RelatedArticle
 from .serializers import (
     ArticleListSerializer,
     ArticleDetailSerializer,
@@ -10,6 +23,7 @@ from .serializers import (
     CategorySerializer,
     TagSerializer,
     CommentSerializer,
+    RelatedArticleSerializer,
 )
 
 
@@ -29,13 +43,22 @@ class IsAdminOrReadOnly(permissions.BasePermission):
 
 
 class ArticleViewSet(viewsets.ModelViewSet):
-    queryset = Article.objects.select_related("category", "author").prefetch_related("tags")
+    # category and tags come from lookup_cache; see CachedTaxonomyMixin
+    queryset = Article.objects.select_related("author")
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (filters.SearchFilter, filters.OrderingFilter)
-    filterset_fields = ("category__slug", "tags__slug", "author__id", "published")
+    filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
+    filterset_class = ArticleFilter
     search_fields = ("title", "summary", "content")
     ordering_fields = ("publish_at", "created_at", "is_featured")
     pagination_class = StandardResultsSetPagination
+    lookup_field = "slug"
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scopes = {"list": "news.article.list"}
+
+    def get_throttle_scope(self):
+        if self.action == "list" and self.request.query_params.get("search"):
+            return "news.article.search"
+        return self.throttle_scopes.get(self.action)
 
     def get_serializer_class(self):
         if self.action in ("list",):
@@ -49,15 +72,186 @@ class ArticleViewSet(viewsets.ModelViewSet):
         # if not admin, only show published articles
         if not (self.request.user and self.request.user.is_staff):
             qs = qs.filter(published=True, publish_at__lte=timezone.now())
+        if self.action == "retrieve":
+            # comments show once a moderator approves them, see CommentViewSet.approve
+            qs = qs.prefetch_related(Prefetch("comments", queryset=Comment.objects.filter(approved=True)))
         return qs
 
+    def get_object(self):
+        return lookup_cache.attach_tag_ids([super().get_object()])[0]
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            page = lookup_cache.attach_tag_ids(page)
+        return page
+
+    def list(self, request, *args, **kwargs):
+        # Staff also see drafts, which have no ArticleDocument.
+        if request.user and request.user.is_staff:
+            return super().list(request, *args, **kwargs)
+        return Response(page_cache.cached(request, lambda: self.list_documents(request)))
+
+    def list_documents(self, request):
+        filterset = ArticleDocumentFilter(request.query_params, documents.visible(), request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        queryset = documents.search(filterset.qs, filters.SearchFilter().get_search_terms(request))
+        queryset = filters.OrderingFilter().filter_queryset(request, queryset, self)
+        page = self.paginator.paginate_queryset(queryset.values_list("payload", flat=True), request, view=self)
+        return self.get_paginated_response([documents.absolutize(payload, request) for payload in page]).data
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        view_counter.record(instance.pk)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        """Most read articles, each view decaying with VIEW_COUNTER["HALF_LIFE"]."""
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        half_life = view_counter.get_config()["HALF_LIFE"]
+        now = time.time()
+        articles = (
+            self.get_queryset()
+            # older scores have decayed below anything worth ranking
+            .filter(trending_at__gte=now + view_counter.MIN_DECAY_EXPONENT * half_life, trending_score__gt=0)
+            .annotate(trending=F("trending_score") * view_counter.decay_factor(now, half_life))
+            .order_by("-trending")[:limit]
+        )
+        articles = lookup_cache.attach_tag_ids(articles)
+        return Response(ArticleListSerializer(articles, many=True, context={"request": request}).data)
+
     @action(detail=False, methods=["get"], url_path="featured")
     def featured(self, request):
-        featured_qs = self.get_queryset().filter(is_featured=True)[:10]
-        page = self.paginate_queryset(featured_qs)
-        serializer = ArticleListSerializer(page, many=True, context={"request": request})
-        return self.get_paginated_response(serializer.data)
+        def render_page():
+            featured_qs = self.get_queryset().filter(is_featured=True)[:10]
+            page = self.paginate_queryset(featured_qs)
+            serializer = ArticleListSerializer(page, many=True, context={"request": request})
+            return self.get_paginated_response(serializer.data).data
+
+        if request.user and request.user.is_staff:
+            return Response(render_page())
+        return Response(page_cache.cached(request, render_page))
+
+    @action(detail=True, methods=["get"])
+    def related(self, request, slug=None):
+        """Precomputed neighbours of a visible article, from the (article, rank) index."""
+        # 404 for unknown slugs and, unless staff, drafts; the tags aren't needed
+        article = super().get_object()
+        now = timezone.now()
+        entries = (
+            RelatedArticle.objects.filter(article=article, related__published=True, related__publish_at__lte=now)
+            .select_related("related")
+            .only("score", "rank", "related__id", "related__title", "related__slug", "related__summary", "related__publish_at")
+            .order_by("rank")
+        )
+        return Response(RelatedArticleSerializer(entries, many=True, context={"request": request}).data)
+
 
+class CachedLookupViewSet(viewsets.ReadOnlyModelViewSet):
+    """Read-only viewset served from lookup_cache instead of the database."""
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+    pagination_class = StandardResultsSetPagination
+    lookup_field = "slug"
+
+    def get_cached_list(self):
+        raise NotImplementedError
+
+    def get_cached_object(self, slug):
+        raise NotImplementedError
+
+    def get_queryset(self):
+        return self.get_cached_list()
+
+    def get_object(self):
+        obj = self.get_cached_object(self.kwargs[self.lookup_field])
+        if obj is None:
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class CategoryViewSet(CachedLookupViewSet):
     queryset = Category.objects.all()
+    serializer_class = CategorySerializer
+
+    def get_cached_list(self):
+        return lookup_cache.categories()
+
+    def get_cached_object(self, slug):
+        return lookup_cache.category_by_slug(slug)
+
+
+class TagViewSet(CachedLookupViewSet):
+    queryset = Tag.objects.all()
+    serializer_class = TagSerializer
+
+    def get_cached_list(self):
+        return lookup_cache.tags()
+
+    def get_cached_object(self, slug):
+        return lookup_cache.tag_by_slug(slug)
+
+
+class CommentViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Approved comments are public; anyone may post a comment for moderation.
+
+    Posted comments are validated and queued, then written in batches by the
+    comment queue worker, so bursts of posts don't hold the write lock.
+    """
+
+    queryset = Comment.objects.filter(approved=True).select_related("user")
+    serializer_class = CommentSerializer
+    pagination_class = StandardResultsSetPagination
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scopes = {"create": "news.comment.create"}
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pending_id = comment_queue.enqueue(serializer.validated_data)
+        return Response({"pending_id": pending_id, "status": "pending"}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=["get"], url_path=r"pending/(?P<pending_id>[0-9a-f]{32})")
+    def pending(self, request, pending_id=None):
+        comment = Comment.objects.filter(ingest_id=pending_id).values("id", "approved").first()
+        if comment:
+            return Response({"pending_id": pending_id, "status": "stored", **comment})
+        if comment_queue.get_queue().contains(pending_id):
+            return Response({"pending_id": pending_id, "status": "pending"})
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def queue(self, request):
+        return Response(comment_queue.stats())
+
+    @action(detail=False, methods=["post"], permission_classes=[permissions.IsAdminUser])
+    def approve(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return Response({"ids": "Expected a list of comment ids."}, status=status.HTTP_400_BAD_REQUEST)
+        approved = Comment.objects.filter(id__in=ids, approved=False).update(approved=True)
+        return Response({"approved": approved})
+
+
+
+def feed_file(request, path):
+    """Pre-generated feeds and sitemaps, with ETag and Last-Modified.
+
+    In production the static wrapper serves NEWS_FEEDS_URL before Django;
+    this view covers the development server.
+    """
+    return static.serve(request, StaticResolver([(settings.NEWS_FEEDS_URL, settings.NEWS_FEEDS_ROOT)]))
+
+
+def sitemap_file(request):
+    """The sitemap index, its pages and robots.txt, at the root of the site.
+
+    Served by the static wrapper in production, like ``feed_file``.
+    """
+    return static.serve(request, StaticResolver([("/", settings.NEWS_SITEMAPS_ROOT)]))
@@ -4,8 +4,10 @@ from typing import Optional
 # Django modules
 from django.contrib.admin import ModelAdmin, register
 from django.core.handlers.wsgi import WSGIRequest
+from django.db.models import QuerySet
 
 # Project modules
+from apps.abstracts.admin import VersionedModelAdmin
 from .models import Task, UserTask, Project
 
 
@@ -108,17 +110,21 @@ class ProjectAdmin(ModelAdmin):
 
 
 @register(Task)
-class TaskAdmin(ModelAdmin):
+class TaskAdmin(VersionedModelAdmin):
     """
     Task admin configuration class.
     """
 
     list_display = (
-        "id", "name", "status", "parent", "project",
+        "id", "name", "status", "parent", "project", "version",
     )
     list_display_links = (
         "id",
     )
+    list_select_related = (
+        "parent",
+        "project",
+    )
     list_per_page = 50
     search_fields = (
         "id",
@@ -135,15 +141,13 @@ class TaskAdmin(ModelAdmin):
     )
     list_editable = (
         "status",
+        "version",
     )
     readonly_fields = (
         "created_at",
         "updated_at",
         "deleted_at",
     )
-    filter_horizontal = (
-        "assignees",
-    )
     save_on_top = True
     fieldsets = (
         (
@@ -245,6 +249,14 @@ class UserTaskAdmin(ModelAdmin):
         )
     )
 
+    def get_queryset(self, request: WSGIRequest) -> QuerySet:
+        """Assignments, including the removed ones kept as tombstones."""
+        queryset = UserTask.objects.all()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
     def has_add_permission(self, request: WSGIRequest) -> bool:
         """Add permissions."""
         if request.user.is_superuser:
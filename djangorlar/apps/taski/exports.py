@@ -0,0 +1,25 @@
+# Project modules
+from apps.abstracts.exporters import ExportSpec, ManyColumn, RelatedColumn
+from .models import Project, Task, UserTask
+
+
+TASK_EXPORT = ExportSpec(
+    queryset=lambda: Task.objects.all(),
+    columns={
+        "id": "id",
+        "name": "name",
+        "description": "description",
+        "status": "status",
+        "parent": "parent_id",
+        "project": RelatedColumn("project_id", Project, "name"),
+        "assignees": ManyColumn(
+            UserTask,
+            "task_id",
+            "user__username",
+            filters={"deleted_at__isnull": True},
+        ),
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+        "deleted_at": "deleted_at",
+    },
+)
@@ -0,0 +1,209 @@
+# Python modules
+import os
+import tempfile
+from random import randint, sample
+from statistics import mean, median
+from time import perf_counter
+from typing import Any
+
+# Django modules
+from django.core.management.base import BaseCommand, CommandParser
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.abstracts.benchmarks import percentile
+from apps.taski.models import Project, Task, UserTask
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a large assignment dataset into a throw-away test database "
+        "and times the inbox query. On SQLite the database is a file, as "
+        "in production, not the in-memory test database."
+    )
+
+    DEFAULT_USERS = 20_000
+    DEFAULT_ASSIGNMENTS = 1_000_000
+    DEFAULT_ASSIGNEES_PER_TASK = 5
+    DEFAULT_PROJECTS = 200
+    DEFAULT_SAMPLES = 200
+    BATCH_SIZE = 10_000
+    USERNAME_PREFIX = "bench-inbox"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Command line arguments."""
+
+        parser.add_argument("--users", type=int, default=self.DEFAULT_USERS)
+        parser.add_argument(
+            "--assignments",
+            type=int,
+            default=self.DEFAULT_ASSIGNMENTS,
+        )
+        parser.add_argument(
+            "--assignees-per-task",
+            type=int,
+            default=self.DEFAULT_ASSIGNEES_PER_TASK,
+        )
+        parser.add_argument(
+            "--projects",
+            type=int,
+            default=self.DEFAULT_PROJECTS,
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=self.DEFAULT_SAMPLES,
+        )
+        parser.add_argument(
+            "--database-file",
+            default=os.path.join(tempfile.gettempdir(), "djangorlar-benchinbox.sqlite3"),
+            help="SQLite file of the throw-away database, removed afterwards.",
+        )
+
+    def __bulk_insert(self, model: Any, rows: list[Any]) -> None:
+        """Insert rows in fixed size batches."""
+
+        with transaction.atomic():
+            model.objects.bulk_create(rows, batch_size=self.BATCH_SIZE)
+
+    def __seed(
+        self,
+        user_count: int,
+        assignment_count: int,
+        per_task: int,
+        project_count: int,
+    ) -> None:
+        """Creates users, projects, tasks and assignments."""
+
+        started = perf_counter()
+        self.__bulk_insert(
+            User,
+            [
+                User(
+                    username=f"{self.USERNAME_PREFIX}-{i}",
+                    password="!",
+                )
+                for i in range(user_count)
+            ],
+        )
+        user_ids: list[int] = list(
+            User.objects.filter(
+                username__startswith=self.USERNAME_PREFIX,
+            ).values_list("id", flat=True)
+        )
+        self.__bulk_insert(
+            Project,
+            [
+                Project(
+                    name=f"{self.USERNAME_PREFIX} project {i}",
+                    author_id=user_ids[i % len(user_ids)],
+                )
+                for i in range(project_count)
+            ],
+        )
+        project_ids: list[int] = list(
+            Project.objects.filter(
+                name__startswith=self.USERNAME_PREFIX,
+            ).values_list("id", flat=True)
+        )
+
+        task_count = max(assignment_count // per_task, 1)
+        created = 0
+        while created < task_count:
+            chunk = min(self.BATCH_SIZE, task_count - created)
+            tasks = Task.objects.bulk_create(
+                [
+                    Task(
+                        name=f"{self.USERNAME_PREFIX} task {created + i}",
+                        status=randint(Task.STATUS_TODO, Task.STATUS_DONE),
+                        project_id=project_ids[
+                            (created + i) % len(project_ids)
+                        ],
+                    )
+                    for i in range(chunk)
+                ],
+            )
+            self.__bulk_insert(
+                UserTask,
+                [
+                    UserTask(task_id=task.id, user_id=user_id)
+                    for task in tasks
+                    for user_id in sample(user_ids, per_task)
+                ],
+            )
+            created += chunk
+            self.stdout.write(f"Seeded {created}/{task_count} tasks.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {user_count} users and {task_count * per_task} "
+                f"assignments in {perf_counter() - started:.1f}s."
+            )
+        )
+
+    def __explain(self, user: User) -> str:
+        """Query plan of the inbox query."""
+
+        sql, params = Task.objects.inbox(user)[:50].query.sql_with_params()
+        prefix = (
+            "EXPLAIN QUERY PLAN"
+            if connection.vendor == "sqlite"
+            else "EXPLAIN"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return "\n".join(str(row) for row in cursor.fetchall())
+
+    def handle(self, *args: tuple[Any, ...], **options: dict[str, Any]) -> None:
+        """Command entry point."""
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        if connection.vendor == "sqlite":
+            connection.settings_dict["TEST"]["NAME"] = options["database_file"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.__seed(
+                options["users"],
+                options["assignments"],
+                options["assignees_per_task"],
+                options["projects"],
+            )
+            # planner statistics, as a long-lived database has them
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            self.__measure(options["samples"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def __measure(self, samples: int) -> None:
+        """Time the first inbox page of ``samples`` random users."""
+
+        users: list[User] = list(
+            User.objects.filter(username__startswith=self.USERNAME_PREFIX)
+            .order_by("?")[:samples]
+        )
+        if not users:
+            self.stdout.write(self.style.ERROR("No benchmark users found."))
+            return
+
+        timings: list[float] = []
+        user: User
+        for user in users:
+            started = perf_counter()
+            list(Task.objects.inbox(user)[:50])
+            timings.append((perf_counter() - started) * 1000)
+        timings.sort()
+
+        self.stdout.write(self.__explain(users[0]))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"inbox first page over {len(timings)} users: "
+                f"mean={mean(timings):.2f}ms "
+                f"p50={median(timings):.2f}ms "
+                f"p95={percentile(timings, 0.95):.2f}ms "
+                f"max={timings[-1]:.2f}ms"
+            )
+        )
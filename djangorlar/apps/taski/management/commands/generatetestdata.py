@@ -1,13 +1,15 @@
 # Python modules
 from random import choice, choices
+from typing import Any
 
 # Django modules
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandParser
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from django.db.models import QuerySet
 
-from apps.taski.models import Project, Task, UserTask
+from apps.taski.models import Project, SyncCounter, Task, UserTask
 
 
 class Command(BaseCommand):
@@ -99,10 +101,12 @@ class Command(BaseCommand):
                     author=author,
                 )
             )
-        Project.objects.bulk_create(
-            created_projects,
-            ignore_conflicts=True,
-        )
+        # the counter row stays locked until the rows are in
+        with transaction.atomic():
+            Project.objects.bulk_create(
+                SyncCounter.objects.stamp(created_projects),
+                ignore_conflicts=True,
+            )
 
         project: Project
 
@@ -120,7 +124,7 @@ class Command(BaseCommand):
         """Generates users for testing purposes."""
 
         created_tasks: list[Task] = []
-        created_usertasks: list[UserTask] = 0
+        created_usertasks: list[UserTask] = []
         tasks_before_cnt = Task.objects.count()
         test_users: QuerySet[User] = User.objects.all()
         existed_projects: QuerySet[Project] = Project.objects.all()
@@ -133,15 +137,16 @@ class Command(BaseCommand):
                 Task(
                     name=name,
                     description=description,
-                    status=choice(self.STATUS_CHOICES),
+                    status=choice(tuple(self.STATUS_CHOICES)),
                     project=project,
 
                 )
             )
-        Task.objects.bulk_create(
-            created_tasks,
-            ignore_conflicts=True,
-        )
+        with transaction.atomic():
+            Task.objects.bulk_create(
+                SyncCounter.objects.stamp(created_tasks),
+                ignore_conflicts=True,
+            )
 
         task: Task
 
@@ -149,14 +154,16 @@ class Command(BaseCommand):
             chosen_users = choices(test_users, k=5)
             user: User
             for user in chosen_users:
-                task.assignees.add(user)
-                UserTask()
-            task.assignees.add(*choices(test_users, k=5))
-            created_usertasks.append(
-                UserTask(
-                    task=task,
-                    user=user,
+                created_usertasks.append(
+                    UserTask(
+                        task=task,
+                        user=user,
+                    )
                 )
+        with transaction.atomic():
+            UserTask.objects.bulk_create(
+                SyncCounter.objects.stamp(created_usertasks),
+                ignore_conflicts=True,
             )
         tasks_after_cnt = Task.objects.count()
         self.stdout.write(
@@ -164,3 +171,17 @@ class Command(BaseCommand):
                 f"Created {tasks_after_cnt - tasks_before_cnt} users."
             )
         )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Command line arguments."""
+
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--projects", type=int, default=20)
+        parser.add_argument("--tasks", type=int, default=20)
+
+    def handle(self, *args: tuple[Any, ...], **options: dict[str, Any]) -> None:
+        """Command entry point."""
+
+        self.__generate_users(user_count=options["users"])
+        self.__generate_projects(project_count=options["projects"])
+        self.__generate_tasks(task_count=options["tasks"])
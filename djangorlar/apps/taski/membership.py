@@ -0,0 +1,150 @@
+# Python modules
+import time
+from typing import Iterable
+
+# Django modules
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+# Project modules
+from .models import MembershipChange, Project, SyncCounter
+
+
+VERSION_KEY = "taski:membership-version:{user_id}"
+CACHE_KEY = "taski:membership:{user_id}:{version}"
+
+
+def version(user_id: int) -> int:
+    """Current generation of a user's membership set, shared by all processes."""
+    key = VERSION_KEY.format(user_id=user_id)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), settings.TASKI_MEMBERSHIP_CACHE_TIMEOUT)
+        value = cache.get(key)
+    return value
+
+
+def cache_key(user_id: int) -> str:
+    """Cache key of a user's membership set under its current version."""
+    return CACHE_KEY.format(user_id=user_id, version=version(user_id))
+
+
+def load(user_id: int) -> frozenset[int]:
+    """
+    Ids of the projects the user authored or joined, one query.
+
+    The joined side is a semi-join on the through table, so a project the
+    user both authored and joined comes back once without ``DISTINCT``.
+    """
+    joined = Project.users.through.objects.filter(user_id=user_id).values("project_id")
+    return frozenset(
+        Project.objects.filter(Q(author_id=user_id) | Q(pk__in=joined))
+        .values_list("id", flat=True)
+    )
+
+
+def project_ids(user_id: int) -> frozenset[int]:
+    """
+    Cached membership set of a user.
+
+    Signals invalidate it whenever ``Project.users`` or a project author
+    changes by bumping the user's version, so a set loaded by another
+    process just before the change is stored under a version nobody reads
+    any more. Both keys live in the default cache, which startup requires
+    to be shared (``REQUIRE_SHARED_CACHE``).
+    """
+    key = cache_key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = load(user_id)
+        cache.set(key, ids, settings.TASKI_MEMBERSHIP_CACHE_TIMEOUT)
+    return ids
+
+
+def is_member(user_id: int, project_id: int) -> bool:
+    """Whether the user authored or joined the project."""
+    return project_id in project_ids(user_id)
+
+
+def _bump(user_ids: set[int]) -> None:
+    for user_id in user_ids:
+        key = VERSION_KEY.format(user_id=user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), settings.TASKI_MEMBERSHIP_CACHE_TIMEOUT)
+
+
+def invalidate(user_ids: Iterable[int]) -> None:
+    """Retire the cached sets of ``user_ids`` once the transaction commits."""
+    user_ids = set(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: _bump(user_ids))
+
+
+def _holding_other_role(role: int, pairs: list[tuple[int, int]]) -> set[tuple[int, int]]:
+    """The ``(project_id, user_id)`` pairs whose user also has the other role."""
+    project_ids = {project_id for project_id, _ in pairs}
+    user_ids = {user_id for _, user_id in pairs}
+    if role == MembershipChange.ROLE_MEMBER:
+        held = Project.objects.filter(pk__in=project_ids, author_id__in=user_ids).values_list("id", "author_id")
+    else:
+        held = Project.users.through.objects.filter(
+            project_id__in=project_ids, user_id__in=user_ids
+        ).values_list("project_id", "user_id")
+    return set(held) & set(pairs)
+
+
+def record(action: int, role: int, pairs: Iterable[tuple[int, int]]) -> None:
+    """
+    Log ``(project_id, user_id)`` membership changes and invalidate the
+    affected users.
+
+    A user gaining or losing one role while holding the other, e.g. the
+    author removed from ``Project.users``, keeps the same membership and is
+    left out: clients drop a project they are told they left.
+
+    The signals call it for saves and ``Project.users`` changes; code going
+    around them (``bulk_create``, ``QuerySet.update``) has to call it itself,
+    after the change.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return
+    unchanged = _holding_other_role(role, pairs)
+    changes = [
+        MembershipChange(
+            project_id=project_id,
+            user_id=user_id,
+            action=action,
+            role=role,
+        )
+        for project_id, user_id in pairs
+        if (project_id, user_id) not in unchanged
+    ]
+    if not changes:
+        return
+    with transaction.atomic():
+        MembershipChange.objects.bulk_create(SyncCounter.objects.stamp(changes))
+    invalidate(change.user_id for change in changes)
+
+
+def changes_since(user_id: int, since: int, limit: int) -> list[MembershipChange]:
+    """The user's membership changes after the ``since`` cursor, oldest first."""
+    return list(
+        MembershipChange.objects.filter(user_id=user_id, id__gt=since)
+        .order_by("id")[:limit]
+    )
+
+
+def latest_change_id(user_id: int) -> int:
+    """Cursor of the user's newest membership change, ``0`` if none."""
+    latest = (
+        MembershipChange.objects.filter(user_id=user_id)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    return latest or 0
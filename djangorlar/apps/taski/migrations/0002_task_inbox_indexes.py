@@ -0,0 +1,29 @@
+# Generated by Django 4.2.24 on 2026-10-19 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taski', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'updated_at'], name='task_project_status_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['project', 'status', 'updated_at'], name='task_alive_proj_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(fields=['user', 'task'], name='usertask_user_task_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertask',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['user', 'task'], name='usertask_alive_user_task_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.24 on 2026-10-19 13:30
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+SYNCED_MODELS = ('project', 'task', 'usertask', 'membershipchange')
+
+
+def number_existing_rows(apps, schema_editor):
+    """Give every existing row a distinct sync_seq, one UPDATE per table."""
+    offset = 0
+    for name in SYNCED_MODELS:
+        model = apps.get_model('taski', name)
+        model.objects.update(sync_seq=F('id') + offset)
+        offset += model.objects.aggregate(last=Max('id'))['last'] or 0
+    apps.get_model('taski', 'SyncCounter').objects.create(id=1, value=offset)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taski', '0004_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='membershipchange',
+            name='sync_seq',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='sync_seq',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='sync_seq',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='usertask',
+            name='sync_seq',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(number_existing_rows, migrations.RunPython.noop),
+    ]
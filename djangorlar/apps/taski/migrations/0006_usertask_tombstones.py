@@ -0,0 +1,32 @@
+# Generated by Django 4.2.24 on 2026-10-19 14:06
+
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taski', '0005_sync_sequence'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='usertask',
+            options={'default_manager_name': 'alive'},
+        ),
+        migrations.AlterModelManagers(
+            name='usertask',
+            managers=[
+                ('alive', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='usertask',
+            name='unique_task_user',
+        ),
+        migrations.AddConstraint(
+            model_name='usertask',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('task', 'user'), name='unique_alive_task_user'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-19 14:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taski', '0006_usertask_tombstones'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_project_status_upd_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_alive_proj_status_idx',
+        ),
+    ]
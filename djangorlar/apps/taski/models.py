@@ -1,23 +1,162 @@
 # Python modules + Third party modules
+from typing import Any
 
 # Django modules
 from django.db.models import (
+    Model,
     CharField,
     TextField,
     IntegerField,
+    BigIntegerField,
+    PositiveSmallIntegerField,
+    DateTimeField,
     ForeignKey,
     ManyToManyField,
     UniqueConstraint,
+    Index,
+    Q,
+    QuerySet,
     PROTECT,
     CASCADE,
+    DO_NOTHING,
+    F,
+    Manager,
+    Case,
+    When,
+    Value,
 )
+from django.db import connections, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone as django_timezone
 
 # Project modules
-from apps.abstracts.models import AbstractBaseModel
+from apps.abstracts.models import AbstractBaseModel, AbstractVersionedModel
 
 
-class Project(AbstractBaseModel):
+class SyncCounterManager(Manager):
+    """
+    Allocation of sync sequence numbers.
+    """
+
+    # rows renumbered per UPDATE by restamp(), two parameters each
+    RESTAMP_BATCH_SIZE = 300
+
+    def allocate(self, count: int = 1) -> int:
+        """
+        Reserve ``count`` sequence numbers and return the last one.
+
+        The UPDATE locks the counter row until the surrounding transaction
+        ends, so concurrent writers take numbers in commit order and a
+        client never sees a number appear below its cursor.
+
+        That lock is the cost: every transaction writing a synced row holds
+        it from its first save to its commit, so such writes serialize and
+        should be kept short. A database sequence would not block, but it
+        hands out numbers in call order, and a row committed after a higher
+        number could then be skipped by a client's cursor.
+        """
+        connection = connections[self.db]
+        if connection.vendor not in ("postgresql", "sqlite"):
+            # no UPDATE ... RETURNING: update, then read the row we locked
+            counter = self.filter(pk=SyncCounter.SINGLETON_ID)
+            if not counter.update(value=F("value") + count):
+                self.get_or_create(pk=SyncCounter.SINGLETON_ID)
+                counter.update(value=F("value") + count)
+            return counter.values_list("value", flat=True).get()
+        table = connection.ops.quote_name(SyncCounter._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET value = value + %s WHERE id = %s RETURNING value",
+                [count, SyncCounter.SINGLETON_ID],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            # the migration creates the row; flushed test databases do not
+            self.get_or_create(pk=SyncCounter.SINGLETON_ID)
+            return self.allocate(count)
+        return row[0]
+
+    def stamp(self, objs: list[Model]) -> list[Model]:
+        """
+        Number unsaved synced objects before a ``bulk_create``, with one
+        allocation for the batch. Call it in the transaction writing them.
+        """
+        if objs:
+            first = self.allocate(len(objs)) - len(objs) + 1
+            for offset, obj in enumerate(objs):
+                obj.sync_seq = first + offset
+        return objs
+
+    def restamp(self, queryset: QuerySet, **values: Any) -> int:
+        """
+        Renumber rows written around ``save()``, e.g. by ``update()``, in
+        primary key order, and set ``values`` on them in the same UPDATE.
+
+        One allocation, then one UPDATE with a ``CASE`` on the primary key
+        per ``RESTAMP_BATCH_SIZE`` rows.
+        """
+        with transaction.atomic():
+            ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+            if ids:
+                first = self.allocate(len(ids)) - len(ids) + 1
+                rows = queryset.model._base_manager
+                for start in range(0, len(ids), self.RESTAMP_BATCH_SIZE):
+                    batch = ids[start:start + self.RESTAMP_BATCH_SIZE]
+                    rows.filter(pk__in=batch).update(
+                        sync_seq=Case(
+                            *(
+                                When(pk=pk, then=Value(first + start + offset))
+                                for offset, pk in enumerate(batch)
+                            ),
+                            output_field=BigIntegerField(),
+                        ),
+                        **values,
+                    )
+            return len(ids)
+
+
+class SyncCounter(Model):
+    """
+    Single row source of the sync sequence shared by the synced tables.
+    """
+
+    SINGLETON_ID = 1
+
+    value = BigIntegerField(default=0)
+
+    objects = SyncCounterManager()
+
+
+class AbstractSyncedModel(Model):
+    """
+    Abstract model stamped with a sync sequence number on every save.
+
+    ``sync_seq`` is the cursor of ``/api/taski/changes/``. ``bulk_create``
+    and ``QuerySet.update()`` skip ``save()``; number such rows with
+    ``SyncCounter.objects.stamp()`` or ``restamp()``.
+    """
+
+    sync_seq = BigIntegerField(
+        default=0,
+        db_index=True,
+    )
+
+    class Meta:
+        """Meta class for abstract model."""
+
+        abstract = True
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Take the next sequence number in the same transaction."""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "sync_seq"}
+        with transaction.atomic(using=kwargs.get("using")):
+            self.sync_seq = SyncCounter.objects.allocate()
+            super().save(*args, **kwargs)
+
+
+class Project(AbstractSyncedModel, AbstractVersionedModel):
     """
     Project database (table) model.
     """
@@ -38,6 +177,18 @@ class Project(AbstractBaseModel):
         related_name="joined_projects",
     )
 
+    @classmethod
+    def from_db(
+        cls,
+        db: str,
+        field_names: list[str],
+        values: list[Any],
+    ) -> "Project":
+        """Remember the loaded author to tell author changes apart."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_author_id = instance.__dict__.get("author_id")
+        return instance
+
     def __repr__(self) -> str:
         """Returns the official string representation of the object."""
         return f"Project(id={self.id}, name={self.name})"
@@ -47,7 +198,43 @@ class Project(AbstractBaseModel):
         return self.name
 
 
-class Task(AbstractBaseModel):
+class TaskQuerySet(QuerySet):
+    """
+    Task queryset with the commonly used filters.
+    """
+
+    def alive(self) -> "TaskQuerySet":
+        """Exclude soft deleted tasks."""
+        return self.filter(deleted_at__isnull=True)
+
+    def open(self) -> "TaskQuerySet":
+        """Tasks which are not done yet."""
+        return self.filter(
+            status__in=(Task.STATUS_TODO, Task.STATUS_IN_PROGRESS),
+        )
+
+    def inbox(self, user: User) -> "TaskQuerySet":
+        """
+        Open tasks assigned to the user, newest first.
+
+        The user's assignments come from a UserTask index on ``user``, their
+        tasks by primary key, and those are sorted for the page: the filter
+        and the ordering are on different tables, so no index serves both.
+        The sort is bounded by the number of tasks assigned to the user.
+        """
+        return (
+            self.alive()
+            .open()
+            .filter(
+                usertask__user=user,
+                usertask__deleted_at__isnull=True,
+            )
+            .select_related("project")
+            .order_by("-updated_at", "-id")
+        )
+
+
+class Task(AbstractSyncedModel, AbstractVersionedModel):
     """
     Task database (table) model.
     """
@@ -99,10 +286,53 @@ class Task(AbstractBaseModel):
         blank=True,
     )
 
+    objects = TaskQuerySet.as_manager()
+
+    def __repr__(self) -> str:
+        """Returns the official string representation of the object."""
+        return f"Task(id={self.id}, name={self.name})"
+
+    def __str__(self) -> str:
+        """Returns the string representation of the object."""
+        return self.name
+
+
+class UserTaskQuerySet(QuerySet):
+    """
+    UserTask queryset whose ``delete()`` soft deletes, like the instances.
+    """
+
+    def delete(self) -> tuple[int, dict[str, int]]:
+        """Tombstone the live rows, stamped for the sync feed."""
+        now = django_timezone.now()
+        count = SyncCounter.objects.restamp(
+            self.filter(deleted_at__isnull=True),
+            deleted_at=now,
+            updated_at=now,
+        )
+        return count, {self.model._meta.label: count}
 
-class UserTask(AbstractBaseModel):
+    delete.queryset_only = True
+
+
+class AliveUserTaskManager(Manager.from_queryset(UserTaskQuerySet)):
+    """
+    Assignments which are not soft deleted.
+    """
+
+    def get_queryset(self) -> UserTaskQuerySet:
+        """Only live rows."""
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class UserTask(AbstractSyncedModel, AbstractBaseModel):
     """
     UserTask database (table) model.
+
+    ``Task.assignees`` goes through the default manager, ``alive``: only
+    live rows count as assigned, ``remove()`` and ``clear()`` leave stamped
+    tombstones for the sync feed and adding a user again creates a new row.
+    ``objects`` also returns the tombstones.
     """
 
     task = ForeignKey(
@@ -114,13 +344,97 @@ class UserTask(AbstractBaseModel):
         on_delete=CASCADE,
     )
 
+    objects = UserTaskQuerySet.as_manager()
+    alive = AliveUserTaskManager()
+
     class Meta:
         """Customization of the model's meta data."""
 
+        default_manager_name = "alive"
         # unique_together = ("task", "user")
         constraints = [
             UniqueConstraint(
                 fields=["task", "user"],
-                name="unique_task_user",
+                name="unique_alive_task_user",
+                condition=Q(deleted_at__isnull=True),
+            ),
+        ]
+        indexes = [
+            Index(
+                fields=["user", "task"],
+                name="usertask_user_task_idx",
+            ),
+            Index(
+                fields=["user", "task"],
+                name="usertask_alive_user_task_idx",
+                condition=Q(deleted_at__isnull=True),
             ),
         ]
+
+
+class MembershipChange(AbstractSyncedModel):
+    """
+    Append-only log of project membership changes.
+
+    One row per user joining or leaving a project, as a member or as its
+    author. The auto-increment id is the sync cursor: clients keep the last
+    id they applied and ask for the rows after it. Rows outlive hard deleted
+    projects and users, hence no database constraints.
+    """
+
+    ACTION_ADDED = 1
+    ACTION_ADDED_LABEL = "Added"
+    ACTION_REMOVED = 2
+    ACTION_REMOVED_LABEL = "Removed"
+    ACTION_CHOICES = (
+        (ACTION_ADDED, ACTION_ADDED_LABEL),
+        (ACTION_REMOVED, ACTION_REMOVED_LABEL),
+    )
+    ROLE_AUTHOR = 1
+    ROLE_AUTHOR_LABEL = "Author"
+    ROLE_MEMBER = 2
+    ROLE_MEMBER_LABEL = "Member"
+    ROLE_CHOICES = (
+        (ROLE_AUTHOR, ROLE_AUTHOR_LABEL),
+        (ROLE_MEMBER, ROLE_MEMBER_LABEL),
+    )
+
+    project = ForeignKey(
+        to=Project,
+        on_delete=DO_NOTHING,
+        db_constraint=False,
+        related_name="membership_changes",
+    )
+    user = ForeignKey(
+        to=User,
+        on_delete=DO_NOTHING,
+        db_constraint=False,
+        related_name="membership_changes",
+    )
+    action = PositiveSmallIntegerField(
+        choices=ACTION_CHOICES,
+    )
+    role = PositiveSmallIntegerField(
+        choices=ROLE_CHOICES,
+    )
+    created_at = DateTimeField(
+        auto_now_add=True,
+    )
+
+    class Meta:
+        """Customization of the model's meta data."""
+
+        ordering = ("id",)
+        indexes = [
+            Index(
+                fields=["user", "id"],
+                name="membership_change_user_idx",
+            ),
+        ]
+
+    def __repr__(self) -> str:
+        """Returns the official string representation of the object."""
+        return (
+            f"MembershipChange(id={self.id}, project={self.project_id}, "
+            f"user={self.user_id}, action={self.action})"
+        )
@@ -0,0 +1,22 @@
+# Third party modules
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+# Project modules
+from . import membership
+from .models import Project
+
+
+class IsProjectMember(BasePermission):
+    """
+    Object level access for members and authors of the object's project.
+
+    Answered from the cached membership set, so checking a page of tasks
+    costs no query per task.
+    """
+
+    def has_object_permission(self, request: Request, view: APIView, obj: object) -> bool:
+        """The object's ``project_id`` must be in the user's membership set."""
+        project_id = obj.pk if isinstance(obj, Project) else obj.project_id
+        return membership.is_member(request.user.pk, project_id)
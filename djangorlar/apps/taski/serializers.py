@@ -0,0 +1,147 @@
+# Third party modules
+from rest_framework.serializers import ModelSerializer, ValidationError
+
+# Project modules
+from apps.abstracts.serializers import (
+    TimedListSerializer,
+    TimedSerializerMixin,
+)
+from .models import MembershipChange, Project, Task, UserTask
+
+
+class ProjectPreviewSerializer(ModelSerializer):
+    """
+    Short project representation used inside task payloads.
+    """
+
+    class Meta:
+        """Customization of the serializer's meta data."""
+
+        model = Project
+        fields = ("id", "name")
+        read_only_fields = fields
+
+
+class InboxTaskSerializer(TimedSerializerMixin, ModelSerializer):
+    """
+    Task representation for the assignee inbox.
+    """
+
+    project = ProjectPreviewSerializer(read_only=True)
+
+    class Meta:
+        """Customization of the serializer's meta data."""
+
+        model = Task
+        list_serializer_class = TimedListSerializer
+        fields = (
+            "id",
+            "name",
+            "status",
+            "parent",
+            "project",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class MembershipChangeSerializer(ModelSerializer):
+    """
+    One entry of the membership change feed.
+    """
+
+    class Meta:
+        """Customization of the serializer's meta data."""
+
+        model = MembershipChange
+        fields = (
+            "id",
+            "project",
+            "action",
+            "role",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
+class TaskSerializer(TimedSerializerMixin, ModelSerializer):
+    """
+    Task representation for the task detail API.
+
+    ``version`` is read-only; clients pass it back in ``If-Match``.
+    """
+
+    class Meta:
+        """Customization of the serializer's meta data."""
+
+        model = Task
+        fields = (
+            "id",
+            "name",
+            "description",
+            "status",
+            "parent",
+            "project",
+            "version",
+            "updated_at",
+        )
+        read_only_fields = (
+            "id",
+            "project",
+            "version",
+            "updated_at",
+        )
+
+    def validate_parent(self, parent: Task | None) -> Task | None:
+        """The parent must belong to the same project."""
+        if parent is not None and parent.project_id != self.instance.project_id:
+            raise ValidationError("The parent task belongs to another project.")
+        return parent
+
+
+class SyncProjectSerializer(ModelSerializer):
+    """
+    Project row of the sync feed.
+    """
+
+    class Meta:
+        """Customization of the serializer's meta data."""
+
+        model = Project
+        fields = ("id", "name", "author", "version", "updated_at")
+        read_only_fields = fields
+
+
+class SyncTaskSerializer(ModelSerializer):
+    """
+    Task row of the sync feed.
+    """
+
+    class Meta:
+        """Customization of the serializer's meta data."""
+
+        model = Task
+        fields = (
+            "id",
+            "name",
+            "description",
+            "status",
+            "parent",
+            "project",
+            "version",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class SyncUserTaskSerializer(ModelSerializer):
+    """
+    Task assignment row of the sync feed.
+    """
+
+    class Meta:
+        """Customization of the serializer's meta data."""
+
+        model = UserTask
+        fields = ("id", "task", "user", "updated_at")
+        read_only_fields = fields
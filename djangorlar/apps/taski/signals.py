@@ -0,0 +1,94 @@
+# Python modules
+from typing import Any
+
+# Django modules
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+# Project modules
+from . import membership
+from .models import MembershipChange, Project, SyncCounter, Task, UserTask
+
+
+@receiver(post_save, sender=Project)
+def project_author_changed(sender: type, instance: Project, created: bool, **kwargs: Any) -> None:
+    """Log the author of a new project, or the handover of an existing one."""
+
+    previous = getattr(instance, "_loaded_author_id", None)
+    if not created:
+        # instances built without a query have no loaded author to compare
+        if previous is None or previous == instance.author_id:
+            return
+        membership.record(
+            MembershipChange.ACTION_REMOVED,
+            MembershipChange.ROLE_AUTHOR,
+            [(instance.pk, previous)],
+        )
+    membership.record(
+        MembershipChange.ACTION_ADDED,
+        MembershipChange.ROLE_AUTHOR,
+        [(instance.pk, instance.author_id)],
+    )
+    instance._loaded_author_id = instance.author_id
+
+
+@receiver(m2m_changed, sender=Project.users.through)
+def project_users_changed(
+    sender: type,
+    instance: Any,
+    action: str,
+    reverse: bool,
+    pk_set: set[int],
+    **kwargs: Any,
+) -> None:
+    """
+    Log members joining and leaving.
+
+    ``instance`` is the project, or the user when the relation is changed
+    from the ``joined_projects`` side. ``clear()`` sends no ``pk_set``, so
+    the related ids are read before the rows go away.
+    """
+
+    if action == "pre_clear":
+        related = instance.joined_projects if reverse else instance.users
+        instance._membership_cleared = set(related.values_list("id", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_membership_cleared", set())
+        action = "post_remove"
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+    if reverse:
+        pairs = [(project_id, instance.pk) for project_id in pk_set]
+    else:
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+    membership.record(
+        MembershipChange.ACTION_ADDED if action == "post_add" else MembershipChange.ACTION_REMOVED,
+        MembershipChange.ROLE_MEMBER,
+        sorted(pairs),
+    )
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+def task_assignees_added(
+    sender: type,
+    instance: Any,
+    action: str,
+    reverse: bool,
+    pk_set: set[int],
+    **kwargs: Any,
+) -> None:
+    """
+    Stamp UserTask rows created by ``assignees.add()`` for the sync feed.
+
+    ``remove()`` and ``clear()`` need no handler: they delete through the
+    default ``alive`` manager, whose ``delete()`` leaves stamped tombstones.
+    """
+
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        rows = UserTask.objects.filter(user_id=instance.pk, task_id__in=pk_set)
+    else:
+        rows = UserTask.objects.filter(task_id=instance.pk, user_id__in=pk_set)
+    SyncCounter.objects.restamp(rows.filter(sync_seq=0))
@@ -1,3 +1,490 @@
+# Python modules
+import os
+
+# Django modules
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+# Project modules
+from apps.abstracts.models import VersionConflict
+from apps.abstracts.testing import QueryCountAssertionMixin
+from . import membership
+from .models import MembershipChange, Project, SyncCounter, Task, UserTask
+
+
+class AdminChangelistQueryCountTests(QueryCountAssertionMixin, TestCase):
+    """
+    Admin changelists must not issue queries per displayed row.
+    """
+
+    query_snapshot_dir = os.path.join(
+        os.path.dirname(__file__),
+        "query_snapshots",
+    )
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Superuser used to browse the admin."""
+        cls.admin = User.objects.create_superuser(
+            username="admin",
+            password="admin",
+        )
+
+    def setUp(self) -> None:
+        """Log the superuser in."""
+        self.client.force_login(self.admin)
+
+    def seed(self, size: int) -> None:
+        """Projects, nested tasks and assignments, ``size`` of each."""
+
+        users = User.objects.bulk_create(
+            User(username=f"user-{size}-{i}", password="!")
+            for i in range(size)
+        )
+        projects = Project.objects.bulk_create(
+            Project(name=f"project {i}", author=users[i])
+            for i in range(size)
+        )
+        parents = Task.objects.bulk_create(
+            Task(name=f"parent {i}", project=projects[i])
+            for i in range(size)
+        )
+        tasks = Task.objects.bulk_create(
+            Task(name=f"task {i}", project=projects[i], parent=parents[i])
+            for i in range(size)
+        )
+        UserTask.objects.bulk_create(
+            UserTask(task=tasks[i], user=users[i])
+            for i in range(size)
+        )
+
+    def test_project_changelist(self) -> None:
+        """Project changelist."""
+        self.assertConstantQueries(
+            "admin_project_changelist",
+            self.seed,
+            lambda _: self.client.get("/admin/taski/project/"),
+        )
+
+    def test_task_changelist(self) -> None:
+        """Task changelist."""
+        self.assertConstantQueries(
+            "admin_task_changelist",
+            self.seed,
+            lambda _: self.client.get("/admin/taski/task/"),
+        )
+
+    def test_usertask_changelist(self) -> None:
+        """UserTask changelist."""
+        self.assertConstantQueries(
+            "admin_usertask_changelist",
+            self.seed,
+            lambda _: self.client.get("/admin/taski/usertask/"),
+        )
+
+
+class MembershipTests(TestCase):
+    """
+    Cached membership sets and the membership change feed.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """An author and two other users."""
+        cls.author, cls.alice, cls.bob = User.objects.bulk_create(
+            User(username=name, password="!")
+            for name in ("author", "alice", "bob")
+        )
+
+    def setUp(self) -> None:
+        """Start every test with empty membership sets."""
+        cache.clear()
+
+    def changes(self, user: User) -> list[tuple[int, int, int]]:
+        """``(project, action, role)`` of the user's logged changes."""
+        return list(
+            MembershipChange.objects.filter(user=user)
+            .values_list("project_id", "action", "role")
+        )
+
+    def test_cached_set_follows_membership(self) -> None:
+        """Adds, removes, clears and author changes invalidate the sets."""
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(name="p", author=self.author)
+        self.assertEqual(membership.project_ids(self.author.pk), {project.pk})
+        self.assertEqual(membership.project_ids(self.alice.pk), set())
+        with self.assertNumQueries(0):
+            self.assertTrue(membership.is_member(self.author.pk, project.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.users.add(self.alice, self.bob)
+        self.assertTrue(membership.is_member(self.alice.pk, project.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.joined_projects.remove(project)
+        self.assertFalse(membership.is_member(self.bob.pk, project.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.users.clear()
+        self.assertFalse(membership.is_member(self.alice.pk, project.pk))
+
+        project = Project.objects.get(pk=project.pk)
+        project.author = self.bob
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+        self.assertFalse(membership.is_member(self.author.pk, project.pk))
+        self.assertTrue(membership.is_member(self.bob.pk, project.pk))
+
+        added, removed = MembershipChange.ACTION_ADDED, MembershipChange.ACTION_REMOVED
+        author, member = MembershipChange.ROLE_AUTHOR, MembershipChange.ROLE_MEMBER
+        self.assertEqual(
+            self.changes(self.author),
+            [(project.pk, added, author), (project.pk, removed, author)],
+        )
+        self.assertEqual(
+            self.changes(self.alice),
+            [(project.pk, added, member), (project.pk, removed, member)],
+        )
+        self.assertEqual(
+            self.changes(self.bob),
+            [
+                (project.pk, added, member),
+                (project.pk, removed, member),
+                (project.pk, added, author),
+            ],
+        )
+
+    def test_stale_set_of_another_process_is_not_served(self) -> None:
+        """A set loaded before a change and stored after it is never read."""
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(name="p", author=self.author)
+        # another worker reads the version and the rows before the change...
+        stale_key = membership.cache_key(self.alice.pk)
+        stale = membership.load(self.alice.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            project.users.add(self.alice)
+        # ...and stores its set once the change has been committed
+        cache.set(stale_key, stale)
+        self.assertTrue(membership.is_member(self.alice.pk, project.pk))
+
+    def test_change_feed(self) -> None:
+        """Clients sync from the membership set and then the feed."""
+        project = Project.objects.create(name="p", author=self.author)
+        self.client.force_login(self.alice)
+        start = self.client.get("/api/taski/membership/").json()
+        self.assertEqual(start["project_ids"], [])
+
+        project.users.add(self.alice)
+        project.users.remove(self.alice)
+        project.users.add(self.alice)
+        with self.settings(TASKI_MEMBERSHIP_CHANGES_LIMIT=2):
+            first = self.client.get(
+                "/api/taski/membership/changes/", {"since": start["since"]}
+            ).json()
+            second = self.client.get(
+                "/api/taski/membership/changes/", {"since": first["since"]}
+            ).json()
+        self.assertTrue(first["has_more"])
+        self.assertFalse(second["has_more"])
+        actions = [change["action"] for change in first["results"] + second["results"]]
+        self.assertEqual(
+            actions,
+            [
+                MembershipChange.ACTION_ADDED,
+                MembershipChange.ACTION_REMOVED,
+                MembershipChange.ACTION_ADDED,
+            ],
+        )
+        self.assertEqual(
+            self.client.get("/api/taski/membership/").json()["since"],
+            second["since"],
+        )
+
+
+class TaskVersionTests(TestCase):
+    """
+    Conditional updates of versioned tasks.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """A project with one member and one task."""
+        cls.user = User.objects.create_superuser(username="member", password="!")
+        cls.project = Project.objects.create(name="p", author=cls.user)
+        cls.task = Task.objects.create(name="task", project=cls.project)
+
+    def setUp(self) -> None:
+        """Log the member in."""
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = f"/api/taski/tasks/{self.task.pk}/"
+
+    def test_stale_save_conflicts(self) -> None:
+        """The second of two writers with the same version loses."""
+        first = Task.objects.get(pk=self.task.pk)
+        second = Task.objects.get(pk=self.task.pk)
+        first.status = Task.STATUS_DONE
+        first.save()
+        self.assertEqual(first.version, 2)
+        second.name = "renamed"
+        with self.assertRaises(VersionConflict), transaction.atomic():
+            second.save()
+        first.delete()
+        self.assertEqual(
+            Task.objects.values_list("version", "status", "name").get(pk=self.task.pk),
+            (3, Task.STATUS_DONE, "task"),
+        )
+
+    def test_etag_and_if_match(self) -> None:
+        """ETag on reads, 304 on If-None-Match, 412 on a stale If-Match."""
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        self.assertEqual(etag, f'"{self.task.pk}-1"')
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+
+        response = self.client.patch(
+            self.url,
+            {"status": Task.STATUS_DONE},
+            content_type="application/json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{self.task.pk}-2"')
+
+        response = self.client.patch(
+            self.url,
+            {"name": "lost update"},
+            content_type="application/json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).name, "task")
+
+    def test_non_member_is_refused(self) -> None:
+        """Tasks of other projects are not readable."""
+        self.client.force_login(User.objects.create_user(username="outsider"))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_admin_list_editable_conflict(self) -> None:
+        """A changelist row rendered at an old version is not saved."""
+        Task.objects.filter(pk=self.task.pk).update(name="moved on", version=2)
+        response = self.client.post(
+            "/admin/taski/task/",
+            {
+                "form-TOTAL_FORMS": "1",
+                "form-INITIAL_FORMS": "1",
+                "form-0-id": str(self.task.pk),
+                "form-0-status": str(Task.STATUS_DONE),
+                "form-0-version": "1",
+                "_save": "Save",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "was changed by someone else")
+        self.assertEqual(Task.objects.get(pk=self.task.pk).status, Task.STATUS_TODO)
+
+
+class SyncChangesTests(TestCase):
+    """
+    The ``changes?since=`` sync feed.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """A member of one project with two tasks, and another project."""
+        cls.user = User.objects.create_user(username="member")
+        cls.project = Project.objects.create(name="p", author=cls.user)
+        cls.other = Project.objects.create(
+            name="other",
+            author=User.objects.create_user(username="other"),
+        )
+        cls.tasks = [
+            Task.objects.create(name=f"task {i}", project=cls.project)
+            for i in range(2)
+        ]
+        Task.objects.create(name="hidden", project=cls.other)
+        cls.tasks[0].assignees.add(cls.user)
+
+    def setUp(self) -> None:
+        """Log the member in."""
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def sync(self, since: int, **params: int) -> dict:
+        """One batch of the feed."""
+        return self.client.get("/api/taski/changes/", {"since": since, **params}).json()
+
+    def test_initial_and_incremental_sync(self) -> None:
+        """A full sync in batches, then only what changed."""
+        with self.settings(TASKI_SYNC_LIMIT=2):
+            batches = [self.sync(0)]
+            while batches[-1]["has_more"]:
+                batches.append(self.sync(batches[-1]["since"]))
+        # project, two tasks, the assignment and the authorship
+        self.assertEqual(len(batches), 3)
+        rows = {
+            kind: [row["id"] for batch in batches for row in batch[kind]]
+            for kind in ("projects", "tasks", "user_tasks")
+        }
+        self.assertEqual(rows["projects"], [self.project.pk])
+        self.assertEqual(sorted(rows["tasks"]), [task.pk for task in self.tasks])
+        self.assertEqual(len(rows["user_tasks"]), 1)
+        second = batches[-1]
+
+        self.tasks[0].status = Task.STATUS_DONE
+        self.tasks[0].save()
+        self.tasks[1].delete()
+        # session, user and one keyset scan per table
+        with self.assertNumQueries(6):
+            update = self.sync(second["since"])
+        self.assertEqual([row["status"] for row in update["tasks"]], [Task.STATUS_DONE])
+        self.assertEqual(update["deleted"]["tasks"], [self.tasks[1].pk])
+        self.assertEqual(self.sync(update["since"])["tasks"], [])
+
+    def test_joined_project_is_filled_in(self) -> None:
+        """Joining a project points the client at a scoped resync."""
+        since = self.sync(0)["since"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.users.add(self.user)
+        update = self.sync(since)
+        self.assertEqual(update["joined_projects"], [self.other.pk])
+        scoped = self.sync(0, project=self.other.pk)
+        self.assertEqual([row["name"] for row in scoped["tasks"]], ["hidden"])
+
+
+    def test_author_leaving_the_members_keeps_the_project(self) -> None:
+        """Only changes of the membership itself are joins and leaves."""
+        since = self.sync(0)["since"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.users.add(self.user)
+            self.project.users.remove(self.user)
+        update = self.sync(since)
+        self.assertEqual(
+            (update["joined_projects"], update["left_projects"]), ([], [])
+        )
+        self.assertTrue(membership.is_member(self.user.pk, self.project.pk))
+
+        self.other.users.add(self.user)
+        self.other.author = self.user
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.save()
+        self.assertEqual(
+            list(
+                MembershipChange.objects.filter(project=self.other)
+                .order_by("id")
+                .values_list("user__username", "action")
+            ),
+            [
+                ("other", MembershipChange.ACTION_ADDED),
+                ("member", MembershipChange.ACTION_ADDED),
+                ("other", MembershipChange.ACTION_REMOVED),
+            ],
+        )
+
+    def test_unassigned_rows_are_tombstoned(self) -> None:
+        """remove() and clear() leave stamped tombstones, add() starts over."""
+        other = User.objects.create_user(username="colleague")
+        task = self.tasks[0]
+        task.assignees.add(other)
+        since = self.sync(0)["since"]
+        assignments = {
+            row.user_id: row.pk for row in UserTask.objects.filter(task=task)
+        }
+
+        task.assignees.remove(self.user)
+        other.task_set.clear()
+        update = self.sync(since)
+        self.assertEqual(
+            sorted(update["deleted"]["user_tasks"]),
+            sorted(assignments.values()),
+        )
+        self.assertEqual(list(task.assignees.through.alive.filter(task=task)), [])
+        self.assertEqual(list(Task.objects.inbox(self.user)), [])
+
+        task.assignees.add(self.user)
+        readded = self.sync(update["since"])["user_tasks"]
+        self.assertEqual(len(readded), 1)
+        self.assertNotEqual(readded[0]["id"], assignments[self.user.pk])
+        self.assertEqual(list(Task.objects.inbox(self.user)), [task])
+
+    def test_restamp_is_one_update(self) -> None:
+        """Rows are renumbered in primary key order with a single UPDATE."""
+        rows = UserTask.objects.bulk_create(
+            UserTask(task=self.tasks[1], user=User.objects.create_user(username=f"u{i}"))
+            for i in range(5)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(SyncCounter.objects.restamp(UserTask.objects.filter(sync_seq=0)), 5)
+        updates = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "taski_usertask"')
+        ]
+        self.assertEqual(len(updates), 1)
+        last = SyncCounter.objects.get().value
+        self.assertEqual(
+            list(UserTask.objects.filter(pk__in=[row.pk for row in rows]).order_by("pk").values_list("sync_seq", flat=True)),
+            list(range(last - 4, last + 1)),
+        )
+        self.assertEqual(SyncCounter.objects.allocate(3), last + 3)
+
+
+class InboxTests(TestCase):
+    """
+    Open tasks assigned to the requesting user.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Two assignees and tasks in every state."""
+        cls.user, cls.other = User.objects.bulk_create(
+            User(username=name, password="!") for name in ("user", "other")
+        )
+        project = Project.objects.create(name="inbox", author=cls.user)
+        cls.todo, cls.doing, cls.done, cls.deleted, cls.unassigned, cls.foreign = (
+            Task.objects.create(name=name, project=project, status=status)
+            for name, status in (
+                ("todo", Task.STATUS_TODO),
+                ("doing", Task.STATUS_IN_PROGRESS),
+                ("done", Task.STATUS_DONE),
+                ("deleted", Task.STATUS_TODO),
+                ("unassigned", Task.STATUS_TODO),
+                ("foreign", Task.STATUS_TODO),
+            )
+        )
+        for task in (cls.todo, cls.doing, cls.done, cls.deleted, cls.unassigned):
+            task.assignees.add(cls.user)
+        cls.foreign.assignees.add(cls.other)
+        cls.deleted.delete()
+        UserTask.objects.get(task=cls.unassigned, user=cls.user).delete()
+        # the newest update comes first
+        cls.todo.save()
+
+    def test_inbox_queryset(self) -> None:
+        """Alive, open and still assigned tasks only, newest first."""
+        self.assertEqual(
+            list(Task.objects.inbox(self.user)),
+            [self.todo, self.doing],
+        )
 
-# Create your tests here.
+    def test_inbox_view(self) -> None:
+        """The view pages the inbox of the logged in user."""
+        self.assertEqual(self.client.get("/api/taski/inbox/").status_code, 403)
+        self.client.force_login(self.other)
+        response = self.client.get("/api/taski/inbox/")
+        self.assertEqual(
+            [row["name"] for row in response.json()["results"]],
+            ["foreign"],
+        )
+        self.client.force_login(self.user)
+        first = self.client.get("/api/taski/inbox/", {"page_size": 1}).json()
+        self.assertEqual([row["name"] for row in first["results"]], ["todo"])
+        self.assertEqual(first["results"][0]["project"]["name"], "inbox")
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([row["name"] for row in second["results"]], ["doing"])
+        self.assertIsNone(second["next"])
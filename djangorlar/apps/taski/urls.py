@@ -0,0 +1,25 @@
+# Django modules
+from django.urls import path
+
+# Project modules
+from .views import (
+    InboxView,
+    MembershipChangesView,
+    MembershipView,
+    SyncChangesView,
+    TaskDetailView,
+)
+
+app_name = "taski"
+
+urlpatterns = [
+    path("inbox/", InboxView.as_view(), name="inbox"),
+    path("tasks/<int:pk>/", TaskDetailView.as_view(), name="task-detail"),
+    path("changes/", SyncChangesView.as_view(), name="changes"),
+    path("membership/", MembershipView.as_view(), name="membership"),
+    path(
+        "membership/changes/",
+        MembershipChangesView.as_view(),
+        name="membership-changes",
+    ),
+]
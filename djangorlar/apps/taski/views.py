@@ -1,3 +1,250 @@
-from django.shortcuts import render
+# Python modules
+from typing import Any, Optional
 
-# Create your views here.
+# Django modules
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+
+# Third party modules
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.generics import ListAPIView, RetrieveUpdateAPIView
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+# Project modules
+from apps.abstracts.models import VersionConflict
+from . import membership, sync
+from .models import Task
+from .permissions import IsProjectMember
+from .serializers import (
+    InboxTaskSerializer,
+    MembershipChangeSerializer,
+    SyncProjectSerializer,
+    SyncTaskSerializer,
+    SyncUserTaskSerializer,
+    TaskSerializer,
+)
+
+
+class PreconditionFailed(APIException):
+    """
+    If-Match names a version the resource is no longer at.
+    """
+
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource was changed by someone else."
+    default_code = "precondition_failed"
+
+
+def int_param(request: Request, name: str, default: Optional[int] = None) -> Optional[int]:
+    """Integer query parameter, 400 if it is not one."""
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Must be an integer."})
+
+
+def version_etag(obj: Any) -> str:
+    """Strong ETag of a versioned object."""
+    return f'"{obj.pk}-{obj.version}"'
+
+
+def if_match_version(header: str, obj: Any) -> Optional[int]:
+    """
+    Version named by an ``If-Match`` header, ``None`` for ``*``.
+
+    Raises ``PreconditionFailed`` when none of the listed ETags belongs to
+    ``obj``; an outdated one is passed on so the conditional update fails.
+    """
+    if header.strip() == "*":
+        return None
+    prefix = f'"{obj.pk}-'
+    for etag in header.split(","):
+        # weakened by CompressionMiddleware, the version is still exact
+        etag = etag.strip().removeprefix("W/")
+        if etag.startswith(prefix) and etag.endswith('"'):
+            version = etag[len(prefix):-1]
+            if version.isdigit():
+                return int(version)
+    raise PreconditionFailed()
+
+
+class InboxPagination(CursorPagination):
+    """
+    Keyset pagination matching the inbox ordering.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-updated_at", "-id")
+
+
+class InboxView(ListAPIView):
+    """
+    Open tasks assigned to the current user, newest first.
+    """
+
+    serializer_class = InboxTaskSerializer
+    pagination_class = InboxPagination
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        """Inbox of the requesting user."""
+        return Task.objects.inbox(self.request.user)
+
+
+class MembershipView(APIView):
+    """
+    Ids of the projects the current user authored or joined.
+
+    ``since`` is the cursor to continue from with the change feed; it is
+    read before the set, so a change racing this request shows up in the
+    feed again rather than getting lost.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request: Request) -> Response:
+        """Current membership set and its change feed cursor."""
+        since = membership.latest_change_id(request.user.pk)
+        return Response(
+            {
+                "project_ids": sorted(membership.project_ids(request.user.pk)),
+                "since": since,
+            }
+        )
+
+
+class MembershipChangesView(APIView):
+    """
+    Membership changes of the current user after ``?since=<cursor>``.
+
+    Clients apply ``results`` in order and ask again with the returned
+    ``since`` while ``has_more`` is set.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request: Request) -> Response:
+        """A batch of changes after the cursor."""
+        since = int_param(request, "since", 0)
+        limit = settings.TASKI_MEMBERSHIP_CHANGES_LIMIT
+        changes = membership.changes_since(request.user.pk, since, limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return Response(
+            {
+                "results": MembershipChangeSerializer(changes, many=True).data,
+                "since": changes[-1].id if changes else since,
+                "has_more": has_more,
+            }
+        )
+
+
+class TaskDetailView(RetrieveUpdateAPIView):
+    """
+    Read and update one task of a project the user belongs to.
+
+    Responses carry the task version as ETag. ``If-None-Match`` answers
+    304 for unchanged tasks; ``If-Match`` on PUT/PATCH makes the update
+    conditional on that version, so a client can patch what it last saw
+    without reading the task again and gets 412 if someone was faster.
+    Without ``If-Match`` the update is still guarded against writes that
+    happen between this request's read and write.
+    """
+
+    serializer_class = TaskSerializer
+    permission_classes = (IsAuthenticated, IsProjectMember)
+
+    def get_queryset(self) -> QuerySet[Task]:
+        """Tasks that are not soft deleted."""
+        return Task.objects.alive()
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """The task, or 304 if the client has its current version."""
+        task = self.get_object()
+        etag = version_etag(task)
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in (value.strip().removeprefix("W/") for value in if_none_match.split(",")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(self.get_serializer(task).data)
+        response["ETag"] = etag
+        return response
+
+    def update(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Conditional update, 412 on a version mismatch."""
+        task = self.get_object()
+        if_match = request.headers.get("If-Match")
+        if if_match is not None:
+            version = if_match_version(if_match, task)
+            if version is not None:
+                task.expect_version(version)
+        serializer = self.get_serializer(
+            task,
+            data=request.data,
+            partial=kwargs.pop("partial", False),
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        response = Response(serializer.data)
+        response["ETag"] = version_etag(task)
+        return response
+
+    def perform_update(self, serializer: BaseSerializer) -> None:
+        """Save, turning a lost race into 412."""
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except VersionConflict:
+            raise PreconditionFailed()
+
+
+class SyncChangesView(APIView):
+    """
+    Incremental sync of the projects, tasks and assignments the current
+    user can see: ``GET ?since=<cursor>`` returns what changed after the
+    cursor, in batches of ``TASKI_SYNC_LIMIT``.
+
+    A client starts from ``since=0``, stores the returned ``since`` and
+    asks again while ``has_more`` is set. Soft deleted rows come back as
+    ids under ``deleted``; projects in ``joined_projects`` are filled in
+    with ``?project=<id>&since=0``, projects in ``left_projects`` dropped.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request: Request) -> Response:
+        """One batch of changes after the cursor."""
+        batch = sync.changes(
+            request.user.pk,
+            since=int_param(request, "since", 0),
+            limit=settings.TASKI_SYNC_LIMIT,
+            project_id=int_param(request, "project"),
+        )
+        return Response(
+            {
+                "projects": SyncProjectSerializer(batch.projects, many=True).data,
+                "tasks": SyncTaskSerializer(batch.tasks, many=True).data,
+                "user_tasks": SyncUserTaskSerializer(batch.user_tasks, many=True).data,
+                "deleted": {
+                    "projects": batch.deleted_projects,
+                    "tasks": batch.deleted_tasks,
+                    "user_tasks": batch.deleted_user_tasks,
+                },
+                "joined_projects": batch.joined_projects,
+                "left_projects": batch.left_projects,
+                "since": batch.since,
+                "has_more": batch.has_more,
+            }
+        )
@@ -1,10 +1,26 @@
 #!/usr/bin/env python
 import os
 import sys
-from settings.conf import ENV_ID, ENV_POSSIBLE_OPTIONS
+
+# Commands that only need the models boot without the admin, DRF and
+# django-filter apps (see SLIM_BOOT in settings.conf).
+SLIM_COMMANDS = {
+    'buildfeeds',
+    'buildrelated',
+    'buildrenditions',
+    'exportdata',
+    'flushviews',
+    'generatetestdata',
+    'runcommentworker',
+    'timetagfilters',
+}
+
 
 def main():
     """Run administrative tasks."""
+    if len(sys.argv) > 1 and sys.argv[1] in SLIM_COMMANDS:
+        os.environ.setdefault('DJANGORLAR_SLIM_BOOT', '1')
+    from settings.conf import ENV_ID, ENV_POSSIBLE_OPTIONS
     assert ENV_ID in ENV_POSSIBLE_OPTIONS, f"Set correct DJANGORLAR_ENV_ID env var. Possible options: {ENV_POSSIBLE_OPTIONS}"
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', f'settings.env.{ENV_ID}')
     try:
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangorlar.settings')
 
 application = get_asgi_application()
+
+from apps.abstracts.static import wrap_asgi  # noqa: E402
+
+application = wrap_asgi(application)
@@ -23,12 +23,24 @@ DJANGO_AND_THIRD_PARTY_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
+    'django_filters',
 ]
 PROJECT_APPS = [
     'apps.abstracts.apps.AbstractsConfig',
     'apps.taski.apps.TaskiConfig',
     'apps.news.apps.NewsConfig'
 ]
+SLIM_BOOT_EXCLUDED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'rest_framework',
+    'django_filters',
+)
+if SLIM_BOOT:
+    DJANGO_AND_THIRD_PARTY_APPS = [
+        app for app in DJANGO_AND_THIRD_PARTY_APPS if app not in SLIM_BOOT_EXCLUDED_APPS
+    ]
 INSTALLED_APPS = DJANGO_AND_THIRD_PARTY_APPS + PROJECT_APPS
 
 # ----------------------------------------------
@@ -36,6 +48,7 @@ INSTALLED_APPS = DJANGO_AND_THIRD_PARTY_APPS + PROJECT_APPS
 #
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.abstracts.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,6 +56,29 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if QUERY_INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'apps.abstracts.middleware.QueryInstrumentationMiddleware')
+if SAMPLING_PROFILER:
+    MIDDLEWARE.insert(0, 'apps.abstracts.middleware.SamplingProfilerMiddleware')
+
+# QUERY_INSTRUMENTATION_THRESHOLDS overrides single entries of
+# apps.abstracts.middleware.DEFAULT_THRESHOLDS
+
+# pages at /profiler/, tokens for the X-Profile header are handed out there
+SAMPLING_PROFILER_SETTINGS = {
+    'SAMPLE_RATE': 1000,
+    'INTERVAL': 0.005,
+    'BUFFER_SIZE': 200,
+    'MAX_DEPTH': 128,
+    'TOKEN_MAX_AGE': 3600,
+}
+
+# gzip (BREACH padded, level 6) for responses of at least MIN_SIZE bytes,
+# brotli for API payloads only
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'BROTLI_QUALITY': 5,
+}
 
 TEMPLATES_DIR = BASE_DIR + '/templates'
 
@@ -91,6 +127,127 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static')
 ]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
-STATIC_MEDIA = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+# Serve STATIC_ROOT and MEDIA_ROOT from the WSGI/ASGI wrapper in
+# apps.abstracts.static instead of a separate web server.
+SERVE_STATIC = False
+# URL paths cached for a year: ManifestStaticFilesStorage names and the
+# content-addressed hero renditions of apps.news.images
+SERVE_STATIC_IMMUTABLE = [
+    r'^' + STATIC_URL + r'.+\.[0-9a-f]{12}\.\w+$',
+    r'^' + MEDIA_URL + r'news/renditions/[0-9a-f]{20}\.\w+$',
+]
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# ----------------------------------------------
+# REST framework
+#
+# orjson (Accept: application/json; encoder=orjson) and msgpack (Accept:
+# application/msgpack) are opt-in; both are skipped when their library is
+# not installed, see apps.abstracts.renderers. They are not in the
+# requirements: pip install orjson msgpack to offer them
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.abstracts.renderers.ORJSONRenderer',
+        'rest_framework.renderers.JSONRenderer',
+        'apps.abstracts.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'apps.abstracts.renderers.AvailableRenderersNegotiation',
+    # client addresses of anonymous throttling, see settings.conf
+    'NUM_PROXIES': NUM_PROXIES,
+}
+
+# ----------------------------------------------
+# Cache
+#
+# Throttle buckets, cached pages and the lookup and membership versions are
+# shared between processes through the default cache; startup refuses a
+# process-local backend (LocMem, Dummy) unless an env turns this off, see
+# apps.abstracts.caching.check_shared_caches
+REQUIRE_SHARED_CACHE = True
+
+# ----------------------------------------------
+# Throttling
+#
+# Buckets live in this cache alias, which has to be shared by every
+# process (see REQUIRE_SHARED_CACHE).
+THROTTLE_ENABLED = True
+THROTTLE_CACHE = 'default'
+# scope: (sustained rate, burst size)
+THROTTLE_RATES = {
+    'news.article.list': ('120/min', 30),
+    'news.article.search': ('30/min', 10),
+    'news.comment.create': ('5/min', 3),
+}
+
+# concurrent misses on one key are computed once, see
+# apps.abstracts.caching.single_flight
+CACHE_SINGLE_FLIGHT = {
+    'LOCK_TIMEOUT': 30,
+    'POLL_INTERVAL': 0.05,
+}
+
+# ----------------------------------------------
+# Taski
+#
+# seconds a cached per-user project membership set may live; signals drop
+# it on every membership change, see apps.taski.membership
+TASKI_MEMBERSHIP_CACHE_TIMEOUT = 300
+TASKI_MEMBERSHIP_CHANGES_LIMIT = 500
+# rows per batch of the /api/taski/changes/ sync feed
+TASKI_SYNC_LIMIT = 500
+
+# ----------------------------------------------
+# News
+#
+HERO_IMAGE_WORKERS = 2
+# seconds between checks of the shared category/tag cache version
+NEWS_TAXONOMY_CACHE_CHECK_INTERVAL = 1.0
+# seconds public article list and featured pages stay in the shared cache;
+# article changes retire them earlier, `manage.py warmcache` refills them
+NEWS_PAGE_CACHE_TIMEOUT = 60
+# refresh an article's related list whenever it or its tags change
+NEWS_RELATED_INCREMENTAL = True
+NEWS_RELATED_DEBOUNCE = 0.5
+# RSS/Atom feeds and sitemaps, rewritten by apps.news.feeds as articles
+# change; `manage.py buildfeeds` regenerates everything, and has to run
+# periodically with --due to list scheduled articles once they go live
+NEWS_SITE_URL = SITE_URL
+NEWS_SITE_TITLE = 'Djangorlar news'
+NEWS_FEEDS_URL = '/feeds/'
+NEWS_FEEDS_ROOT = os.path.join(BASE_DIR, 'var', 'feeds')
+NEWS_FEEDS_INCREMENTAL = True
+NEWS_FEED_ITEMS = 50
+NEWS_SITEMAP_PAGE_SIZE = 10000
+# sitemap.xml, its pages and robots.txt, served at the root of the site
+NEWS_SITEMAPS_ROOT = os.path.join(BASE_DIR, 'var', 'sitemaps')
+# the root mount comes last, so only paths no other mount claims reach it,
+# at the cost of one stat() each
+SERVE_STATIC_MOUNTS = [(NEWS_FEEDS_URL, NEWS_FEEDS_ROOT), ('/', NEWS_SITEMAPS_ROOT)]
+VIEW_COUNTER = {
+    'BACKEND': 'memory',
+    'FLUSH_INTERVAL': 5.0,
+    'START_WORKER': True,
+    'HALF_LIFE': 6 * 3600,
+}
+# "memory" keeps accepted comments in each web process until they are
+# flushed: a restart loses them, pending status and queue depth are per
+# process and runcommentworker cannot reach them. Fine for development;
+# settings.env.prod spools to a file instead.
+COMMENT_QUEUE = {
+    'BACKEND': 'memory',
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1.0,
+    'START_WORKER': True,
+}
@@ -10,3 +10,48 @@ ENV_POSSIBLE_OPTIONS = (
 )
 ENV_ID = config("DJANGORLAR_ENV_ID", cast=str)
 SECRET_KEY = config("DJANGO_SECRET_KEY")
+
+# ----------------------------------------------
+# Instrumentation
+#
+QUERY_INSTRUMENTATION = config(
+    "DJANGORLAR_QUERY_INSTRUMENTATION",
+    default=False,
+    cast=bool,
+)
+# staff-only sampling profiler, see apps.abstracts.profiling
+SAMPLING_PROFILER = config(
+    "DJANGORLAR_SAMPLING_PROFILER",
+    default=False,
+    cast=bool,
+)
+
+# ----------------------------------------------
+# Network
+#
+# reverse proxies in front of the app that append to X-Forwarded-For;
+# with 0 the client address is REMOTE_ADDR and the header is ignored
+NUM_PROXIES = config(
+    "DJANGORLAR_NUM_PROXIES",
+    default=0,
+    cast=int,
+)
+
+# scheme and host of the public site, for absolute URLs in feeds, sitemaps
+# and the page cache keys `manage.py warmcache` fills
+SITE_URL = config(
+    "DJANGORLAR_SITE_URL",
+    default="http://localhost:8000",
+)
+
+# ----------------------------------------------
+# Boot
+#
+# Slim boot leaves out the admin, DRF and django-filter apps for management
+# commands and workers that never serve HTTP; manage.py enables it for the
+# commands in its SLIM_COMMANDS.
+SLIM_BOOT = config(
+    "DJANGORLAR_SLIM_BOOT",
+    default=False,
+    cast=bool,
+)
@@ -8,4 +8,12 @@ DATABASES = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': 'db.sqlite3',
     },
-}
\ No newline at end of file
+}
+
+# a single runserver process: the in-memory cache is enough
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+REQUIRE_SHARED_CACHE = False
@@ -1,4 +1,5 @@
 from settings.base import *
+from decouple import config
 
 DEBUG = True
 ALLOWED_HOSTS = ["*"]
@@ -9,3 +10,25 @@ DATABASES = {
         'NAME': 'db.sqlite3',
     },
 }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('DJANGORLAR_REDIS_URL', default='redis://127.0.0.1:6379/0'),
+    },
+}
+
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {
+        'BACKEND': 'apps.abstracts.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+SERVE_STATIC = True
+
+# accepted comments survive restarts and are seen by every process and by
+# manage.py runcommentworker
+COMMENT_QUEUE = {
+    **COMMENT_QUEUE,
+    'BACKEND': 'file',
+}
@@ -14,9 +14,21 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import path
+from django.apps import apps
+from django.conf import settings
+from django.urls import include, path, re_path
+
+from apps.news.views import feed_file, sitemap_file
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('api/news/', include('apps.news.urls')),
+    path('api/taski/', include('apps.taski.urls')),
+    path(f"{settings.NEWS_FEEDS_URL.strip('/')}/<path:path>", feed_file, name='news-feed-file'),
+    re_path(r'^(?:robots\.txt|sitemap\.xml|sitemap-articles-\d+\.xml)$', sitemap_file, name='news-sitemap-file'),
+    path('', include('apps.abstracts.urls')),
 ]
+
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangorlar.settings')
 
 application = get_wsgi_application()
+
+from apps.abstracts.static import wrap_wsgi  # noqa: E402
+
+application = wrap_wsgi(application)